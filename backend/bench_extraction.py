@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for contact extraction on large multi-page OCR output.
+
+Compares the previous approach (three uncompiled regex searches over the
+whole text, repeated after every page as the PDF loop used to do) with
+the single-pass engine in contact_extraction, scanning each page once.
+
+    python bench_extraction.py [--pages 50] [--documents 200]
+"""
+import argparse
+import random
+import re
+import time
+
+from contact_extraction import extract_contacts, extract_contacts_batch, merge_contacts
+
+WORDS = ("account", "invoice", "total", "delivery", "service", "project", "meeting", "report",
+         "schedule", "payment", "customer", "support", "company", "office", "department", "order")
+
+
+def make_page(rng: random.Random, lines: int = 60, contacts: bool = False) -> str:
+    page = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))) for _ in range(lines)]
+    page.insert(0, "Company name: Acme Widgets Ltd")
+    if contacts:
+        page.insert(rng.randint(1, lines), "Name: Jane Doe | jane.doe@example.com | +1 (555) 123-4567")
+    return "\n".join(page)
+
+
+def old_extract(text: str):
+    email = re.search(r'[\w\.-]+@[\w\.-]+', text)
+    phone = re.search(r'(\+?\d{1,3}[-.\s]?)?(\(?\d{3}\)?[-.\s]?)?\d{3}[-.\s]?\d{4}', text)
+    name = None
+    lines = text.splitlines()
+    for line in lines:
+        if "name" in line.lower():
+            name = line.split(":")[-1].strip()
+            break
+    return name, email, phone
+
+
+def old_document(pages):
+    # Joined text rescanned after each page, then once more for the result
+    for count in range(1, len(pages) + 1):
+        _, email, phone = old_extract("\n".join(pages[:count]))
+        if email and phone:
+            break
+    return old_extract("\n".join(pages[:count]))
+
+
+def new_document(pages):
+    results = []
+    offset = 0
+    for page in pages:
+        results.append(extract_contacts(page, offset=offset))
+        offset += len(page) + 1
+        if any(result["emails"] for result in results) and any(result["phones"] for result in results):
+            break
+    return merge_contacts(results)
+
+
+def timed(label: str, func, megabytes: float, repeat: int = 3):
+    best = min(_once(func) for _ in range(repeat))
+    print(f"{label:<40} {best * 1000:9.1f} ms  {megabytes / best:8.1f} MB/s")
+
+
+def _once(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50, help="pages per document")
+    parser.add_argument("--documents", type=int, default=200, help="documents in the batch run")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    # Contact details on the last page: the worst case for the per-page loop
+    pages = [make_page(rng, contacts=index == args.pages - 1) for index in range(args.pages)]
+    document_mb = sum(len(page) + 1 for page in pages) / 1e6
+    print(f"{args.pages}-page document, {document_mb:.2f} MB of text")
+    timed("old: rescan joined text per page", lambda: old_document(pages), document_mb)
+    timed("new: single pass per page", lambda: new_document(pages), document_mb)
+
+    texts = [make_page(rng, contacts=True) for _ in range(args.documents)]
+    batch_mb = sum(len(text) for text in texts) / 1e6
+    print(f"\nBatch of {args.documents} single-page documents, {batch_mb:.2f} MB of text")
+    timed("old: three searches per document", lambda: [old_extract(text) for text in texts], batch_mb)
+    timed("new: extract_contacts_batch", lambda: extract_contacts_batch(texts), batch_mb)
+
+
+if __name__ == "__main__":
+    main()
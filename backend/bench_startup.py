@@ -0,0 +1,70 @@
+"""
+Import-time benchmark for API worker cold start.
+
+Each scenario runs in a fresh interpreter and reports the wall time to
+import `main` plus the peak RSS of that process:
+
+  lazy   - `import main` as shipped (OCR/ML modules load on first use)
+  eager  - the heavy modules imported up front first, as utils used to
+  worker - `import main` then preloading the Tesseract backend, i.e.
+           what an OCR pool worker pays once at startup
+
+    python bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("cv2", "numpy", "pytesseract", "transformers", "torch", "pdf2image")
+
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+for name in {preimport!r}:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+import main
+{extra}
+seconds = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print(json.dumps({{"seconds": seconds, "rss_mb": rss_kb / 1024,
+                  "heavy_loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+SCENARIOS = {
+    "lazy": ((), ""),
+    "eager": (HEAVY_MODULES, ""),
+    "worker": ((), "import ocr_backends; ocr_backends.preload('tesseract')"),
+}
+
+
+def run(preimport, extra) -> dict:
+    code = CHILD.format(preimport=preimport, extra=extra, heavy=HEAVY_MODULES)
+    env = {**os.environ, "PYTHONWARNINGS": "ignore"}
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per scenario")
+    args = parser.parse_args()
+
+    for name, (preimport, extra) in SCENARIOS.items():
+        results = [run(preimport, extra) for _ in range(args.runs)]
+        seconds = statistics.median(result["seconds"] for result in results)
+        rss_mb = statistics.median(result["rss_mb"] for result in results)
+        loaded = ", ".join(results[-1]["heavy_loaded"]) or "none"
+        print(f"{name:<7} {seconds * 1000:8.0f} ms  {rss_mb:7.1f} MB RSS  heavy modules loaded: {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models import LeadCreate
+from utils import validate_email
+
+logger = logging.getLogger(__name__)
+
+BULK_FORMATS = ("csv", "ndjson")
+
+
+class BulkImportError(ValueError):
+    """The import body cannot be parsed at all (as opposed to a bad row)"""
+
+
+def detect_bulk_format(content_type: Optional[str]) -> str:
+    """Guess the import format from the request Content-Type"""
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+
+def _decode_line(line: bytes, line_number: int) -> str:
+    try:
+        # Only the first line can start with a byte order mark
+        return line.decode("utf-8-sig" if line_number == 1 else "utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        raise BulkImportError(f"Line {line_number} is not valid UTF-8: {e.reason} at byte {e.start}")
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream into decoded lines without buffering the whole body.
+    Only each new chunk is split; the unfinished last line is kept as a list
+    of parts, so a long line costs linear time however many chunks it spans.
+    """
+    tail: List[bytes] = []
+    line_number = 0
+    async for chunk in chunks:
+        lines = chunk.split(b"\n")
+        if len(lines) == 1:
+            tail.append(chunk)
+            continue
+        tail.append(lines[0])
+        lines[0] = b"".join(tail)
+        tail = [lines.pop()]
+        for line in lines:
+            line_number += 1
+            yield _decode_line(line, line_number)
+    last = b"".join(tail)
+    if last:
+        yield _decode_line(last, line_number + 1)
+
+
+async def iter_bulk_rows(chunks: AsyncIterator[bytes], bulk_format: str) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (row_number, row) pairs from a streamed CSV or NDJSON body.
+
+    Row numbers are 1-based and count data rows only. A row that cannot
+    be decoded is yielded as an exception instance so it can be reported
+    alongside validation errors.
+    """
+    row_number = 0
+    if bulk_format == "ndjson":
+        async for line in _iter_lines(chunks):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("Row must be a JSON object")
+                yield row_number, row
+            except ValueError as e:
+                yield row_number, e
+        return
+
+    header: Optional[List[str]] = None
+    record = ""
+    async for line in _iter_lines(chunks):
+        # A quoted field may contain newlines; keep reading until quotes balance
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            missing = {"name", "email", "phone"} - set(header)
+            if missing:
+                raise BulkImportError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+        else:
+            yield row_number, dict(zip(header, values))
+    if record:
+        yield row_number + 1, ValueError("Unterminated quoted field")
+
+
+def validate_bulk_rows(rows: List[Tuple[int, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate a batch of rows with the LeadCreate rules and validate_email.
+    Returns (valid lead fields, per-row errors).
+    """
+    valid, errors = [], []
+    for row_number, row in rows:
+        if isinstance(row, Exception):
+            errors.append({"row": row_number, "errors": [str(row)]})
+            continue
+        try:
+            lead = LeadCreate(**{field: row.get(field) for field in ("name", "email", "phone")})
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "errors": [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()]
+            })
+            continue
+        if not validate_email(lead.email):
+            errors.append({"row": row_number, "errors": ["email: Invalid email format"]})
+            continue
+        valid.append({"name": lead.name, "email": lead.email, "phone": lead.phone})
+    return valid, errors
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class DocumentJobQueueFull(Exception):
+    """The job queue is at capacity; the client should retry later"""
+
+
+class DocumentJobQueue:
+    """
+    Bounded queue of background document ingestion jobs.
+
+    `submit()` stores a job and returns its id immediately; a fixed set of
+    worker tasks runs queued jobs in order. At most `max_queued` jobs may
+    wait at once, so the uploads held by pending jobs stay bounded. Job
+    bodies wait out OCR pool backpressure themselves, so a job runs once.
+    Finished jobs are kept for `ttl` seconds so clients can poll their
+    status.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queued: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.workers = workers or int(os.getenv("DOCUMENT_JOB_WORKERS", "0")) or os.cpu_count() or 1
+        self.max_queued = max_queued or int(os.getenv("DOCUMENT_JOB_QUEUE_SIZE", "100"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("DOCUMENT_JOB_TTL_SECONDS", "3600"))
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.runners: Dict[str, Tuple[Callable[[], Awaitable[Dict[str, Any]]],
+                                      Optional[Callable[[], Awaitable[None]]]]] = {}
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queued)
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Document job queue started with {self.workers} workers (max {self.max_queued} queued)")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        # Release resources of jobs that never ran
+        for job_id in list(self.runners):
+            _, on_finish = self.runners.pop(job_id)
+            if on_finish is not None:
+                await on_finish()
+
+    def submit(self, run: Callable[[], Awaitable[Dict[str, Any]]],
+               on_finish: Optional[Callable[[], Awaitable[None]]] = None, **info: Any) -> Dict[str, Any]:
+        """
+        Queue `await run()` and return the new job. `run` returns the job
+        result dict; `await on_finish()` runs once the job is done for good
+        (e.g. to delete its upload); `info` (e.g. the filename) is stored on
+        the job as is.
+        """
+        if self.queue is None:
+            raise RuntimeError("Document job queue is not running")
+        self._expire()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": JOB_QUEUED,
+            **info,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "queue_seconds": None,
+            "processing_seconds": None,
+            "result": None,
+            "error": None,
+            "_queued": time.perf_counter()
+        }
+        try:
+            self.queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise DocumentJobQueueFull(f"Document job queue is full ({self.max_queued} jobs queued)")
+        self.jobs[job_id] = job
+        self.runners[job_id] = (run, on_finish)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._expire()
+        return self.jobs.get(job_id)
+
+    @staticmethod
+    def public(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Job fields safe to return to clients"""
+        return {key: value for key, value in job.items() if not key.startswith("_")}
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.get("_finished") is not None and now - job["_finished"] > self.ttl]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = self.jobs.get(job_id)
+        run, on_finish = self.runners.pop(job_id, (None, None))
+        if job is None or run is None:
+            return
+        started = time.perf_counter()
+        job["status"] = JOB_RUNNING
+        job["started_at"] = datetime.now().isoformat()
+        job["queue_seconds"] = round(started - job["_queued"], 4)
+
+        try:
+            job["result"] = await run()
+            job["status"] = JOB_SUCCEEDED
+            self.succeeded += 1
+        except asyncio.CancelledError:
+            job["status"] = JOB_FAILED
+            job["error"] = "Cancelled during shutdown"
+            raise
+        except Exception as e:
+            logger.error(f"Document job {job_id} failed: {e}")
+            job["status"] = JOB_FAILED
+            job["error"] = str(e)
+            self.failed += 1
+        finally:
+            job["finished_at"] = datetime.now().isoformat()
+            job["processing_seconds"] = round(time.perf_counter() - started, 4)
+            job["_finished"] = time.monotonic()
+            if on_finish is not None:
+                try:
+                    await on_finish()
+                except Exception as e:
+                    logger.error(f"Cleanup of document job {job_id} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self.tasks),
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "max_queued": self.max_queued,
+            "tracked_jobs": len(self.jobs),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
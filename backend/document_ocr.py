@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from contact_extraction import extract_contacts, merge_contacts
+from olm_ocr import OLMOCRBatcher, load_images
+from ocr_pool import OCRPool, OCRPoolFull, OCRPoolUnavailable
+from utils import (
+    build_ocr_result, ocr_error_result, ocr_pdf_page, pdf_page_count, spool_to_file, tesseract_ocr
+)
+
+logger = logging.getLogger(__name__)
+
+# PDF OCR limits; a request may lower max_pages but never raise it past the cap
+OCR_PDF_DPI = int(os.getenv("OCR_PDF_DPI", "200"))
+OCR_PDF_MAX_PAGES = int(os.getenv("OCR_PDF_MAX_PAGES", "10"))
+# "tesseract" (worker pool) or "olm" (batched vision model, Tesseract as fallback)
+OCR_ENGINE = os.getenv("OCR_ENGINE", "tesseract").lower()
+
+
+def select_pages(page_count: int, first_page: int = 1, last_page: Optional[int] = None,
+                 max_pages: Optional[int] = None) -> List[int]:
+    """1-based page numbers to OCR, clamped to the document and the page cap"""
+    max_pages = min(max_pages or OCR_PDF_MAX_PAGES, OCR_PDF_MAX_PAGES)
+    last_page = min(last_page or page_count, page_count, first_page + max_pages - 1)
+    return list(range(first_page, last_page + 1))
+
+
+async def ocr_pdf(pool: OCRPool, source: Union[str, bytes], first_page: int = 1, last_page: Optional[int] = None,
+                  max_pages: Optional[int] = None, wait: bool = False) -> Dict[str, Any]:
+    """
+    OCR a PDF page by page across the pool's workers.
+
+    Pages are rasterized one at a time inside the workers (never the whole
+    document up front) and processed in waves of one page per worker, in
+    page order. Once the pages so far contain both an email and a phone
+    number the remaining pages are skipped: contact details are nearly
+    always on the first page.
+    """
+    try:
+        page_count = await pool.run(pdf_page_count, source, wait=wait)
+    except (OCRPoolFull, OCRPoolUnavailable):
+        raise
+    except Exception as e:
+        return ocr_error_result(f"Could not read PDF: {e}")
+
+    pages = select_pages(page_count, first_page, last_page, max_pages)
+    if not pages:
+        return ocr_error_result(f"Page range starts at {first_page} but the PDF has {page_count} pages")
+
+    texts: List[str] = []
+    # Each page is scanned once as it arrives, at its offset in the joined text
+    page_contacts = []
+    offset = 0
+    processed = 0
+    wave_size = max(pool.workers, 1)
+    for start in range(0, len(pages), wave_size):
+        wave = pages[start:start + wave_size]
+        results = await _gather_pages(pool, source, wave, wait)
+        for page, text in zip(wave, results):
+            if isinstance(text, BaseException):
+                return ocr_error_result(f"OCR failed on page {page}: {text}")
+            texts.append(text)
+            page_contacts.append(extract_contacts(text, offset=offset))
+            offset += len(text) + 1
+        processed += len(wave)
+        if any(contacts["emails"] for contacts in page_contacts) and \
+                any(contacts["phones"] for contacts in page_contacts):
+            break
+
+    notes = f"Processed pages {pages[0]}-{pages[processed - 1]} of {page_count}"
+    if processed < len(pages):
+        notes += " (stopped early, contact details found)"
+    return build_ocr_result("\n".join(texts), extraction_notes=notes, contacts=merge_contacts(page_contacts))
+
+
+async def _gather_pages(pool: OCRPool, source: Union[str, bytes], pages: List[int], wait: bool = False) -> List[Any]:
+    tasks = [asyncio.ensure_future(pool.run(ocr_pdf_page, source, page, OCR_PDF_DPI, wait=wait)) for page in pages]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Pool backpressure applies to the document as a whole
+    for result in results:
+        if isinstance(result, (OCRPoolFull, OCRPoolUnavailable)):
+            raise result
+    return results
+
+
+async def ocr_document(pool: OCRPool, source: Union[str, bytes], filename: str, first_page: int = 1,
+                       last_page: Optional[int] = None, max_pages: Optional[int] = None,
+                       vision: Optional[OLMOCRBatcher] = None, wait: bool = False) -> Dict[str, Any]:
+    """
+    OCR an uploaded document: PDFs page by page, images in a single worker
+    call. Pass a file path so workers read the file themselves instead of
+    receiving a pickled copy of its bytes. `wait` queues for pool slots
+    instead of raising OCRPoolFull (see OCRPool.run). With `vision`, the OLM model
+    reads the document and Tesseract is only used when it cannot (not
+    loaded, overloaded, past the deadline or failed); such results are
+    marked "fallback".
+    """
+    if vision is not None:
+        try:
+            return await ocr_document_olm(vision, source, filename, first_page, last_page, max_pages)
+        except (OCRPoolFull, OCRPoolUnavailable):
+            raise
+        except Exception as e:
+            logger.warning(f"OLM OCR unavailable for {filename}, falling back to Tesseract: {e}")
+            result = await ocr_document(pool, source, filename, first_page, last_page, max_pages, wait=wait)
+            notes = f"Tesseract fallback: {e}"
+            if result.get("extraction_notes"):
+                notes = f"{result['extraction_notes']}; {notes}"
+            return {**result, "extraction_notes": notes, "fallback": True}
+
+    if filename.lower().endswith(".pdf"):
+        return await ocr_pdf(pool, source, first_page, last_page, max_pages, wait=wait)
+    return await pool.run(tesseract_ocr, source, filename, wait=wait)
+
+
+async def ocr_document_olm(vision: OLMOCRBatcher, source: Union[str, bytes], filename: str, first_page: int = 1,
+                           last_page: Optional[int] = None, max_pages: Optional[int] = None) -> Dict[str, Any]:
+    """Transcribe an image, or the selected PDF pages as one batch, with the resident OLM model"""
+    pages = None
+    notes = None
+    if filename.lower().endswith(".pdf"):
+        page_count = await asyncio.to_thread(pdf_page_count, source)
+        pages = select_pages(page_count, first_page, last_page, max_pages)
+        if not pages:
+            return ocr_error_result(f"Page range starts at {first_page} but the PDF has {page_count} pages")
+        notes = f"Processed pages {pages[0]}-{pages[-1]} of {page_count}"
+    images = await asyncio.to_thread(load_images, source, filename, pages)
+    texts = await vision.transcribe(images)
+    result = build_ocr_result("\n".join(texts), extraction_notes=notes)
+    result["engine"] = "olm"
+    return result
+
+
+def expand_zip(path: str, allowed_extensions: Tuple[str, ...], max_files: int,
+               max_bytes: int) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]]]:
+    """
+    Spool the documents in a ZIP archive to individual upload files.
+
+    Returns ([(name, path, sha256)], [(name, reason skipped)]); the caller
+    owns (and must remove) the returned files. Sizes are checked against
+    the uncompressed sizes in the archive directory before any member is
+    inflated, and again while streaming, so a zip bomb is never expanded.
+    """
+    documents, skipped = [], []
+    total = 0
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                name = info.filename
+                if os.path.basename(name).startswith(".") or "__MACOSX" in name:
+                    continue
+                if not name.lower().endswith(allowed_extensions):
+                    skipped.append((name, "Unsupported file type"))
+                    continue
+                if len(documents) >= max_files:
+                    skipped.append((name, f"Batch is limited to {max_files} files"))
+                    continue
+                total += info.file_size
+                if total > max_bytes:
+                    raise ValueError(f"Archive expands to more than {max_bytes // (1024 * 1024)} MB")
+                with archive.open(info) as member:
+                    member_path, digest = spool_to_file(member, name, max_bytes=info.file_size)
+                documents.append((name, member_path, digest))
+    except BaseException:
+        for _, member_path, _ in documents:
+            os.remove(member_path)
+        raise
+    return documents, skipped
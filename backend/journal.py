@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+# Journal operations
+OP_CREATE = "create"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+
+
+class LeadJournal:
+    """
+    Append-only journal of lead mutations.
+
+    Every create/update/delete is recorded as one JSON line, so a write
+    costs O(1) in the number of leads. Records are buffered by `record()`
+    and appended to disk in one fsync'd write by `flush()`, which lets
+    callers group-commit bursts of mutations. The journal is replayed on
+    top of the last snapshot at startup and truncated whenever a new
+    snapshot is written.
+    """
+
+    def __init__(self, path: str = "leads.journal", compact_every: int = 1000):
+        self.path = path
+        self.compact_every = compact_every
+        self.buffer: List[str] = []
+        # Records (on disk or buffered) not yet folded into a snapshot
+        self.pending = 0
+
+    async def replay(self, apply: Callable[[Dict[str, Any]], None]):
+        """
+        Call `apply(record)` for every record in the journal, oldest first.
+
+        `apply` must be idempotent: re-applying records that already made it
+        into the snapshot (e.g. after a crash during compaction) is harmless.
+        """
+        if not os.path.exists(self.path):
+            self.pending = 0
+            return
+
+        applied = 0
+        async with aiofiles.open(self.path, "r") as file:
+            async for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append
+                    logger.warning(f"Skipping corrupt journal record in {self.path}")
+                    continue
+                apply(record)
+                applied += 1
+
+        self.pending = applied
+        logger.info(f"Replayed {applied} journal records from {self.path}")
+
+    def record(self, op: str, lead_id: int, lead: Optional[Dict[str, Any]] = None,
+               fields: Optional[Dict[str, Any]] = None):
+        """Buffer a single mutation record; it reaches disk on the next flush"""
+        record: Dict[str, Any] = {"op": op, "id": lead_id}
+        if lead is not None:
+            record["lead"] = lead
+        if fields is not None:
+            record["fields"] = fields
+
+        # Serialize now, the lead dict may change before the flush
+        self.buffer.append(json.dumps(record, default=str) + "\n")
+        self.pending += 1
+
+    def _append_sync(self, lines: List[str]):
+        with open(self.path, "a") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    async def flush(self):
+        """Append all buffered records to the journal file in one durable write"""
+        if not self.buffer:
+            return
+        lines, self.buffer = self.buffer, []
+        try:
+            await asyncio.to_thread(self._append_sync, lines)
+        except BaseException:
+            self.buffer[:0] = lines
+            raise
+
+    def needs_compaction(self) -> bool:
+        """True once enough records have accumulated to warrant a new snapshot"""
+        return self.pending >= self.compact_every
+
+    async def truncate(self):
+        """
+        Empty the journal file after its records were folded into a snapshot.
+        Records still buffered were made after the snapshot and are kept.
+        """
+        async with aiofiles.open(self.path, "w") as file:
+            await file.write("")
+        self.pending = len(self.buffer)
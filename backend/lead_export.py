@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, List
+
+from storage import LEAD_FIELDS
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Serialize lead batches as newline-delimited JSON, one chunk per batch"""
+    async for batch in batches:
+        yield "".join(json.dumps(lead, default=str) + "\n" for lead in batch).encode()
+
+
+async def csv_chunks(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Serialize lead batches as CSV with a header row, one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=LEAD_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(batches: AsyncIterator[List[Dict[str, Any]]], export_format: str,
+                  compress: bool = False) -> AsyncIterator[bytes]:
+    """Build the byte stream for a lead export in the given format"""
+    chunks = csv_chunks(batches) if export_format == "csv" else ndjson_chunks(batches)
+    return gzip_chunks(chunks) if compress else chunks
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+import httpx
+
+from llm_scheduler import LLMOverloaded, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+SUGGESTION_PROMPT = "What is the best next follow-up action for this lead? Answer in two or three sentences."
+# Batch generations share one scheduler queue, so interactive users keep their turns
+BATCH_GROUP = "batch"
+SUGGESTION_BATCH_CONCURRENCY = int(os.getenv("SUGGESTION_BATCH_CONCURRENCY", "2"))
+SUGGESTION_BATCH_MAX_LEADS = int(os.getenv("SUGGESTION_BATCH_MAX_LEADS", "10000"))
+SUGGESTION_RETRIES = int(os.getenv("SUGGESTION_RETRIES", "3"))
+
+
+async def generate_with_retry(prompt: str, retries: int = SUGGESTION_RETRIES) -> str:
+    """
+    Generate under the batch group. A batch is not in a hurry: when the LLM
+    is overloaded wait for the suggested Retry-After and try again rather
+    than failing the lead.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await llm_scheduler.generate(prompt, group=BATCH_GROUP)
+        except LLMOverloaded as e:
+            if attempt == retries:
+                raise
+            logger.info(f"LLM overloaded, retrying batch suggestion in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+
+
+async def suggestion_results(batches: AsyncIterator[List[Dict[str, Any]]],
+                             suggest: Callable[[Dict[str, Any]], Awaitable[str]],
+                             concurrency: int = SUGGESTION_BATCH_CONCURRENCY,
+                             max_leads: int = SUGGESTION_BATCH_MAX_LEADS,
+                             skip_suggested: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run `suggest` over every lead in `batches` with at most `concurrency`
+    in flight, yielding one result per lead in completion order and then
+    a summary. Leads are pulled from the store only as workers free up,
+    so memory stays bounded however many leads match. The batch stops
+    early if the LLM host is unreachable. Closing the generator cancels
+    the suggestions still running.
+    """
+    started = time.perf_counter()
+    summary = {"done": True, "matched": 0, "succeeded": 0, "failed": 0, "skipped": 0, "truncated": False}
+    pending = set()
+
+    async def run(lead: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            suggestion = await suggest(lead)
+        except httpx.ConnectError:
+            summary["error"] = "Ollama server is not running. Please start Ollama first."
+            return {"id": lead["id"], "status": "failed", "error": summary["error"]}
+        except httpx.TimeoutException:
+            return {"id": lead["id"], "status": "failed", "error": "Request to Ollama timed out"}
+        except Exception as e:
+            return {"id": lead["id"], "status": "failed", "error": str(e)}
+        return {"id": lead["id"], "status": "succeeded", "suggestion": suggestion}
+
+    def finished(done) -> List[Dict[str, Any]]:
+        results = [task.result() for task in done]
+        for result in results:
+            summary[result["status"]] += 1
+        return results
+
+    try:
+        async for batch in batches:
+            for lead in batch:
+                if skip_suggested and lead.get("suggestion"):
+                    summary["skipped"] += 1
+                    continue
+                if summary["matched"] >= max_leads:
+                    summary["truncated"] = True
+                    break
+                while len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for result in finished(done):
+                        yield result
+                if "error" in summary:
+                    break
+                summary["matched"] += 1
+                pending.add(asyncio.create_task(run(lead)))
+            if summary["truncated"] or "error" in summary:
+                break
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for result in finished(done):
+                yield result
+    finally:
+        for task in pending:
+            task.cancel()
+        # Collect the cancelled tasks so none is left running after the batch
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if "error" in summary:
+        logger.error("Suggestion batch stopped early: Ollama is unreachable")
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Suggestion batch: {summary['succeeded']} succeeded, {summary['failed']} failed, "
+                f"{summary['skipped']} skipped in {summary['seconds']}s")
+    yield summary
+
+
+async def suggestion_stream(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Serialize suggestion results as newline-delimited JSON, one line per result"""
+    try:
+        async for result in results:
+            yield (json.dumps(result, default=str) + "\n").encode()
+    finally:
+        # A disconnected client closes this stream; stop the batch with it
+        await results.aclose()
@@ -0,0 +1,587 @@
+import heapq
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from models import LeadSource, LeadStatus
+
+EPOCH = datetime(1970, 1, 1)
+# Stored in a timestamp column when the value is missing or kept verbatim in extras
+NO_TIMESTAMP = -(2 ** 63)
+# Code written to the status and source columns of deleted rows
+DELETED = 255
+TEXT_FIELDS = ("name", "email", "phone")
+# Optional fields written after creation (batch AI follow-up suggestions)
+SUGGESTION_FIELDS = ("suggestion", "suggested_at")
+CORE_FIELDS = ("id", "name", "email", "phone", "status", "source", "created_at") + SUGGESTION_FIELDS
+FIELD_SEPARATOR = "\x1f"
+NULL_MARKER = "\x00"
+# Dead arena text below this size is not worth a compaction
+MIN_GARBAGE_BYTES = 64 * 1024
+# Rows examined per scan() call
+SCAN_CHUNK = 2000
+
+
+def parse_micros(value: Any) -> Optional[int]:
+    """Naive ISO timestamp -> microseconds since the epoch (None if unparsable or tz-aware)"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        return None
+    return (parsed - EPOCH) // timedelta(microseconds=1)
+
+
+def format_micros(micros: int) -> str:
+    return (EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+class CodeTable:
+    """Interns a small set of values (statuses, sources) as one-byte codes"""
+
+    def __init__(self, values: Iterable[Any] = ()):
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+        self.counts: List[int] = []
+        for value in values:
+            self.code(value)
+
+    def code(self, value: Any) -> int:
+        """Code for `value`, assigning a new one on first use"""
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) >= DELETED:
+                raise ValueError(f"Too many distinct values (max {DELETED})")
+            if isinstance(value, str):
+                value = sys.intern(value)
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+            self.counts.append(0)
+        return code
+
+
+class LeadTable:
+    """
+    Compact columnar storage for leads.
+
+    Each lead is one row across parallel columns: ids (kept sorted, so
+    lookups are a binary search), one-byte status/source codes interned
+    through CodeTable, created_at and suggested_at as integer microseconds,
+    and name/email/phone plus the suggestion text packed into a single
+    UTF-8 string arena. Fields outside the core schema live in a per-id
+    `extras` dict. A row costs roughly 50 bytes plus its text, versus
+    ~1 KB for a dict of strings.
+
+    Deleted rows are tombstoned (status/source set to DELETED) and dropped
+    once they make up half the table. Leads are materialized as plain
+    dicts on read; mutate them through `update`, not in place.
+    """
+
+    def __init__(self, leads: Iterable[Dict[str, Any]] = ()):
+        self.ids = array("q")
+        self.status = bytearray()
+        self.source = bytearray()
+        self.created = array("q")
+        self.text_start = array("Q")
+        self.text_len = array("I")
+        # Suggestion text span in the arena (length 0: no suggestion) and time
+        self.suggest_start = array("Q")
+        self.suggest_len = array("I")
+        self.suggested = array("q")
+        self.arena = bytearray()
+        # Text loaded from a snapshot stays in this read-only (usually memory
+        # mapped) buffer; offsets past its end point into `arena`
+        self.arena_base: Any = b""
+        self.base_len = 0
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self.statuses = CodeTable(status.value for status in LeadStatus)
+        self.sources = CodeTable(source.value for source in LeadSource)
+        self.live = 0
+        self.garbage_bytes = 0
+        self._email_index: Optional[Dict[str, Set[int]]] = None
+        # field -> live lead ids ordered by sort_key(field)
+        self._sort_indexes: Dict[str, array] = {}
+        # field -> ids written while that field's index is being built
+        self._index_dirty: Dict[str, Set[int]] = {}
+        for lead in sorted(leads, key=lambda lead: lead["id"]):
+            self.add(lead)
+
+    # Row level access
+
+    def __len__(self) -> int:
+        return self.live
+
+    def __contains__(self, lead_id: int) -> bool:
+        return self.find_row(lead_id) is not None
+
+    @property
+    def last_id(self) -> int:
+        return self.ids[-1] if self.ids else 0
+
+    def find_row(self, lead_id: int) -> Optional[int]:
+        row = bisect_left(self.ids, lead_id)
+        if row < len(self.ids) and self.ids[row] == lead_id and self.status[row] != DELETED:
+            return row
+        return None
+
+    def _span(self, start: int, length: int) -> bytes:
+        if start < self.base_len:
+            return self.arena_base[start:start + length]
+        start -= self.base_len
+        return self.arena[start:start + length]
+
+    def _blob(self, row: int) -> bytes:
+        return self._span(self.text_start[row], self.text_len[row])
+
+    def _suggestion_blob(self, row: int) -> bytes:
+        return self._span(self.suggest_start[row], self.suggest_len[row])
+
+    def text(self, row: int) -> Tuple[Optional[str], ...]:
+        """(name, email, phone) of a row"""
+        blob = bytes(self._blob(row)).decode()
+        return tuple(None if part == NULL_MARKER else part for part in blob.split(FIELD_SEPARATOR))
+
+    def lead(self, row: int) -> Dict[str, Any]:
+        """Materialize a row as a lead dict"""
+        lead_id = self.ids[row]
+        name, email, phone = self.text(row)
+        created = self.created[row]
+        lead = {
+            "id": lead_id,
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "status": self.statuses.values[self.status[row]],
+            "source": self.sources.values[self.source[row]],
+            "created_at": format_micros(created) if created != NO_TIMESTAMP else None
+        }
+        if self.suggest_len[row]:
+            lead["suggestion"] = bytes(self._suggestion_blob(row)).decode()
+        if self.suggested[row] != NO_TIMESTAMP:
+            lead["suggested_at"] = format_micros(self.suggested[row])
+        extra = self.extras.get(lead_id)
+        if extra:
+            lead.update(extra)
+        return lead
+
+    def sort_key(self, row: int, field: str) -> Tuple[Any, int]:
+        """Sort key matching storage._sort_key, computed without materializing the row"""
+        lead_id = self.ids[row]
+        if field == "id":
+            return lead_id, lead_id
+        if field == "created_at":
+            return self.created[row], lead_id
+        return self.text(row)[TEXT_FIELDS.index(field)] or "", lead_id
+
+    # Writes
+
+    def _set_code(self, column: bytearray, codes: CodeTable, row: int, value: Any):
+        old = column[row]
+        if old != DELETED:
+            codes.counts[old] -= 1
+        code = codes.code(value)
+        column[row] = code
+        codes.counts[code] += 1
+
+    def _set_text(self, row: int, values: Tuple[Optional[str], ...]) -> bool:
+        """Pack name/email/phone into the arena; False if a value cannot be packed"""
+        parts = [NULL_MARKER if value is None else str(value) for value in values]
+        if any(FIELD_SEPARATOR in part or (part == NULL_MARKER and value is not None)
+               for part, value in zip(parts, values)):
+            return False
+        blob = FIELD_SEPARATOR.join(parts).encode()
+        if self.text_len[row] == len(blob) and self._blob(row) == blob:
+            # Unchanged text (status flips, extras) keeps its arena bytes
+            return True
+        self.garbage_bytes += self.text_len[row]
+        self.text_start[row] = self.base_len + len(self.arena)
+        self.text_len[row] = len(blob)
+        self.arena += blob
+        return True
+
+    def _set_suggestion(self, row: int, blob: bytes):
+        if self.suggest_len[row] == len(blob) and self._suggestion_blob(row) == blob:
+            return
+        self.garbage_bytes += self.suggest_len[row]
+        self.suggest_start[row] = self.base_len + len(self.arena)
+        self.suggest_len[row] = len(blob)
+        self.arena += blob
+
+    @staticmethod
+    def _timestamp(lead: Dict[str, Any], field: str, extra: Dict[str, Any]) -> int:
+        """Column value for a timestamp field; values that would not round-trip are also kept in `extra`"""
+        value = lead.get(field)
+        micros = parse_micros(value)
+        if value is not None and (micros is None or format_micros(micros) != value):
+            extra[field] = value
+        return micros if micros is not None else NO_TIMESTAMP
+
+    def _write_row(self, row: int, lead: Dict[str, Any]):
+        lead_id = lead["id"]
+        extra = {key: value for key, value in lead.items() if key not in CORE_FIELDS}
+
+        self._set_code(self.status, self.statuses, row, lead.get("status"))
+        self._set_code(self.source, self.sources, row, lead.get("source"))
+        self.created[row] = self._timestamp(lead, "created_at", extra)
+        self.suggested[row] = self._timestamp(lead, "suggested_at", extra)
+
+        text = tuple(lead.get(field) for field in TEXT_FIELDS)
+        if not self._set_text(row, text):
+            self._set_text(row, (None, None, None))
+            extra.update(zip(TEXT_FIELDS, text))
+
+        suggestion = lead.get("suggestion")
+        self._set_suggestion(row, suggestion.encode() if isinstance(suggestion, str) else b"")
+        if suggestion is not None and not (isinstance(suggestion, str) and suggestion):
+            # An empty suggestion has no span of its own to tell it from none
+            extra["suggestion"] = suggestion
+
+        if extra:
+            self.extras[lead_id] = extra
+        else:
+            self.extras.pop(lead_id, None)
+        if self._email_index is not None:
+            self._index_email(lead_id, lead.get("email"))
+
+    def _insert_row(self, row: int, lead_id: int):
+        self.ids.insert(row, lead_id)
+        self.status.insert(row, DELETED)
+        self.source.insert(row, DELETED)
+        self.created.insert(row, NO_TIMESTAMP)
+        self.text_start.insert(row, self.base_len + len(self.arena))
+        self.text_len.insert(row, 0)
+        self.suggest_start.insert(row, self.base_len + len(self.arena))
+        self.suggest_len.insert(row, 0)
+        self.suggested.insert(row, NO_TIMESTAMP)
+
+    def add(self, lead: Dict[str, Any]):
+        """Add a lead, replacing any existing lead with the same id"""
+        lead_id = lead["id"]
+        if not self.ids or lead_id > self.ids[-1]:
+            # New ids are always the largest so far; this is the common case
+            row = len(self.ids)
+            self._insert_row(row, lead_id)
+        else:
+            row = bisect_left(self.ids, lead_id)
+            if row < len(self.ids) and self.ids[row] == lead_id:
+                if self.status[row] != DELETED:
+                    self.remove(lead_id)
+                    row = bisect_left(self.ids, lead_id)
+                    if row == len(self.ids) or self.ids[row] != lead_id:
+                        self._insert_row(row, lead_id)
+            else:
+                self._insert_row(row, lead_id)
+        self._write_row(row, lead)
+        self.live += 1
+        self._mark_dirty(lead_id)
+        for field, index in self._sort_indexes.items():
+            index.insert(self._locate(index, field, self.sort_key(row, field)), lead_id)
+
+    def update(self, lead_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update fields of a lead; returns the updated lead or None if missing"""
+        row = self.find_row(lead_id)
+        if row is None:
+            return None
+        lead = self.lead(row)
+        lead.update(fields)
+        if self._email_index is not None:
+            self._unindex_email(lead_id)
+        self._mark_dirty(lead_id)
+        old_keys = [(field, index, self.sort_key(row, field)) for field, index in self._sort_indexes.items()]
+        self._write_row(row, lead)
+        for field, index, old_key in old_keys:
+            new_key = self.sort_key(row, field)
+            if new_key != old_key:
+                del index[self._locate(index, field, old_key)]
+                index.insert(self._locate(index, field, new_key), lead_id)
+        if self.needs_compaction():
+            self.compact()
+        return lead
+
+    def remove(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        row = self.find_row(lead_id)
+        if row is None:
+            return None
+        lead = self.lead(row)
+        self._mark_dirty(lead_id)
+        for field, index in self._sort_indexes.items():
+            del index[self._locate(index, field, self.sort_key(row, field))]
+        self.statuses.counts[self.status[row]] -= 1
+        self.sources.counts[self.source[row]] -= 1
+        self.status[row] = DELETED
+        self.source[row] = DELETED
+        self.extras.pop(lead_id, None)
+        if self._email_index is not None:
+            self._unindex_email(lead_id, lead.get("email"))
+        self.live -= 1
+        if self.needs_compaction():
+            self.compact()
+        return lead
+
+    def migrate_extras(self):
+        """Move suggestions kept in extras (snapshots before format version 2) into their columns"""
+        for lead_id in [lead_id for lead_id, extra in self.extras.items()
+                        if any(field in extra for field in SUGGESTION_FIELDS)]:
+            row = self.find_row(lead_id)
+            if row is not None:
+                self._write_row(row, self.lead(row))
+
+    def needs_compaction(self) -> bool:
+        """True once tombstones outnumber live rows or dead text is half the arena"""
+        if len(self.ids) - self.live > max(self.live, 1024):
+            return True
+        arena_size = self.base_len + len(self.arena)
+        return self.garbage_bytes > max(arena_size // 2, MIN_GARBAGE_BYTES)
+
+    def compact(self):
+        """Drop tombstoned rows and arena bytes no live row points at"""
+        rows = [row for row in range(len(self.ids)) if self.status[row] != DELETED]
+        arena = bytearray()
+        text_start = array("Q")
+        suggest_start = array("Q")
+        for row in rows:
+            text_start.append(len(arena))
+            arena += self._blob(row)
+            suggest_start.append(len(arena))
+            arena += self._suggestion_blob(row)
+        self.ids = array("q", (self.ids[row] for row in rows))
+        self.status = bytearray(self.status[row] for row in rows)
+        self.source = bytearray(self.source[row] for row in rows)
+        self.created = array("q", (self.created[row] for row in rows))
+        self.text_len = array("I", (self.text_len[row] for row in rows))
+        self.text_start = text_start
+        self.suggest_len = array("I", (self.suggest_len[row] for row in rows))
+        self.suggested = array("q", (self.suggested[row] for row in rows))
+        self.suggest_start = suggest_start
+        self.arena = arena
+        self.arena_base = b""
+        self.base_len = 0
+        self.garbage_bytes = 0
+
+    # Email index, built on first use
+
+    def _index_email(self, lead_id: int, email: Optional[str]):
+        if email:
+            self._email_index.setdefault(email.strip().lower(), set()).add(lead_id)
+
+    def _unindex_email(self, lead_id: int, email: Optional[str] = None):
+        if email is None:
+            row = self.find_row(lead_id)
+            email = self.lead(row).get("email") if row is not None else None
+        if email:
+            ids = self._email_index.get(email.strip().lower())
+            if ids is not None:
+                ids.discard(lead_id)
+                if not ids:
+                    del self._email_index[email.strip().lower()]
+
+    def ids_for_email(self, email: str) -> Set[int]:
+        """Ids of leads with this email (case-insensitive)"""
+        if self._email_index is None:
+            self._email_index = {}
+            for row in self.iter_rows():
+                self._index_email(self.ids[row], self.lead(row).get("email"))
+        return set(self._email_index.get(email.strip().lower(), ()))
+
+    # Sort indexes, built on first use; they hold ids, so compaction keeps them valid
+
+    def has_sort_index(self, field: str) -> bool:
+        return field == "id" or field in self._sort_indexes
+
+    def sorted_ids(self, field: str) -> array:
+        """Live lead ids ordered by sort_key(field)"""
+        if field not in self._sort_indexes:
+            for _ in self.build_sort_index(field):
+                pass
+        return self._sort_indexes[field]
+
+    def build_sort_index(self, field: str) -> Iterator[None]:
+        """
+        Build the sort index of `field` in steps of SCAN_CHUNK rows. The
+        caller may run other work between steps, writes included: leads
+        written meanwhile are placed again once the build completes.
+        """
+        if field in self._sort_indexes or field in self._index_dirty:
+            return
+        self._index_dirty[field] = set()
+        position = TEXT_FIELDS.index(field) if field != "created_at" else None
+        runs = []
+        after_id = None
+        while True:
+            rows = list(islice(self.iter_rows(after_id=after_id), SCAN_CHUNK))
+            if not rows:
+                break
+            after_id = self.ids[rows[-1]]
+            if position is None:
+                run = [(self.created[row], self.ids[row]) for row in rows]
+            else:
+                run = [(self.text(row)[position] or "", self.ids[row]) for row in rows]
+            # Runs are in id order and both sort and merge are stable, so ties stay in id order
+            run.sort(key=itemgetter(0))
+            runs.append(run)
+            yield
+
+        index = array("q")
+        merged = heapq.merge(*runs, key=itemgetter(0))
+        while True:
+            ids = [lead_id for _, lead_id in islice(merged, SCAN_CHUNK)]
+            if not ids:
+                break
+            index.extend(ids)
+            yield
+
+        dirty = self._index_dirty.pop(field)
+        if dirty:
+            index = array("q", (lead_id for lead_id in index if lead_id not in dirty))
+        self._sort_indexes[field] = index
+        for lead_id in dirty:
+            row = self.find_row(lead_id)
+            if row is not None:
+                index.insert(self._locate(index, field, self.sort_key(row, field)), lead_id)
+
+    def _mark_dirty(self, lead_id: int):
+        for dirty in self._index_dirty.values():
+            dirty.add(lead_id)
+
+    def _locate(self, index: array, field: str, key: Tuple[Any, int]) -> int:
+        """Position of `key` in a sort index; the entry of key's own id is taken to have that key"""
+        lead_id = key[1]
+        return bisect_left(index, key, key=lambda other: key if other == lead_id
+                           else self.sort_key(self.find_row(other), field))
+
+    # Scans
+
+    def scan(self, field: str, after: Optional[Tuple[Any, int]] = None, descending: bool = False,
+             status: Optional[Any] = None, source: Optional[Any] = None,
+             limit: int = SCAN_CHUNK) -> Tuple[List[int], Optional[Tuple[Any, int]]]:
+        """
+        Live rows in (field, id) order strictly past the keyset position
+        `after`, restricted to status/source, examining at most `limit`
+        rows. Returns the rows and the sort key to resume from (None at the
+        end). Keys stay valid while the table changes, so a long scan can
+        be resumed in chunks.
+        """
+        if field == "id":
+            rows = list(islice(self.iter_rows(after_id=after[1] if after else None, descending=descending,
+                                              status=status, source=source), limit))
+            return rows, (self.sort_key(rows[-1], field) if len(rows) == limit else None)
+
+        filters = []
+        for column, codes, value in ((self.status, self.statuses, status), (self.source, self.sources, source)):
+            if value is not None:
+                code = codes.codes.get(value)
+                if code is None:
+                    return [], None
+                filters.append((column, code))
+        index = self.sorted_ids(field)
+        if after is None:
+            position = len(index) - 1 if descending else 0
+        else:
+            position = bisect_left(index, after, key=lambda lead_id: self.sort_key(self.find_row(lead_id), field))
+            if descending:
+                position -= 1
+            elif position < len(index) and self.sort_key(self.find_row(index[position]), field) == after:
+                position += 1
+        step = -1 if descending else 1
+        rows = []
+        row = None
+        for _ in range(limit):
+            if not 0 <= position < len(index):
+                return rows, None
+            row = self.find_row(index[position])
+            if all(column[row] == code for column, code in filters):
+                rows.append(row)
+            position += step
+        return rows, (self.sort_key(row, field) if 0 <= position < len(index) else None)
+
+
+    def count_for(self, field: str, value: Any) -> int:
+        """Number of live leads with the given status or source"""
+        codes = self.statuses if field == "status" else self.sources
+        code = codes.codes.get(value)
+        return codes.counts[code] if code is not None else 0
+
+    def counts_by(self, field: str) -> Dict[Any, int]:
+        """Number of live leads per status or source, omitting values with none"""
+        codes = self.statuses if field == "status" else self.sources
+        return {value: count for value, count in zip(codes.values, codes.counts) if count}
+
+    def iter_rows(self, after_id: Optional[int] = None, descending: bool = False,
+                  status: Optional[Any] = None, source: Optional[Any] = None) -> Iterator[int]:
+        """
+        Live rows in id order, starting strictly after the id `after_id`.
+        Status/source filters scan their one-byte column with bytearray.find,
+        so non-matching rows are skipped without touching Python objects.
+        """
+        if descending:
+            end = len(self.ids) if after_id is None else bisect_left(self.ids, after_id)
+        else:
+            start = 0 if after_id is None else bisect_right(self.ids, after_id)
+            end = len(self.ids)
+
+        filters = []
+        for column, codes, value in ((self.status, self.statuses, status), (self.source, self.sources, source)):
+            if value is not None:
+                code = codes.codes.get(value)
+                if code is None:
+                    return
+                filters.append((codes.counts[code], column, code))
+
+        if not filters:
+            rows = range(end - 1, -1, -1) if descending else range(start, end)
+            for row in rows:
+                if self.status[row] != DELETED:
+                    yield row
+            return
+
+        # Scan the most selective column and check the other one per hit
+        filters.sort(key=lambda item: item[0])
+        _, column, code = filters[0]
+        others = [(other, other_code) for _, other, other_code in filters[1:]]
+        if descending:
+            row = column.rfind(code, 0, end)
+            while row != -1:
+                if all(other[row] == other_code for other, other_code in others):
+                    yield row
+                row = column.rfind(code, 0, row)
+        else:
+            row = column.find(code, start, end)
+            while row != -1:
+                if all(other[row] == other_code for other, other_code in others):
+                    yield row
+                row = column.find(code, row + 1, end)
+
+    # Dict-style read API
+
+    def get(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        row = self.find_row(lead_id)
+        return self.lead(row) if row is not None else None
+
+    def values(self) -> Iterator[Dict[str, Any]]:
+        for row in self.iter_rows():
+            yield self.lead(row)
+
+    def select(self, status: Optional[str] = None, source: Optional[str] = None,
+               email: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Leads matching all given criteria, in id order"""
+        if email is not None:
+            leads = [self.get(lead_id) for lead_id in sorted(self.ids_for_email(email))]
+            return [lead for lead in leads if lead is not None
+                    and (status is None or lead["status"] == status)
+                    and (source is None or lead["source"] == source)]
+        return [self.lead(row) for row in self.iter_rows(status=status, source=source)]
+
+    def memory_usage(self) -> int:
+        """Approximate heap bytes held by the columns and the string arena (mapped text excluded)"""
+        return sum(len(column) * column.itemsize for column in
+                   (self.ids, self.created, self.text_start, self.text_len,
+                    self.suggest_start, self.suggest_len, self.suggested)) \
+            + len(self.status) + len(self.source) + len(self.arena)
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+# Fields that go into the assistant prompt; a change to any of them means
+# earlier answers about the lead may no longer apply
+LEAD_CONTEXT_FIELDS = ("name", "email", "phone", "status", "source")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, spacing and trailing punctuation do not change the question"""
+    return WHITESPACE.sub(" ", prompt).strip().rstrip("?!. ").lower()
+
+
+def lead_fingerprint(lead: Dict[str, Any]) -> str:
+    context = "\x1f".join(str(lead.get(field, "")) for field in LEAD_CONTEXT_FIELDS)
+    return hashlib.sha256(context.encode()).hexdigest()[:16]
+
+
+class LLMResponseCache:
+    """
+    LRU + TTL cache of LLM replies to lead-assistant questions.
+
+    Keys combine the model, the normalized prompt and a fingerprint of the
+    lead fields the prompt embeds, so an answer is only reused while the
+    lead looks the same to the model. Entries expire after `ttl` seconds
+    and the least recently used are evicted beyond `max_entries`. Status
+    updates and deletes also drop the lead's entries right away via
+    `invalidate_lead()`.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+        # key -> (lead id, reply, expiry on the monotonic clock)
+        self.entries: "OrderedDict[str, Tuple[int, str, float]]" = OrderedDict()
+        self.lead_keys: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.invalidated = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def make_key(self, model: str, prompt: str, lead: Dict[str, Any]) -> str:
+        raw = f"{model}\x1e{normalize_prompt(prompt)}\x1e{lead['id']}\x1e{lead_fingerprint(lead)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        lead_id, reply, expires = entry
+        if expires <= time.monotonic():
+            self._drop(key)
+            self.expired += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return reply
+
+    def put(self, key: str, lead_id: int, reply: str):
+        if not self.enabled:
+            return
+        self.entries[key] = (lead_id, reply, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        self.lead_keys.setdefault(lead_id, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+            self.evicted += 1
+
+    def _drop(self, key: str):
+        lead_id, _, _ = self.entries.pop(key)
+        keys = self.lead_keys.get(lead_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.lead_keys[lead_id]
+
+    def invalidate_lead(self, lead_id: int):
+        """Forget every cached reply about a lead (status change, delete)"""
+        for key in self.lead_keys.pop(lead_id, ()):
+            self.entries.pop(key, None)
+            self.invalidated += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "invalidated": self.invalidated
+        }
+
+
+# Create a singleton instance
+llm_cache = LLMResponseCache()
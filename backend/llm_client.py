@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+NO_LLM_REPLY = "[No response from LLM]"
+
+
+class LLMError(Exception):
+    """Ollama reported an error, or sent an unreadable line, in the middle of a streamed generation"""
+
+
+class LLMClient:
+    """
+    Long-lived client for the Ollama generate API.
+
+    One httpx.AsyncClient is created at startup and shared by every
+    request, so connections to the LLM host are pooled and kept alive
+    instead of being opened per request. Connect, read, write and
+    pool-wait timeouts are configured separately: a slow generation may
+    take a minute, but a down host should fail in seconds. Admission
+    (how many generations run at once) is up to the caller; see
+    llm_scheduler.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None):
+        self.base_url = (base_url or os.getenv("OLLAMA_URL", "http://localhost:11434")).rstrip("/")
+        self.model = model or os.getenv("OLLAMA_MODEL", "llama2")
+        self.timeout = httpx.Timeout(
+            connect=float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5")),
+            read=float(os.getenv("OLLAMA_READ_TIMEOUT", "60")),
+            write=float(os.getenv("OLLAMA_WRITE_TIMEOUT", "10")),
+            pool=float(os.getenv("OLLAMA_POOL_TIMEOUT", "10"))
+        )
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("OLLAMA_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("OLLAMA_KEEPALIVE_SECONDS", "60"))
+        )
+        self.client: Optional[httpx.AsyncClient] = None
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.streams = 0
+        self.cancelled_streams = 0
+
+    async def start(self):
+        if self.client is not None:
+            return
+        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        logger.info(f"LLM client for {self.base_url} ({self.model}) started")
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def generate(self, prompt: str, model: Optional[str] = None, **options: Any) -> str:
+        """
+        Complete `prompt` and return the generated text. Raises httpx errors
+        (ConnectError, TimeoutException, HTTPStatusError) to the caller.
+        """
+        if self.client is None:
+            raise RuntimeError("LLM client is not started")
+        payload = {"model": model or self.model, "prompt": prompt, "stream": False, **options}
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await self.client.post("/api/generate", json=payload)
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.requests += 1
+            self.total_seconds += time.perf_counter() - started
+        return data.get("response") or data.get("message") or NO_LLM_REPLY
+
+    async def stream(self, prompt: str, model: Optional[str] = None, **options: Any) -> AsyncIterator[str]:
+        """
+        Yield generated text as Ollama produces it. Closing the generator
+        early (e.g. when the HTTP client goes away) closes the connection
+        to Ollama, which stops the generation.
+        """
+        if self.client is None:
+            raise RuntimeError("LLM client is not started")
+        payload = {"model": model or self.model, "prompt": prompt, "stream": True, **options}
+        self.in_flight += 1
+        self.streams += 1
+        started = time.perf_counter()
+        finished = False
+        try:
+            async with self.client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise LLMError(f"Malformed stream line from Ollama: {e}")
+                    if chunk.get("error"):
+                        raise LLMError(chunk["error"])
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+            finished = True
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled_streams += 1
+            logger.info("LLM stream abandoned by its client, closed the Ollama connection")
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            if finished:
+                self.requests += 1
+                self.total_seconds += time.perf_counter() - started
+
+    @property
+    def mean_seconds(self) -> Optional[float]:
+        return self.total_seconds / self.requests if self.requests else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.base_url,
+            "model": self.model,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "streams": self.streams,
+            "cancelled_streams": self.cancelled_streams,
+            "mean_seconds": round(self.mean_seconds, 3) if self.requests else None
+        }
+
+
+# Create a singleton instance
+llm_client = LLMClient()
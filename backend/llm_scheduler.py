@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from llm_client import LLMClient, llm_client
+
+logger = logging.getLogger(__name__)
+
+
+class LLMOverloaded(Exception):
+    """The LLM queue is full, or a request waited too long for a slot"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM host.
+
+    At most `max_concurrency` generations run at once. Further requests
+    wait in per-group FIFO queues served round-robin, so one busy client
+    (or a batch job) cannot starve the others. A request that would make
+    more than `max_queue` wait, or that waits longer than `max_wait`
+    seconds, fails fast with LLMOverloaded and a Retry-After estimate
+    instead of piling up until the HTTP timeout. Identical prompts that
+    are already being generated share that single generation.
+    """
+
+    def __init__(self, client: LLMClient, max_concurrency: Optional[int] = None, max_queue: Optional[int] = None,
+                 max_wait: Optional[float] = None, retry_after: Optional[int] = None):
+        self.client = client
+        self.max_concurrency = max_concurrency or int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("LLM_MAX_QUEUE", "32"))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "20"))
+        self.retry_after = retry_after or int(os.getenv("LLM_RETRY_AFTER_SECONDS", "5"))
+        self.active = 0
+        # group -> waiters; groups are served in turn, oldest waiter first
+        self.queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.waiting = 0
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.coalesced = 0
+
+    def retry_after_seconds(self) -> int:
+        """Rough time until a slot frees up: the backlog times the mean generation time"""
+        mean = self.client.mean_seconds
+        if mean is None:
+            return self.retry_after
+        backlog = (self.waiting + self.active) / self.max_concurrency
+        return max(1, math.ceil(backlog * mean))
+
+    def check_admission(self):
+        """Raise LLMOverloaded now if a new request would be rejected"""
+        if self.active >= self.max_concurrency and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise LLMOverloaded(f"LLM queue is full ({self.waiting} requests waiting)", self.retry_after_seconds())
+
+    async def acquire(self, group: str = "default"):
+        if self.active < self.max_concurrency and not self.waiting:
+            self.active += 1
+            self.admitted += 1
+            return
+        self.check_admission()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(group, deque()).append(waiter)
+        self.waiting += 1
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove(group, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise LLMOverloaded(f"Waited more than {self.max_wait:g}s for the LLM", self.retry_after_seconds())
+            raise
+        # release() handed its slot over; `active` already counts us
+        self.admitted += 1
+
+    def _remove(self, group: str, waiter: asyncio.Future):
+        queue = self.queues.get(group)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.waiting -= 1
+            if not queue:
+                del self.queues[group]
+
+    def release(self):
+        """Free a slot, handing it to the next waiter of the next group in turn"""
+        while self.queues:
+            group, queue = next(iter(self.queues.items()))
+            waiter = queue.popleft()
+            self.waiting -= 1
+            if queue:
+                self.queues.move_to_end(group)
+            else:
+                del self.queues[group]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def generate(self, prompt: str, group: str = "default", model: Optional[str] = None) -> str:
+        """Generate a reply under admission control, sharing identical in-flight prompts"""
+        model = model or self.client.model
+        key = hashlib.sha256(f"{model}\x1e{prompt}".encode()).hexdigest()
+        while True:
+            shared = self.inflight.get(key)
+            if shared is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+                # The request we joined was abandoned by its client; take over
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            await self.acquire(group)
+            try:
+                reply = await self.client.generate(prompt, model=model)
+            finally:
+                self.release()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so failures without followers are not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self.inflight.pop(key, None)
+        future.set_result(reply)
+        return reply
+
+    async def stream(self, prompt: str, group: str = "default", model: Optional[str] = None) -> AsyncIterator[str]:
+        """LLMClient.stream under admission control (streams are not shared)"""
+        await self.acquire(group)
+        try:
+            async for token in self.client.stream(prompt, model=model):
+                yield token
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "waiting_groups": len(self.queues),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "coalesced": self.coalesced
+        }
+
+
+# Create a singleton instance
+llm_scheduler = LLMScheduler(llm_client)
@@ -1,14 +1,14 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import json
-import aiofiles
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
 import logging
 from PIL import Image
 import io
 import re
+import zipfile
 from contextlib import asynccontextmanager
 import httpx
 import asyncio
@@ -21,67 +21,98 @@ load_dotenv()
 from models import (
     LeadCreate, LeadResponse, LeadStatusUpdate, LeadInteraction, 
     InteractionResponse, WorkflowRequest, WorkflowResponse, 
-    DocumentExtractionResponse, LeadStatus, LeadSource, ErrorResponse, SuccessResponse
+    DocumentExtractionResponse, LeadStatus, LeadSource, ErrorResponse, SuccessResponse,
+    BulkImportResponse, DocumentJobAccepted, DocumentJobStatus, DocumentBatchResponse,
+    SuggestionBatchRequest, LeadStats
 )
 from utils import (
     validate_email, extract_email_from_text, extract_name_from_text,
-    save_uploaded_file, cleanup_temp_file, tesseract_ocr,
+    save_uploaded_file, cleanup_temp_file, UploadTooLarge,
     validate_workflow_structure, get_workflow_action_description,
     sanitize_text, generate_unique_id, OLM_OCR_AVAILABLE
 )
 from email_service import email_service
+from storage import create_lead_store, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from lead_export import EXPORT_FORMATS, export_stream
+from response_cache import VersionedResponseCache
+from ocr_pool import ocr_pool, OCRPoolFull, OCRPoolUnavailable
+from ocr_cache import ocr_cache
+from document_ocr import OCR_ENGINE, ocr_document, expand_zip
+from olm_ocr import olm_ocr_batcher
+from llm_client import NO_LLM_REPLY, LLMError, llm_client
+from llm_cache import llm_cache
+from llm_scheduler import LLMOverloaded, llm_scheduler
+from lead_suggestions import (
+    SUGGESTION_PROMPT, SUGGESTION_BATCH_MAX_LEADS, generate_with_retry, suggestion_results, suggestion_stream
+)
+from ocr_preprocess import PREPROCESS_SETTINGS
+from ocr_backends import backend_stats
+from document_jobs import DocumentJobQueue, DocumentJobQueueFull
+from bulk_import import (
+    BULK_FORMATS, BulkImportError, detect_bulk_format, iter_bulk_rows, validate_bulk_rows
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# In-memory storage for leads and workflows
-leads_data = []
+# Lead storage engine (see storage.py) and in-memory workflows
+lead_store = create_lead_store()
 workflows_data = {"workflows": [], "last_updated": datetime.now().isoformat()}
-next_id = 1
 
-# Load initial data from JSON files
+# Serialized /leads and /workflows responses, invalidated on every mutation
+response_cache = VersionedResponseCache(max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")))
+
+# Bulk import limits
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "100000"))
+BULK_VALIDATION_BATCH_SIZE = 1000
+BULK_IMPORT_MAX_ERRORS = 1000
+# Imported leads whose lead-created workflows run at once
+WORKFLOW_BULK_CONCURRENCY = int(os.getenv("WORKFLOW_BULK_CONCURRENCY", "8"))
+
+# Seconds clients are asked to wait when the OCR queue is full
+OCR_RETRY_AFTER = os.getenv("OCR_RETRY_AFTER_SECONDS", "5")
+
+# Batch document upload limits
+DOCUMENT_BATCH_MAX_FILES = int(os.getenv("DOCUMENT_BATCH_MAX_FILES", "500"))
+DOCUMENT_BATCH_MAX_MB = int(os.getenv("DOCUMENT_BATCH_MAX_MB", "200"))
+
+# Background document ingestion (POST /leads/document?background=true)
+document_jobs = DocumentJobQueue()
+
+# Background tasks (e.g. bulk workflow triggers) kept referenced until done
+background_tasks = set()
+
+# Load initial data from the storage engine
 async def load_data_from_files():
-    global leads_data, workflows_data, next_id
+    global workflows_data
     
-    # Load leads
-    try:
-        async with aiofiles.open("leads.json", "r") as file:
-            content = await file.read()
-            leads_data = json.loads(content)
-            if leads_data:
-                next_id = max(lead["id"] for lead in leads_data) + 1
-    except FileNotFoundError:
-        logger.info("leads.json not found, starting with empty leads")
-        leads_data = []
-        next_id = 1
-    
-    # Load workflows
-    try:
-        async with aiofiles.open("workflow.json", "r") as file:
-            content = await file.read()
-            workflows_data = json.loads(content)
-    except FileNotFoundError:
-        logger.info("workflow.json not found, starting with empty workflows")
-        workflows_data = {"workflows": [], "last_updated": datetime.now().isoformat()}
-
-# Save data to JSON files
-async def save_leads_to_file():
-    async with aiofiles.open("leads.json", "w") as file:
-        await file.write(json.dumps(leads_data, indent=2, default=str))
+    await lead_store.load()
+    workflows_data = await lead_store.load_workflows()
+    logger.info(f"Loaded {await lead_store.count_leads()} leads using the {lead_store.name} storage backend")
 
 async def save_workflows_to_file():
     workflows_data["last_updated"] = datetime.now().isoformat()
-    async with aiofiles.open("workflow.json", "w") as file:
-        await file.write(json.dumps(workflows_data, indent=2, default=str))
+    response_cache.bump()
+    await lead_store.save_workflows(workflows_data)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await load_data_from_files()
+    ocr_pool.start()
+    if OCR_ENGINE == "olm":
+        olm_ocr_batcher.start()
+    document_jobs.start()
+    await llm_client.start()
     logger.info("Mini CRM API started successfully")
     yield
     # Shutdown
+    await document_jobs.stop()
+    await olm_ocr_batcher.stop()
+    await llm_client.close()
+    await asyncio.to_thread(ocr_pool.shutdown)
+    await lead_store.close()
     logger.info("Mini CRM API shutting down...")
 
 app = FastAPI(
@@ -98,6 +129,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
 )
 
 # Test endpoint for CORS debugging
@@ -111,26 +143,20 @@ async def test_cors():
 @app.post("/leads/manual", response_model=LeadResponse)
 async def create_lead_manual(lead: LeadCreate):
     """Create a new lead manually with enhanced validation"""
-    global next_id
-    
     # Additional validation
     if not validate_email(lead.email):
         raise HTTPException(status_code=400, detail="Invalid email format")
     
-    new_lead = {
-        "id": next_id,
+    new_lead = await lead_store.create_lead({
         "name": lead.name,
         "email": lead.email,
         "phone": lead.phone,
         "status": LeadStatus.NEW,
         "source": LeadSource.MANUAL,
         "created_at": datetime.now().isoformat()
-    }
-    
-    leads_data.append(new_lead)
-    next_id += 1
+    })
+    response_cache.bump()
     
-    await save_leads_to_file()
     logger.info(f"Created new lead with agentic validation: {new_lead['name']}")
     
     # Trigger workflows for new lead
@@ -141,75 +167,404 @@ async def create_lead_manual(lead: LeadCreate):
     
     return LeadResponse(**new_lead)
 
-@app.post("/leads/document", response_model=DocumentExtractionResponse)
-async def create_lead_from_document(file: UploadFile = File(...)):
+ALLOWED_DOCUMENT_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg')
+
+async def extract_document(path: str, digest: str, filename: str, first_page: int = 1,
+                           last_page: Optional[int] = None, max_pages: Optional[int] = None,
+                           wait: bool = False) -> dict:
+    """
+    OCR a spooled upload (path plus SHA-256 digest) through the OCR cache and
+    worker pool; raises OCRPoolFull (unless `wait`) or OCRPoolUnavailable
+    """
+    vision = olm_ocr_batcher if OCR_ENGINE == "olm" else None
+    ocr_settings = {"engine": "tesseract", "type": os.path.splitext(filename.lower())[1],
+                    "preprocess": PREPROCESS_SETTINGS}
+    if vision is not None:
+        ocr_settings.update(engine="olm", model=vision.model_name)
+    if ocr_settings["type"] == ".pdf":
+        ocr_settings.update(first_page=first_page, last_page=last_page, max_pages=max_pages)
+    cache_key = ocr_cache.make_key(digest, ocr_settings)
+    return await ocr_cache.get_or_compute(
+        cache_key, lambda: ocr_document(ocr_pool, path, filename, first_page, last_page, max_pages,
+                                        vision=vision, wait=wait)
+    )
+
+async def create_lead_from_extraction(extracted_data: dict) -> dict:
+    """Store a lead built from OCR output and trigger Lead Created workflows"""
+    new_lead = await lead_store.create_lead({
+        "name": extracted_data["name"],
+        "email": extracted_data["email"],
+        "phone": extracted_data["phone"],
+        "status": extracted_data.get("status", "New"),
+        "source": extracted_data["source"],
+        "created_at": datetime.now().isoformat()
+    })
+    response_cache.bump()
+    
+    # Trigger workflows for new lead
+    try:
+        await trigger_lead_created_workflow(new_lead)
+    except Exception as e:
+        logger.error(f"Failed to trigger workflows for new lead: {e}")
+    return new_lead
+
+async def ingest_document_job(path: str, digest: str, filename: str, first_page: int,
+                              last_page: Optional[int], max_pages: Optional[int]) -> dict:
+    """
+    Background job body: OCR, create the lead, return the job result. The
+    job was already accepted, so it queues for OCR pool slots rather than
+    failing while the pool is busy.
+    """
+    extracted_data = await extract_document(path, digest, filename, first_page, last_page, max_pages, wait=True)
+    if "error" in extracted_data:
+        raise ValueError(f"Tesseract OCR failed: {extracted_data['error']}")
+    extraction = DocumentExtractionResponse(**extracted_data)
+    new_lead = await create_lead_from_extraction(extracted_data)
+    return {"extraction": extraction.model_dump(), "lead": new_lead}
+
+@app.post("/leads/document", response_model=DocumentExtractionResponse,
+          responses={202: {"model": DocumentJobAccepted, "description": "Queued as a background job"}})
+async def create_lead_from_document(
+    file: UploadFile = File(...),
+    first_page: int = Query(1, ge=1, description="First PDF page to OCR"),
+    last_page: Optional[int] = Query(None, ge=1, description="Last PDF page to OCR"),
+    max_pages: Optional[int] = Query(None, ge=1, description="Maximum number of PDF pages to OCR"),
+    background: bool = Query(False, description="Queue the document and return 202 with a job id")
+):
     """Extract lead information from uploaded document using Tesseract OCR"""
     # Validate file type
-    allowed_extensions = ('.pdf', '.png', '.jpg', '.jpeg')
-    if not file.filename.lower().endswith(allowed_extensions):
+    if not file.filename.lower().endswith(ALLOWED_DOCUMENT_EXTENSIONS):
         raise HTTPException(
             status_code=400, 
-            detail=f"Only {', '.join(allowed_extensions)} files are supported"
+            detail=f"Only {', '.join(ALLOWED_DOCUMENT_EXTENSIONS)} files are supported"
+        )
+    
+    # Stream the upload to a uniquely named file; OCR workers read it from disk
+    try:
+        temp_file_path, digest = await save_uploaded_file(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    if background:
+        try:
+            job = document_jobs.submit(
+                lambda: ingest_document_job(temp_file_path, digest, file.filename, first_page, last_page, max_pages),
+                on_finish=lambda: cleanup_temp_file(temp_file_path),
+                filename=file.filename
+            )
+        except DocumentJobQueueFull as e:
+            await cleanup_temp_file(temp_file_path)
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": OCR_RETRY_AFTER})
+        status_url = f"/leads/document/jobs/{job['job_id']}"
+        return JSONResponse(
+            status_code=202,
+            content=DocumentJobAccepted(job_id=job["job_id"], status=job["status"], status_url=status_url).model_dump(),
+            headers={"Location": status_url}
         )
-    temp_file_path = None
+    
     try:
-        # Read file content
-        content = await file.read()
-        # Save file temporarily
-        temp_file_path = await save_uploaded_file(content, file.filename)
-        # Use Tesseract OCR for extraction
-        extracted_data = tesseract_ocr(content, file.filename)
+        # Use Tesseract OCR for extraction, off the event loop; identical
+        # documents are answered from the OCR cache
+        try:
+            extracted_data = await extract_document(temp_file_path, digest, file.filename,
+                                                    first_page, last_page, max_pages)
+        except OCRPoolFull as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": OCR_RETRY_AFTER})
+        except OCRPoolUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": OCR_RETRY_AFTER})
         if "error" in extracted_data:
             raise HTTPException(status_code=500, detail=f"Tesseract OCR failed: {extracted_data['error']}")
         
         # Create lead from extracted data
-        global next_id
-        new_lead = {
-            "id": next_id,
-            "name": extracted_data["name"],
-            "email": extracted_data["email"],
-            "phone": extracted_data["phone"],
-            "status": extracted_data.get("status", "New"),
-            "source": extracted_data["source"],
-            "created_at": datetime.now().isoformat()
+        await create_lead_from_extraction(extracted_data)
+        
+        return DocumentExtractionResponse(**extracted_data)
+    finally:
+        await cleanup_temp_file(temp_file_path)
+
+@app.post("/leads/document/batch", response_model=DocumentBatchResponse)
+async def create_leads_from_documents(files: List[UploadFile] = File(...)):
+    """Extract leads from many documents (or one ZIP archive) and create them in one batched commit"""
+    documents, items = [], []
+    total_bytes = 0
+    max_bytes = DOCUMENT_BATCH_MAX_MB * 1024 * 1024
+    try:
+        for file in files:
+            is_zip = file.filename.lower().endswith(".zip")
+            if not is_zip and not file.filename.lower().endswith(ALLOWED_DOCUMENT_EXTENSIONS):
+                items.append({"filename": file.filename, "status": "skipped", "error": "Unsupported file type"})
+                continue
+            if not is_zip and len(documents) >= DOCUMENT_BATCH_MAX_FILES:
+                items.append({"filename": file.filename, "status": "skipped",
+                              "error": f"Batch is limited to {DOCUMENT_BATCH_MAX_FILES} files"})
+                continue
+            try:
+                path, digest = await save_uploaded_file(file, max_bytes=max_bytes - total_bytes)
+            except UploadTooLarge:
+                raise HTTPException(status_code=413, detail=f"Batch uploads are limited to {DOCUMENT_BATCH_MAX_MB} MB")
+            if not is_zip:
+                total_bytes += os.path.getsize(path)
+                documents.append((file.filename, path, digest))
+                continue
+            try:
+                archived, skipped = await asyncio.to_thread(
+                    expand_zip, path, ALLOWED_DOCUMENT_EXTENSIONS,
+                    DOCUMENT_BATCH_MAX_FILES - len(documents), max_bytes - total_bytes
+                )
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{file.filename} is not a valid ZIP archive")
+            except ValueError as e:
+                raise HTTPException(status_code=413, detail=f"{file.filename}: {e}")
+            finally:
+                await cleanup_temp_file(path)
+            documents += archived
+            total_bytes += sum(os.path.getsize(member_path) for _, member_path, _ in archived)
+            items += [{"filename": name, "status": "skipped", "error": reason} for name, reason in skipped]
+    except BaseException:
+        for _, path, _ in documents:
+            await cleanup_temp_file(path)
+        raise
+    
+    # Fan out across the OCR workers, one document per worker at a time; the
+    # OLM model takes a full micro-batch at once. Pages queue for the pool's
+    # shared slots, so the batch waits out backpressure and leaves the rest
+    # of the pool's queue to single uploads
+    slots = asyncio.Semaphore(max(ocr_pool.workers, olm_ocr_batcher.max_batch) if OCR_ENGINE == "olm"
+                              else ocr_pool.workers)
+    
+    async def extract(filename: str, path: str, digest: str) -> dict:
+        try:
+            async with slots:
+                extracted_data = await extract_document(path, digest, filename, wait=True)
+            if "error" in extracted_data:
+                raise ValueError(f"Tesseract OCR failed: {extracted_data['error']}")
+            extraction = DocumentExtractionResponse(**extracted_data)
+        except (OCRPoolUnavailable, ValueError) as e:
+            return {"filename": filename, "status": "failed", "error": str(e)}
+        finally:
+            await cleanup_temp_file(path)
+        return {"filename": filename, "status": "created", "extraction": extraction}
+    
+    results = await asyncio.gather(*(extract(filename, path, digest) for filename, path, digest in documents))
+    
+    # One batched commit for every lead in the upload
+    extracted = [result for result in results if result["status"] == "created"]
+    created_at = datetime.now().isoformat()
+    new_leads = await lead_store.create_leads([
+        {
+            "name": result["extraction"].name,
+            "email": result["extraction"].email,
+            "phone": result["extraction"].phone,
+            "status": result["extraction"].status,
+            "source": result["extraction"].source,
+            "created_at": created_at
         }
+        for result in extracted
+    ])
+    for result, lead in zip(extracted, new_leads):
+        result["lead_id"] = lead["id"]
+    if new_leads:
+        response_cache.bump()
+        await lead_store.flush()
         
-        leads_data.append(new_lead)
-        next_id += 1
-        await save_leads_to_file()
+        task = asyncio.create_task(trigger_lead_created_workflows_bulk(new_leads))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    
+    items = list(results) + items
+    failed = sum(1 for item in items if item["status"] == "failed")
+    skipped = sum(1 for item in items if item["status"] == "skipped")
+    logger.info(f"Document batch: {len(new_leads)} created, {failed} failed, {skipped} skipped")
+    return DocumentBatchResponse(
+        message=f"Created {len(new_leads)} leads from {len(documents)} documents",
+        total_files=len(items),
+        created=len(new_leads),
+        failed=failed,
+        skipped=skipped,
+        items=items
+    )
+
+@app.get("/leads/document/jobs/{job_id}", response_model=DocumentJobStatus)
+async def get_document_job(job_id: str):
+    """Status, timings and results of a background document job"""
+    job = document_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = DocumentJobQueue.public(job)
+    result = status.pop("result") or {}
+    return DocumentJobStatus(**status, **result)
+
+@app.post("/leads/bulk", response_model=BulkImportResponse)
+async def bulk_import_leads(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson; defaults from the Content-Type header")
+):
+    """Import many leads from a streamed CSV or NDJSON body, validated in batches and committed once"""
+    bulk_format = format or detect_bulk_format(request.headers.get("content-type"))
+    if bulk_format not in BULK_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format, expected one of: {', '.join(BULK_FORMATS)}")
+    
+    valid_rows, errors, batch = [], [], []
+    failed = total_rows = 0
+    
+    def validate_batch():
+        nonlocal failed
+        valid, batch_errors = validate_bulk_rows(batch)
+        valid_rows.extend(valid)
+        failed += len(batch_errors)
+        errors.extend(batch_errors[:BULK_IMPORT_MAX_ERRORS - len(errors)])
+        batch.clear()
+    
+    try:
+        async for row in iter_bulk_rows(request.stream(), bulk_format):
+            total_rows += 1
+            if total_rows > BULK_IMPORT_MAX_ROWS:
+                raise HTTPException(status_code=413, detail=f"Imports are limited to {BULK_IMPORT_MAX_ROWS} rows")
+            batch.append(row)
+            if len(batch) >= BULK_VALIDATION_BATCH_SIZE:
+                validate_batch()
+    except BulkImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    validate_batch()
+    
+    created_at = datetime.now().isoformat()
+    new_leads = await lead_store.create_leads([
+        {**row, "status": LeadStatus.NEW, "source": LeadSource.IMPORT, "created_at": created_at}
+        for row in valid_rows
+    ])
+    if new_leads:
+        response_cache.bump()
+        await lead_store.flush()
         
-        # Trigger workflows for new lead
+        # Run workflow triggers in the background so the import returns right away
+        task = asyncio.create_task(trigger_lead_created_workflows_bulk(new_leads))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    
+    logger.info(f"Bulk import: {len(new_leads)} created, {failed} failed out of {total_rows} rows")
+    return BulkImportResponse(
+        message=f"Imported {len(new_leads)} of {total_rows} leads",
+        total_rows=total_rows,
+        created=len(new_leads),
+        failed=failed,
+        first_id=new_leads[0]["id"] if new_leads else None,
+        last_id=new_leads[-1]["id"] if new_leads else None,
+        errors=errors,
+        errors_truncated=failed > len(errors)
+    )
+
+@app.get("/leads", response_model=List[LeadResponse])
+async def get_leads(
+    request: Request,
+    status: Optional[LeadStatus] = None,
+    source: Optional[LeadSource] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    sort: str = Query("id", description="id, created_at, name or email; prefix with '-' for descending"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get one page of leads; the cursor for the next page is returned in the X-Next-Cursor header"""
+    async def build_page():
         try:
-            await trigger_lead_created_workflow(new_lead)
-        except Exception as e:
-            logger.error(f"Failed to trigger workflows for new lead: {e}")
+            leads, next_cursor = await lead_store.query_leads(
+                status=status, source=source, created_after=created_after, created_before=created_before,
+                q=q, sort=sort, limit=limit, cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        return DocumentExtractionResponse(**extracted_data)
-    finally:
-        if temp_file_path:
-            await cleanup_temp_file(temp_file_path)
+        headers = {}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+        # Leads are stored in response shape already, so skip per-record model construction
+        return leads, headers
+    
+    key = "leads?" + "&".join(sorted(f"{name}={value}" for name, value in request.query_params.multi_items()))
+    return response_cache.respond(request, await response_cache.get_or_build(key, build_page))
 
-@app.get("/leads", response_model=List[LeadResponse])
-async def get_leads():
-    """Get all leads"""
-    return [LeadResponse(**lead) for lead in leads_data]
+@app.get("/leads/stats", response_model=LeadStats)
+async def get_lead_stats(request: Request):
+    """Lead totals for the dashboard, so it does not have to download every lead to count them"""
+    async def build_stats():
+        return {"total": await lead_store.count_leads(), "by_status": await lead_store.count_by_status()}, {}
+    
+    return response_cache.respond(request, await response_cache.get_or_build("leads/stats", build_stats))
+
+@app.get("/leads/export")
+async def export_leads(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    gzip: bool = False,
+    status: Optional[LeadStatus] = None,
+    source: Optional[LeadSource] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    q: Optional[str] = Query(None, max_length=200)
+):
+    """Stream all matching leads as NDJSON or CSV without materializing the full list"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format, expected one of: {', '.join(EXPORT_FORMATS)}")
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    batches = lead_store.iter_leads(
+        status=status, source=source, created_after=created_after, created_before=created_before, q=q
+    )
+    headers = {"Content-Disposition": f'attachment; filename="leads.{extension}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(export_stream(batches, format, compress=gzip), media_type=media_type, headers=headers)
+
+@app.post("/leads/suggestions")
+async def suggest_follow_ups(batch: SuggestionBatchRequest):
+    """
+    Generate AI follow-up suggestions for every lead matching the filter.
+
+    Suggestions run a few at a time through the LLM scheduler's batch
+    queue and are stored on each lead (`suggestion`, `suggested_at`). One
+    NDJSON line is streamed per lead as it completes, then a summary line
+    with `"done": true`. Disconnecting stops the batch; suggestions stored
+    so far are kept, and `skip_suggested` resumes where it left off.
+    """
+    created_after = batch.created_after
+    if batch.created_within_days:
+        created_after = datetime.now() - timedelta(days=batch.created_within_days)
+    prompt = batch.prompt or SUGGESTION_PROMPT
+    
+    async def suggest(lead: dict) -> str:
+        suggestion = await generate_with_retry(build_interaction_prompt(lead, prompt))
+        if suggestion == NO_LLM_REPLY:
+            raise ValueError(NO_LLM_REPLY)
+        updated = await lead_store.update_lead(lead["id"], {
+            "suggestion": suggestion,
+            "suggested_at": datetime.now().isoformat()
+        })
+        if updated is None:
+            raise ValueError("Lead was deleted")
+        response_cache.bump()
+        # Asking the same question in the chat is then answered from the cache
+        llm_cache.put(llm_cache.make_key(llm_client.model, prompt, lead), lead["id"], suggestion)
+        return suggestion
+    
+    batches = lead_store.iter_leads(
+        status=batch.status, source=batch.source, created_after=created_after,
+        created_before=batch.created_before, q=batch.q
+    )
+    results = suggestion_results(batches, suggest, max_leads=min(batch.max_leads or SUGGESTION_BATCH_MAX_LEADS,
+                                                                 SUGGESTION_BATCH_MAX_LEADS),
+                                 skip_suggested=batch.skip_suggested)
+    return StreamingResponse(suggestion_stream(results), media_type="application/x-ndjson")
 
 @app.delete("/leads/{lead_id}")
 async def delete_lead(lead_id: int):
     """Delete a lead by ID"""
-    global leads_data
+    deleted_lead = await lead_store.delete_lead(lead_id)
     
-    lead_index = None
-    for i, lead in enumerate(leads_data):
-        if lead["id"] == lead_id:
-            lead_index = i
-            break
-    
-    if lead_index is None:
+    if deleted_lead is None:
         raise HTTPException(status_code=404, detail="Lead not found")
-    
-    deleted_lead = leads_data.pop(lead_index)
-    await save_leads_to_file()
+    response_cache.bump()
+    llm_cache.invalidate_lead(lead_id)
     
     logger.info(f"Deleted lead: {deleted_lead['name']}")
     return SuccessResponse(message=f"Lead {lead_id} deleted successfully")
@@ -217,42 +572,20 @@ async def delete_lead(lead_id: int):
 @app.put("/leads/{lead_id}/status")
 async def update_lead_status(lead_id: int, status_update: LeadStatusUpdate):
     """Update lead status"""
-    lead = None
-    for l in leads_data:
-        if l["id"] == lead_id:
-            lead = l
-            break
+    lead = await lead_store.update_lead(lead_id, {"status": status_update.status})
     
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
-    
-    lead["status"] = status_update.status
-    await save_leads_to_file()
+    response_cache.bump()
+    llm_cache.invalidate_lead(lead_id)
     
     logger.info(f"Updated lead {lead_id} status to: {status_update.status}")
     return LeadResponse(**lead)
 
 # Enhanced Lead Interaction with LLM
 
-@app.post("/interact", response_model=InteractionResponse)
-async def interact_with_lead(interaction: LeadInteraction):
-    """Enhanced interaction with a lead using LLM (Ollama) as a CRM assistant"""
-    # Find the lead
-    lead = None
-    for l in leads_data:
-        if l["id"] == interaction.id:
-            lead = l
-            break
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
-    
-    try:
-        # Compose the prompt for the LLM as a CRM assistant
-        user_prompt = interaction.prompt
-        lead_context = f"Lead info: Name: {lead['name']}, Email: {lead['email']}, Phone: {lead['phone']}, Status: {lead['status']}, Source: {lead['source']}"
-        
-        # Create a system prompt that makes the LLM act as a CRM assistant
-        system_prompt = """You are a helpful CRM assistant that helps sales teams manage their leads effectively. 
+# System prompt that makes the LLM act as a CRM assistant
+CRM_ASSISTANT_PROMPT = """You are a helpful CRM assistant that helps sales teams manage their leads effectively. 
         You provide advice on lead management, follow-up strategies, and CRM best practices. 
         You are NOT the lead - you are an assistant helping the user manage this lead.
         
@@ -263,34 +596,46 @@ async def interact_with_lead(interaction: LeadInteraction):
         - Give tips on how to engage with this specific lead
         - Be helpful and professional
         """
+
+def build_interaction_prompt(lead: dict, user_prompt: str) -> str:
+    """Compose the prompt for the LLM as a CRM assistant"""
+    context = f"Lead info: Name: {lead['name']}, Email: {lead['email']}, Phone: {lead['phone']}, Status: {lead['status']}, Source: {lead['source']}"
+    return f"{CRM_ASSISTANT_PROMPT}\n\nLead Context: {context}\n\nUser Question: {user_prompt}\n\nAssistant Response:"
+
+def lead_context(lead: dict) -> dict:
+    return {"id": lead["id"], "name": lead["name"], "status": lead["status"], "source": lead["source"]}
+
+def client_group(request: Request) -> str:
+    """LLM queue group: each client waits in its own line"""
+    return request.client.host if request.client else "unknown"
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/interact", response_model=InteractionResponse)
+async def interact_with_lead(interaction: LeadInteraction, request: Request):
+    """Enhanced interaction with a lead using LLM (Ollama) as a CRM assistant"""
+    # Find the lead
+    lead = await lead_store.get_lead(interaction.id)
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    
+    # Repeat questions about an unchanged lead are answered from the cache
+    cache_key = llm_cache.make_key(llm_client.model, interaction.prompt, lead)
+    cached_reply = llm_cache.get(cache_key)
+    if cached_reply is not None:
+        return {"reply": cached_reply, "lead_context": lead_context(lead), "cached": True}
+    
+    try:
+        # Queued fairly per client; identical in-flight prompts share one generation
+        llm_reply = await llm_scheduler.generate(build_interaction_prompt(lead, interaction.prompt),
+                                                 group=client_group(request))
+        if llm_reply != NO_LLM_REPLY:
+            llm_cache.put(cache_key, lead["id"], llm_reply)
+        return {"reply": llm_reply, "lead_context": lead_context(lead)}
         
-        full_prompt = f"{system_prompt}\n\nLead Context: {lead_context}\n\nUser Question: {user_prompt}\n\nAssistant Response:"
-        
-        # Call Ollama LLM
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "llama2",  # Change to your preferred Ollama model
-                    "prompt": full_prompt,
-                    "stream": False
-                },
-                timeout=60
-            )
-            response.raise_for_status()
-            data = response.json()
-            llm_reply = data.get("response") or data.get("message") or "[No response from LLM]"
-        
-        return {
-            "reply": llm_reply,
-            "lead_context": {
-        "id": lead["id"],
-        "name": lead["name"],
-        "status": lead["status"],
-        "source": lead["source"]
-    }
-        }
-        
+    except LLMOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except httpx.ConnectError:
         raise HTTPException(status_code=503, detail="Ollama server is not running. Please start Ollama first.")
     except httpx.TimeoutException:
@@ -299,6 +644,66 @@ async def interact_with_lead(interaction: LeadInteraction):
         logger.error(f"Error calling Ollama: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+@app.post("/interact/stream")
+async def interact_with_lead_stream(interaction: LeadInteraction, request: Request):
+    """
+    Streaming /interact: relays the LLM's tokens as Server-Sent Events.
+
+    Events: `context` (the lead context, sent at once), `token` ({"token"})
+    for each piece of the reply, then `done` ({"reply", "lead_context"}) or
+    `error` ({"detail", "status_code"}, plus "retry_after" when the LLM is
+    overloaded). If the client disconnects the
+    stream is cancelled and the connection to Ollama closed, which stops
+    the generation.
+    """
+    lead = await lead_store.get_lead(interaction.id)
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    prompt = build_interaction_prompt(lead, interaction.prompt)
+    context = lead_context(lead)
+    cache_key = llm_cache.make_key(llm_client.model, interaction.prompt, lead)
+    cached_reply = llm_cache.get(cache_key)
+    if cached_reply is None:
+        # Shed load before the stream starts, while a 503 can still be sent
+        try:
+            llm_scheduler.check_admission()
+        except LLMOverloaded as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    group = client_group(request)
+
+    async def events():
+        yield sse_event("context", context)
+        if cached_reply is not None:
+            yield sse_event("token", {"token": cached_reply})
+            yield sse_event("done", {"reply": cached_reply, "lead_context": context, "cached": True})
+            return
+        reply = []
+        try:
+            async for token in llm_scheduler.stream(prompt, group=group):
+                reply.append(token)
+                yield sse_event("token", {"token": token})
+        except LLMOverloaded as e:
+            yield sse_event("error", {"detail": str(e), "status_code": 503, "retry_after": e.retry_after})
+        except httpx.ConnectError:
+            yield sse_event("error", {"detail": "Ollama server is not running. Please start Ollama first.",
+                                      "status_code": 503})
+        except httpx.TimeoutException:
+            yield sse_event("error", {"detail": "Request to Ollama timed out. Please try again.", "status_code": 408})
+        except (httpx.HTTPError, LLMError) as e:
+            logger.error(f"Error streaming from Ollama: {e}")
+            yield sse_event("error", {"detail": f"Error processing request: {str(e)}", "status_code": 500})
+        except Exception as e:
+            # The response has started, so the stream must end with an event the client understands
+            logger.exception(f"Unexpected error streaming from Ollama: {e}")
+            yield sse_event("error", {"detail": f"Error processing request: {str(e)}", "status_code": 500})
+        else:
+            if reply:
+                llm_cache.put(cache_key, lead["id"], "".join(reply))
+            yield sse_event("done", {"reply": "".join(reply) or NO_LLM_REPLY, "lead_context": context})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Enhanced Workflow Designer with React Flow Support
 
 @app.post("/workflow", response_model=WorkflowResponse)
@@ -347,8 +752,8 @@ async def execute_workflow(workflow: WorkflowRequest):
                 "senderName": sender_name
             }
             
-            # Send the email
-            email_result = email_service.send_welcome_email(test_lead_data, email_config)
+            # Send the email (the SendGrid client blocks, so off the event loop)
+            email_result = await asyncio.to_thread(email_service.send_welcome_email, test_lead_data, email_config)
             
             if email_result["success"]:
                 action_desc = f"Send Email: {email_subject} from {sender_name} - SUCCESS"
@@ -439,8 +844,8 @@ async def trigger_lead_created_workflow(lead_data: dict):
                         "senderName": sender_name
                     }
                     
-                    # Send the email using real lead data
-                    email_result = email_service.send_welcome_email(lead_data, email_config)
+                    # Send the email using real lead data (the SendGrid client blocks, so off the event loop)
+                    email_result = await asyncio.to_thread(email_service.send_welcome_email, lead_data, email_config)
                     
                     if email_result["success"]:
                         action_desc = f"Send Welcome Email: {email_subject} to {lead_data.get('email')} - SUCCESS"
@@ -459,11 +864,12 @@ async def trigger_lead_created_workflow(lead_data: dict):
                     update_reason = node_data.get('updateReason', 'Workflow automation')
                     
                     # Find and update the lead
-                    for lead in leads_data:
-                        if lead["id"] == lead_data.get("id"):
-                            lead["status"] = new_status
-                            await save_leads_to_file()
-                            break
+                    if lead_data.get("id") is not None:
+                        updated_lead = await lead_store.update_lead(lead_data["id"], {"status": new_status})
+                        if updated_lead:
+                            lead_data["status"] = updated_lead["status"]
+                            response_cache.bump()
+                            llm_cache.invalidate_lead(lead_data["id"])
                     
                     action_desc = f"Updated lead status to: {new_status} - {update_reason}"
                     logger.info(action_desc)
@@ -481,6 +887,30 @@ async def trigger_lead_created_workflow(lead_data: dict):
         "lead_data": lead_data
     }
 
+async def trigger_lead_created_workflows_bulk(leads: List[dict]):
+    """
+    Run the lead-created workflows for a batch of new leads, at most
+    WORKFLOW_BULK_CONCURRENCY at a time. Emails go out from worker threads
+    and every lead yields to the event loop, so a large import does not
+    stall other requests.
+    """
+    slots = asyncio.Semaphore(WORKFLOW_BULK_CONCURRENCY)
+
+    async def trigger(lead: dict):
+        async with slots:
+            try:
+                await trigger_lead_created_workflow(dict(lead))
+            except Exception as e:
+                logger.error(f"Failed to trigger workflows for lead {lead['id']}: {e}")
+            # Store calls on the file backend never suspend; let other requests run
+            await asyncio.sleep(0)
+
+    # Gather in chunks so a 100k-row import does not create 100k tasks at once
+    chunk = WORKFLOW_BULK_CONCURRENCY * 16
+    for start in range(0, len(leads), chunk):
+        await asyncio.gather(*(trigger(lead) for lead in leads[start:start + chunk]))
+    logger.info(f"Triggered workflows for {len(leads)} imported leads")
+
 @app.post("/test-workflow")
 async def test_workflow_trigger():
     """Test endpoint to manually trigger workflows"""
@@ -501,9 +931,12 @@ async def test_workflow_trigger():
     }
 
 @app.get("/workflows")
-async def get_workflows():
+async def get_workflows(request: Request):
     """Get all saved workflows"""
-    return workflows_data
+    async def build_workflows():
+        return workflows_data, {}
+    
+    return response_cache.respond(request, await response_cache.get_or_build("workflows", build_workflows))
 
 @app.delete("/workflows/{workflow_id}")
 async def delete_workflow(workflow_id: str):
@@ -532,7 +965,18 @@ async def health_check():
     return {
         "status": "healthy", 
         "timestamp": datetime.now().isoformat(),
-        "leads_count": len(leads_data),
+        "leads_count": await lead_store.count_leads(),
+        "storage_backend": lead_store.name,
+        "storage": lead_store.stats(),
+        "response_cache": response_cache.stats(),
+        "ocr_pool": ocr_pool.stats(),
+        "ocr_cache": ocr_cache.stats(),
+        "document_jobs": document_jobs.stats(),
+        "ocr_backends": backend_stats(),
+        "olm_ocr": olm_ocr_batcher.stats(),
+        "llm": llm_client.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
         "workflows_count": len(workflows_data["workflows"]),
         "olm_ocr_available": OLM_OCR_AVAILABLE
     }
@@ -557,6 +1001,7 @@ async def root():
             "create_manual": "/leads/manual",
             "create_document": "/leads/document",
             "interact": "/interact",
+            "interact_stream": "/interact/stream",
             "workflow": "/workflow",
             "workflows": "/workflows"
         }
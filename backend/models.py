@@ -10,6 +10,7 @@ class LeadStatus(str, Enum):
 class LeadSource(str, Enum):
     MANUAL = "Manual"
     DOCUMENT = "Document"
+    IMPORT = "Import"
 
 class LeadCreate(BaseModel):
     name: str
@@ -44,6 +45,26 @@ class LeadResponse(BaseModel):
     status: LeadStatus
     source: LeadSource
     created_at: datetime
+    suggestion: Optional[str] = None
+    suggested_at: Optional[datetime] = None
+
+class LeadStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+class BulkImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class BulkImportResponse(BaseModel):
+    message: str
+    total_rows: int
+    created: int
+    failed: int
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+    errors: List[BulkImportRowError] = []
+    errors_truncated: bool = False
 
 class LeadStatusUpdate(BaseModel):
     status: LeadStatus
@@ -61,6 +82,30 @@ class LeadInteraction(BaseModel):
 class InteractionResponse(BaseModel):
     reply: str
     lead_context: Optional[Dict[str, Any]] = None
+    cached: bool = False
+
+class SuggestionBatchRequest(BaseModel):
+    status: Optional[LeadStatus] = None
+    source: Optional[LeadSource] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    created_within_days: Optional[int] = None
+    q: Optional[str] = None
+    prompt: Optional[str] = None
+    skip_suggested: bool = False
+    max_leads: Optional[int] = None
+    
+    @validator('created_within_days', 'max_leads')
+    def validate_positive(cls, v):
+        if v is not None and v < 1:
+            raise ValueError('Must be at least 1')
+        return v
+    
+    @validator('prompt')
+    def validate_prompt(cls, v):
+        if v is not None and not v.strip():
+            raise ValueError('Prompt cannot be empty')
+        return v.strip() if v else v
 
 class WorkflowNode(BaseModel):
     id: str
@@ -84,6 +129,12 @@ class WorkflowResponse(BaseModel):
     workflow_id: Optional[str] = None
     execution_log: Optional[List[str]] = None
 
+class ContactCandidate(BaseModel):
+    value: str
+    start: int
+    end: int
+    confidence: float
+
 class DocumentExtractionResponse(BaseModel):
     name: str
     email: str
@@ -92,6 +143,40 @@ class DocumentExtractionResponse(BaseModel):
     source: LeadSource = LeadSource.DOCUMENT
     confidence: Optional[float] = None
     extraction_notes: Optional[str] = None
+    candidates: Optional[Dict[str, List[ContactCandidate]]] = None
+
+class DocumentJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class DocumentJobStatus(BaseModel):
+    job_id: str
+    status: str
+    filename: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_seconds: Optional[float] = None
+    processing_seconds: Optional[float] = None
+    extraction: Optional[DocumentExtractionResponse] = None
+    lead: Optional[LeadResponse] = None
+    error: Optional[str] = None
+
+class DocumentBatchItem(BaseModel):
+    filename: str
+    status: str
+    lead_id: Optional[int] = None
+    extraction: Optional[DocumentExtractionResponse] = None
+    error: Optional[str] = None
+
+class DocumentBatchResponse(BaseModel):
+    message: str
+    total_files: int
+    created: int
+    failed: int
+    skipped: int
+    items: List[DocumentBatchItem] = []
 
 class WorkflowExecutionLog(BaseModel):
     timestamp: datetime
@@ -0,0 +1,91 @@
+import importlib
+import importlib.util
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy module that imports it on first attribute access,
+    so API workers that never OCR never pay for OpenCV, torch and friends.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            started = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            _import_seconds[self._name] = round(time.perf_counter() - started, 3)
+            logger.info(f"Imported {self._name} on first use in {_import_seconds[self._name]}s")
+        return getattr(self._module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+_import_seconds: Dict[str, float] = {}
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+class OCRBackend(NamedTuple):
+    name: str
+    # Heavy modules the backend imports when it first runs
+    modules: Tuple[str, ...]
+
+
+# Used for availability checks and preloading only; OCR_ENGINE picks the
+# engine in document_ocr, since the engines are driven differently (worker
+# pool vs. the OLM batcher)
+OCR_BACKENDS: Dict[str, OCRBackend] = {}
+
+
+def register_backend(name: str, modules: Tuple[str, ...]) -> OCRBackend:
+    backend = OCRBackend(name, modules)
+    OCR_BACKENDS[name] = backend
+    return backend
+
+
+@lru_cache(maxsize=None)
+def module_installed(name: str) -> bool:
+    """Whether `name` can be imported, checked without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def backend_available(name: str) -> bool:
+    backend = OCR_BACKENDS.get(name)
+    return backend is not None and all(module_installed(module) for module in backend.modules)
+
+
+def preload(name: str) -> float:
+    """Import a backend's modules now (e.g. in a fresh OCR worker); returns seconds taken"""
+    started = time.perf_counter()
+    for module in OCR_BACKENDS[name].modules:
+        if module_installed(module):
+            importlib.import_module(module)
+    return time.perf_counter() - started
+
+
+def backend_stats() -> Dict[str, Any]:
+    return {
+        "backends": {name: backend_available(name) for name in OCR_BACKENDS},
+        "imported_on_demand": dict(_import_seconds)
+    }
+
+
+# pdf2image renders PDF pages for Tesseract
+register_backend("tesseract", ("cv2", "numpy", "pytesseract", "pdf2image"))
+register_backend("olm", ("torch", "transformers", "pdf2image"))
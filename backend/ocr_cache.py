@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from persistence import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Bump when OCR output for the same bytes and settings changes, e.g. after
+# upgrading Tesseract or changing extraction rules, to orphan old entries
+OCR_CACHE_VERSION = 3
+
+
+class OCRCache:
+    """
+    Content-addressed cache of OCR results.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes plus the OCR
+    settings, so re-uploading the same document (under any filename)
+    skips rasterization and OCR entirely. Two tiers: an in-memory LRU of
+    `max_entries` results, and JSON files under `directory` capped at
+    `max_disk_bytes`, evicted least recently used first. Concurrent
+    uploads of the same document share a single OCR run.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_disk_bytes: Optional[int] = None):
+        self.directory = directory or os.getenv("OCR_CACHE_DIR", "ocr_cache")
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("OCR_CACHE_MAX_ENTRIES", "512"))
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else \
+            int(float(os.getenv("OCR_CACHE_MAX_DISK_MB", "256")) * 1024 * 1024)
+        self.memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # key -> file size, least recently used first; scanned on first use
+        self.disk: Optional["OrderedDict[str, int]"] = None
+        self.disk_bytes = 0
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def make_key(self, digest: str, settings: Dict[str, Any]) -> str:
+        """Cache key for a document (SHA-256 hex digest of its bytes) processed with these OCR settings"""
+        settings_json = json.dumps({"version": OCR_CACHE_VERSION, **settings}, sort_keys=True, default=str)
+        return hashlib.sha256(f"{digest}:{settings_json}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _scan_sync(self) -> "OrderedDict[str, int]":
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        entries.sort()
+        return OrderedDict((key, size) for _, key, size in entries)
+
+    async def _disk_index(self) -> "OrderedDict[str, int]":
+        if self.disk is None:
+            self.disk = await asyncio.to_thread(self._scan_sync)
+            self.disk_bytes = sum(self.disk.values())
+        return self.disk
+
+    def _read_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                result = json.loads(file.read())
+            # Record the access so LRU order survives restarts
+            os.utime(path)
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.memory.get(key)
+        if result is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return result
+
+        disk = await self._disk_index()
+        if key in disk:
+            result = await asyncio.to_thread(self._read_sync, key)
+            if result is not None:
+                disk.move_to_end(key)
+                self.disk_hits += 1
+                self._remember(key, result)
+                return result
+            # Unreadable or removed behind our back
+            self.disk_bytes -= disk.pop(key, 0)
+        return None
+
+    async def put(self, key: str, result: Dict[str, Any]):
+        self._remember(key, result)
+        if self.max_disk_bytes <= 0:
+            return
+        data = json.dumps(result, default=str).encode()
+        if len(data) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        try:
+            await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+            await atomic_write(path, data)
+        except OSError as e:
+            logger.warning(f"Could not write OCR cache entry {key}: {e}")
+            return
+
+        disk = await self._disk_index()
+        self.disk_bytes += len(data) - disk.pop(key, 0)
+        disk[key] = len(data)
+        evicted = []
+        while self.disk_bytes > self.max_disk_bytes and disk:
+            old_key, size = disk.popitem(last=False)
+            self.disk_bytes -= size
+            evicted.append(self._path(old_key))
+        if evicted:
+            await asyncio.to_thread(self._remove_sync, evicted)
+
+    @staticmethod
+    def _remove_sync(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Cached result for `key`, or the result of `await compute()`.
+        Results containing an "error", or produced by a fallback engine, are
+        returned but not cached. Results
+        are shared between callers and must not be mutated.
+        """
+        result = await self.get(key)
+        if result is not None:
+            return result
+
+        inflight = self.inflight.get(key)
+        if inflight is not None:
+            # Same document is being processed right now; wait for that run
+            self.shared += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so failures without waiters are not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self.inflight.pop(key, None)
+        future.set_result(result)
+        if "error" not in result and not result.get("fallback"):
+            await self.put(key, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "shared_inflight": self.shared,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None,
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+            "disk_bytes": self.disk_bytes
+        }
+
+
+# Create a singleton instance
+ocr_cache = OCRCache()
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OCRPoolFull(Exception):
+    """More OCR jobs are queued than the pool accepts; the client should retry later"""
+
+
+class OCRPoolUnavailable(Exception):
+    """The OCR pool is not running (not started, shutting down or crashed)"""
+
+
+def _init_worker():
+    # The API process imports OpenCV and pytesseract lazily; workers pay for
+    # them once at startup instead of on the first upload that lands on them
+    import ocr_backends
+    ocr_backends.preload("tesseract")
+    import utils  # noqa: F401  (tesseract_ocr and the PDF helpers)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class OCRPool:
+    """
+    Process pool for CPU-bound OCR work.
+
+    Tesseract and PDF rasterization block for seconds, so they run in
+    worker processes instead of on the event loop. Workers are spawned
+    and warmed up at startup. The number of jobs in flight (running plus
+    queued) is capped at `max_pending`; beyond that `run()` raises
+    OCRPoolFull right away instead of letting requests pile up. Internal
+    fan-out (batch uploads) calls `run(..., wait=True)` instead and queues
+    for one of `max_pending - workers` shared slots, so it waits out
+    backpressure while the remaining slots stay free for single uploads.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+        self.max_pending = max_pending or int(os.getenv("OCR_MAX_PENDING", "0")) or self.workers * 2
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.wait_slots = asyncio.Semaphore(max(self.max_pending - self.workers, 1))
+        self.pending = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        """Spawn the workers; warm-up continues in the background"""
+        if self.executor is not None:
+            return
+        # spawn behaves the same on every platform and does not fork the
+        # event loop's threads into the workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        for _ in range(self.workers):
+            self.executor.submit(_warm_up)
+        logger.info(f"OCR pool started with {self.workers} workers (max {self.max_pending} pending jobs)")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    @property
+    def available(self) -> bool:
+        return self.executor is not None
+
+    async def run(self, func: Callable[..., Any], *args: Any, wait: bool = False) -> Any:
+        """
+        Run `func(*args)` in a worker process; `func` and its arguments must
+        be picklable. With `wait`, queue for a shared slot instead of raising
+        OCRPoolFull.
+        """
+        if self.executor is None:
+            raise OCRPoolUnavailable("OCR pool is not running")
+        if wait:
+            self.waiting += 1
+            try:
+                await self.wait_slots.acquire()
+            finally:
+                self.waiting -= 1
+            try:
+                return await self._submit(func, *args)
+            finally:
+                self.wait_slots.release()
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise OCRPoolFull(f"OCR queue is full ({self.max_pending} jobs pending)")
+        return await self._submit(func, *args)
+
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        executor = self.executor
+        if executor is None:
+            raise OCRPoolUnavailable("OCR pool is not running")
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed by the OOM killer); replace the pool once
+            self.failed += 1
+            if self.executor is executor:
+                logger.error(f"OCR worker crashed, restarting pool: {e}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+                self.start()
+            raise OCRPoolUnavailable("OCR worker crashed") from e
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self.available,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+
+# Create a singleton instance
+ocr_pool = OCRPool()
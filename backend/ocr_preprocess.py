@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from ocr_backends import lazy_module
+
+# Imported on first use; the settings below are read by the API process
+cv2 = lazy_module("cv2")
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+# "deskew" is opt-in (add it to OCR_PREPROCESS_STAGES): scanned and
+# generated pages are already straight, and rotating them only blurs glyphs
+PREPROCESS_STAGES = ("decode", "resize", "grayscale", "binarize")
+
+# Pipeline configuration. Photos carry no meaningful DPI, so the target
+# resolution is expressed as DPI over the long edge of a letter/A4 page:
+# 200 DPI keeps the long edge at ~2200 px, plenty for Tesseract, while a
+# 12 MP phone photo is ~4000 px.
+PREPROCESS_SETTINGS: Dict[str, Any] = {
+    "stages": [stage.strip() for stage in
+               os.getenv("OCR_PREPROCESS_STAGES", ",".join(PREPROCESS_STAGES)).split(",") if stage.strip()],
+    "target_dpi": int(os.getenv("OCR_TARGET_DPI", "200")),
+    "page_inches": float(os.getenv("OCR_PAGE_INCHES", "11")),
+    "threshold_block": int(os.getenv("OCR_THRESHOLD_BLOCK", "31")),
+    "threshold_offset": int(os.getenv("OCR_THRESHOLD_OFFSET", "15")),
+    "max_skew_degrees": float(os.getenv("OCR_MAX_SKEW_DEGREES", "15")),
+    "min_skew_gain": float(os.getenv("OCR_MIN_SKEW_GAIN", "1.2"))
+}
+
+
+def _max_side(settings: Dict[str, Any]) -> int:
+    return int(settings["target_dpi"] * settings["page_inches"])
+
+
+def decode_image(data: Any, settings: Dict[str, Any]) -> Image.Image:
+    """
+    Open an image, letting the JPEG decoder downscale (by 1/2, 1/4 or 1/8)
+    and convert to grayscale while decoding when those stages are enabled.
+    `data` is bytes or anything Image.open accepts (a path or file object).
+    """
+    image = Image.open(BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data)
+    if "decode" in settings["stages"] and image.format == "JPEG":
+        max_side = _max_side(settings)
+        width, height = image.size
+        scale = min(max_side / max(width, height), 1.0)
+        mode = "L" if "grayscale" in settings["stages"] else image.mode
+        # draft() picks the smallest DCT scale that is still >= the request
+        image.draft(mode, (int(width * scale), int(height * scale)))
+    # Phone photos are stored sideways with an EXIF orientation tag
+    return ImageOps.exif_transpose(image)
+
+
+def estimate_skew(binary: np.ndarray, max_degrees: float = 15.0, min_gain: float = 1.2) -> float:
+    """
+    Rotation in degrees that straightens a binarized page, found by
+    projection profile: text lines are level when the row sums of dark
+    pixels change most sharply from row to row. Searches whole degrees up
+    to `max_degrees`, then tenths around the best. Returns 0 unless the
+    best angle beats the unrotated page by `min_gain`, so straight pages
+    and pages without text lines are left alone.
+    """
+    # Angle estimation does not need full resolution
+    scale = min(1.0, 600 / max(binary.shape))
+    small = cv2.resize(binary, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else binary
+    ink = (small < 128).astype(np.float32)
+    if ink.sum() < 50:
+        return 0.0
+    height, width = ink.shape
+
+    def sharpness(angle: float) -> float:
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        rows = cv2.warpAffine(ink, matrix, (width, height), flags=cv2.INTER_LINEAR).sum(axis=1)
+        return float(np.square(np.diff(rows)).sum())
+
+    level = sharpness(0.0)
+    coarse = np.arange(-max_degrees, max_degrees + 1e-9, 1.0)
+    best = float(coarse[int(np.argmax([sharpness(angle) for angle in coarse]))])
+    fine = np.arange(best - 1.0, best + 1.0 + 1e-9, 0.1)
+    scores = [sharpness(angle) for angle in fine]
+    best = float(fine[int(np.argmax(scores))])
+    if level and max(scores) < level * min_gain:
+        return 0.0
+    return round(best, 1) if abs(best) <= max_degrees else 0.0
+
+
+def preprocess_for_ocr(image: Image.Image, settings: Optional[Dict[str, Any]] = None,
+                       timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Run the enabled stages on a decoded image and return the array to hand
+    to Tesseract. Stage durations in milliseconds are added to `timings`.
+    """
+    settings = settings or PREPROCESS_SETTINGS
+    stages = settings["stages"]
+    timings = timings if timings is not None else {}
+
+    def timed(stage: str, started: float):
+        timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+
+    started = time.perf_counter()
+    if "grayscale" in stages or "binarize" in stages:
+        array = np.asarray(image.convert("L"))
+    else:
+        array = np.asarray(image.convert("RGB"))
+    timed("to_array", started)
+
+    if "resize" in stages:
+        started = time.perf_counter()
+        max_side = _max_side(settings)
+        height, width = array.shape[:2]
+        if max(height, width) > max_side:
+            scale = max_side / max(height, width)
+            array = cv2.resize(array, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        timed("resize", started)
+
+    if "binarize" in stages:
+        started = time.perf_counter()
+        block = settings["threshold_block"] | 1
+        array = cv2.adaptiveThreshold(array, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                      block, settings["threshold_offset"])
+        timed("binarize", started)
+
+    if "deskew" in stages and array.ndim == 2:
+        started = time.perf_counter()
+        binary = array if "binarize" in stages else cv2.threshold(
+            array, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+        angle = estimate_skew(binary, settings["max_skew_degrees"], settings["min_skew_gain"])
+        if 0.5 <= abs(angle) <= settings["max_skew_degrees"]:
+            height, width = array.shape
+            matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+            array = cv2.warpAffine(array, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                                   borderMode=cv2.BORDER_REPLICATE)
+        timings["skew_degrees"] = round(angle, 2)
+        timed("deskew", started)
+
+    return array
+
+
+def load_for_ocr(data: Any, settings: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, Dict[str, float]]:
+    """Decode and preprocess an image file; returns (array, per-stage timings in ms)"""
+    settings = settings or PREPROCESS_SETTINGS
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    image = decode_image(data, settings)
+    image.load()
+    timings["decode"] = round((time.perf_counter() - started) * 1000, 2)
+    array = preprocess_for_ocr(image, settings, timings)
+    return array, timings
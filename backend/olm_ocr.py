@@ -0,0 +1,322 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from PIL import Image, ImageOps
+
+from ocr_backends import backend_available, lazy_module
+from utils import build_simple_prompt, resize_image_to_1024
+
+logger = logging.getLogger(__name__)
+
+torch = lazy_module("torch")
+transformers = lazy_module("transformers")
+
+# OLM_OCR_MODEL=stand-in selects StandInVisionModel (CPU, no downloads)
+STAND_IN_MODEL = "stand-in"
+
+
+class OLMOCRUnavailable(Exception):
+    """The model is not loaded (disabled, still loading or failed to load)"""
+
+
+class OLMOCROverloaded(Exception):
+    """Too many queued images to finish before the deadline; use Tesseract instead"""
+
+
+class OLMOCRDeadlineExceeded(Exception):
+    """An image was not transcribed before its deadline"""
+
+
+class QwenVLModel:
+    """olmOCR (a Qwen2-VL fine-tune), loaded once and kept resident"""
+
+    def __init__(self, model_name: str, processor_name: Optional[str] = None):
+        self.name = model_name
+        self.processor_name = processor_name or os.getenv("OLM_OCR_PROCESSOR", "Qwen/Qwen2-VL-7B-Instruct")
+        self.model = None
+        self.processor = None
+        self.device = None
+
+    def load(self):
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.processor = transformers.AutoProcessor.from_pretrained(self.processor_name)
+        # Batched generation needs prompts padded on the left
+        self.processor.tokenizer.padding_side = "left"
+        dtype = torch.bfloat16 if self.device == "cuda" else torch.float32
+        self.model = transformers.Qwen2VLForConditionalGeneration.from_pretrained(
+            self.name, torch_dtype=dtype).to(self.device).eval()
+
+    def generate(self, images: List[Image.Image], prompt: str, max_new_tokens: int, max_time: float) -> List[str]:
+        messages = [{"role": "user", "content": [{"type": "image"}, {"type": "text", "text": prompt}]}]
+        text = self.processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+        inputs = self.processor(text=[text] * len(images), images=images, padding=True,
+                                return_tensors="pt").to(self.device)
+        with torch.inference_mode():
+            output = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                # Stops decoding (for the whole batch) once the deadline is reached
+                max_time=max_time,
+                pad_token_id=self.processor.tokenizer.eos_token_id
+            )
+        return self.processor.batch_decode(output[:, inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+
+
+class StandInVisionModel:
+    """
+    Tiny CPU stand-in with the same interface, for tests and load checks.
+    A batch costs `batch_seconds` plus `image_seconds` per image, mimicking
+    how a GPU amortizes a forward pass; the "transcription" is the image's
+    `text` metadata (e.g. a PNG tEXt chunk), or "" if it has none.
+    """
+
+    def __init__(self, batch_seconds: float = 0.2, image_seconds: float = 0.02):
+        self.name = STAND_IN_MODEL
+        self.batch_seconds = batch_seconds
+        self.image_seconds = image_seconds
+
+    def load(self):
+        pass
+
+    def generate(self, images: List[Image.Image], prompt: str, max_new_tokens: int, max_time: float) -> List[str]:
+        time.sleep(min(self.batch_seconds + self.image_seconds * len(images), max(max_time, 0.0)))
+        return [str(image.info.get("text", "")) for image in images]
+
+
+def create_model(name: Optional[str] = None):
+    name = name or os.getenv("OLM_OCR_MODEL", "allenai/olmOCR-7B-0225-preview")
+    return StandInVisionModel() if name == STAND_IN_MODEL else QwenVLModel(name)
+
+
+def load_images(source: Union[str, bytes], filename: str, pages: Optional[List[int]] = None,
+                dpi: int = 100) -> List[Image.Image]:
+    """Decode an image, or render the given 1-based PDF pages, sized for the model"""
+    if filename.lower().endswith(".pdf"):
+        from pdf2image import convert_from_bytes, convert_from_path
+        convert = convert_from_path if isinstance(source, str) else convert_from_bytes
+        images = []
+        for page in pages or [1]:
+            images.extend(convert(source, dpi=dpi, first_page=page, last_page=page))
+    else:
+        from io import BytesIO
+        image = Image.open(source if isinstance(source, str) else BytesIO(source))
+        images = [ImageOps.exif_transpose(image)]
+    return [resize_image_to_1024(image.convert("RGB")) for image in images]
+
+
+class _Request:
+    __slots__ = ("image", "deadline", "future")
+
+    def __init__(self, image: Image.Image, deadline: float, future: asyncio.Future):
+        self.image = image
+        self.deadline = deadline
+        self.future = future
+
+
+class OLMOCRBatcher:
+    """
+    Serves a resident vision-OCR model with dynamic batching.
+
+    The model is loaded once, in the background at startup, and all
+    inference runs on one dedicated thread. Concurrent `transcribe()` calls
+    are queued and collected into micro-batches: a batch is sent when it
+    reaches `max_batch` images or `max_wait` seconds after its first image
+    arrived, so one forward pass serves many uploads. Every image carries
+    a deadline; requests whose deadline has passed are dropped from their
+    batch, and callers stop waiting once it passes. When the backlog could
+    not be cleared before the deadline, `transcribe()` raises
+    OLMOCROverloaded right away so the caller can use Tesseract instead.
+    """
+
+    def __init__(self, model: Any = None, max_batch: Optional[int] = None, max_wait: Optional[float] = None,
+                 max_queue: Optional[int] = None, deadline: Optional[float] = None,
+                 max_new_tokens: Optional[int] = None):
+        self.model = model
+        self.max_batch = max_batch or int(os.getenv("OLM_OCR_MAX_BATCH", "8"))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("OLM_OCR_MAX_WAIT_MS", "50")) / 1000
+        self.max_queue = max_queue or int(os.getenv("OLM_OCR_MAX_QUEUE", "64"))
+        self.deadline = deadline or float(os.getenv("OLM_OCR_DEADLINE_SECONDS", "30"))
+        self.max_new_tokens = max_new_tokens or int(os.getenv("OLM_OCR_MAX_NEW_TOKENS", "64"))
+        self.prompt = build_simple_prompt()
+        self.queue: Deque[_Request] = deque()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.loader: Optional[asyncio.Task] = None
+        self.task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        # Moving average of batch latency, for the overload estimate
+        self.batch_seconds: Optional[float] = None
+        self.batches = 0
+        self.images = 0
+        self.expired = 0
+        self.overloaded = 0
+        self.failed = 0
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return getattr(self.model, "name", None)
+
+    def start(self):
+        """Start loading the model in the background; transcribe() is unavailable until it is ready"""
+        if self.loader is not None:
+            return
+        if self.model is None:
+            self.model = create_model()
+        if self.model_name != STAND_IN_MODEL and not backend_available("olm"):
+            self.load_error = "OLM OCR libraries are not installed"
+            logger.warning(f"OLM OCR disabled: {self.load_error}")
+            return
+        self.wakeup = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="olm-ocr")
+        self.loader = asyncio.create_task(self._load())
+
+    async def _load(self):
+        started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.model.load)
+        except Exception as e:
+            self.load_error = str(e)
+            logger.error(f"Could not load OLM OCR model {self.model_name}: {e}")
+            return
+        self.load_seconds = round(time.perf_counter() - started, 2)
+        self.ready = True
+        self.task = asyncio.create_task(self._batch_loop())
+        logger.info(f"OLM OCR model {self.model_name} loaded in {self.load_seconds}s "
+                    f"(batches of up to {self.max_batch}, {self.max_wait * 1000:g} ms max wait)")
+
+    async def stop(self):
+        self.ready = False
+        for task in (self.loader, self.task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(task for task in (self.loader, self.task) if task is not None),
+                             return_exceptions=True)
+        self.loader = self.task = None
+        while self.queue:
+            request = self.queue.popleft()
+            if not request.future.done():
+                request.future.set_exception(OLMOCRUnavailable("OLM OCR is shutting down"))
+        if self.executor is not None:
+            # A batch already on the GPU finishes in its thread
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _check_capacity(self, images: int, deadline: float):
+        if not self.ready:
+            raise OLMOCRUnavailable(self.load_error or "OLM OCR model is not loaded")
+        if len(self.queue) + images > self.max_queue:
+            self.overloaded += 1
+            raise OLMOCROverloaded(f"OLM OCR queue is full ({len(self.queue)} images queued)")
+        if self.batch_seconds is not None:
+            # Batches still ahead of these images, plus the one they land in
+            batches_ahead = (len(self.queue) + images + self.max_batch - 1) // self.max_batch + 1
+            if batches_ahead * self.batch_seconds > deadline - time.monotonic():
+                self.overloaded += 1
+                raise OLMOCROverloaded(f"OLM OCR backlog of {len(self.queue)} images would miss the deadline")
+
+    async def transcribe(self, images: List[Image.Image], deadline: Optional[float] = None) -> List[str]:
+        """
+        Text for each image, batched with concurrent callers. `deadline` is
+        a time.monotonic() value (default: now + the configured deadline).
+        """
+        deadline = deadline or time.monotonic() + self.deadline
+        self._check_capacity(len(images), deadline)
+        loop = asyncio.get_running_loop()
+        requests = [_Request(image, deadline, loop.create_future()) for image in images]
+        self.queue.extend(requests)
+        self.wakeup.set()
+        futures = [request.future for request in requests]
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise OLMOCRDeadlineExceeded(f"OLM OCR did not finish within {self.deadline:g}s")
+        finally:
+            # Requests still queued are skipped by the batch loop
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+
+    async def _next_batch(self) -> List[_Request]:
+        while not self.queue:
+            self.wakeup.clear()
+            await self.wakeup.wait()
+        # Give concurrent uploads a moment to join the batch
+        collect_until = time.monotonic() + self.max_wait
+        while len(self.queue) < self.max_batch:
+            remaining = collect_until - time.monotonic()
+            if remaining <= 0:
+                break
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        batch = []
+        now = time.monotonic()
+        while self.queue and len(batch) < self.max_batch:
+            request = self.queue.popleft()
+            if request.future.done():
+                continue
+            if request.deadline <= now:
+                self.expired += 1
+                request.future.set_exception(OLMOCRDeadlineExceeded("Deadline passed while queued"))
+                continue
+            batch.append(request)
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            max_time = min(request.deadline for request in batch) - time.monotonic()
+            started = time.perf_counter()
+            try:
+                texts = await loop.run_in_executor(
+                    self.executor, self.model.generate, [request.image for request in batch],
+                    self.prompt, self.max_new_tokens, max_time
+                )
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"OLM OCR batch of {len(batch)} failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+            self.batch_seconds = elapsed if self.batch_seconds is None else 0.8 * self.batch_seconds + 0.2 * elapsed
+            self.batches += 1
+            self.images += len(batch)
+            for request, text in zip(batch, texts):
+                if not request.future.done():
+                    request.future.set_result(text)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "ready": self.ready,
+            "load_error": self.load_error,
+            "load_seconds": self.load_seconds,
+            "queued": len(self.queue),
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": round(self.images / self.batches, 2) if self.batches else None,
+            "batch_seconds": round(self.batch_seconds, 3) if self.batch_seconds is not None else None,
+            "expired": self.expired,
+            "overloaded": self.overloaded,
+            "failed": self.failed
+        }
+
+
+# Create a singleton instance
+olm_ocr_batcher = OLMOCRBatcher()
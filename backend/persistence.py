@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# os.umask can only be read by setting it, which is not thread-safe, so read
+# it once at import instead of in the writer threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _atomic_write_sync(path: str, chunks: Sequence[Any]):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; keep the mode of the file being
+        # replaced, or what open() would have given a new file
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Persist the rename itself (not supported on Windows)
+    if os.name != "nt":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+async def atomic_write(path: str, data: Union[bytes, Sequence[Any]]):
+    """
+    Crash-safe file replace: write a temp file, fsync it, then rename over `path`.
+    `data` is either bytes or a sequence of bytes-like chunks written in order.
+    """
+    chunks = [data] if isinstance(data, (bytes, bytearray, memoryview)) else data
+    await asyncio.to_thread(_atomic_write_sync, path, chunks)
+
+
+class PersistenceScheduler:
+    """
+    Coalesces writes of dirty state into one write per window.
+
+    Each piece of persisted state registers a writer coroutine under a
+    name. `mark_dirty(name)` is cheap and can be called on every mutation;
+    the writer runs at most once per `window` seconds no matter how many
+    mutations happened. `flush()` writes everything dirty right away.
+    """
+
+    def __init__(self, window: float = 0.1):
+        self.window = window
+        self.writers: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self.dirty: Dict[str, None] = {}
+        self.lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.writes = 0
+
+    def register(self, name: str, writer: Callable[[], Awaitable[None]]):
+        self.writers[name] = writer
+
+    def mark_dirty(self, name: str):
+        """Schedule `name` to be written at the end of the current window"""
+        self.dirty[name] = None
+        self.requests += 1
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        try:
+            await self.flush()
+        except Exception as e:
+            # State stays dirty and is retried on the next mutation or flush
+            logger.error(f"Scheduled persistence flush failed: {e}")
+
+    async def flush(self):
+        """Write all dirty state now; returns once it is durable on disk"""
+        async with self.lock:
+            while self.dirty:
+                name = next(iter(self.dirty))
+                del self.dirty[name]
+                try:
+                    await self.writers[name]()
+                except BaseException:
+                    self.dirty[name] = None
+                    raise
+                self.writes += 1
+
+    async def close(self):
+        """Cancel the pending window and flush what is left"""
+        if self.task is not None and not self.task.done():
+            if self.lock.locked():
+                # A write is in progress; let it finish rather than interrupt it
+                await self.task
+            else:
+                self.task.cancel()
+                try:
+                    await self.task
+                except asyncio.CancelledError:
+                    pass
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self.window,
+            "dirty": list(self.dirty),
+            "write_requests": self.requests,
+            "writes": self.writes
+        }
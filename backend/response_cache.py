@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+class CachedResponse:
+    """A pre-serialized JSON body with its ETag and extra headers"""
+
+    __slots__ = ("body", "etag", "headers")
+
+    def __init__(self, body: bytes, etag: str, headers: Dict[str, str]):
+        self.body = body
+        self.etag = etag
+        self.headers = headers
+
+
+class VersionedResponseCache:
+    """
+    Cache of serialized listing responses tied to a global data version.
+
+    Every mutation calls `bump()`, which increments the version and drops
+    all cached bodies. ETags combine a per-process epoch, the version and
+    the request key, so an ETag handed out before a restart never matches.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def bump(self):
+        """Record a data change, invalidating every cached response"""
+        self.version += 1
+        self.entries.clear()
+
+    def make_etag(self, key: str, version: int) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+        return f'"{self.epoch}-{version}-{digest}"'
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]) -> CachedResponse:
+        """Return the cached response for `key`, serializing the result of `await build()` on a miss"""
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        version = self.version
+        content, headers = await build()
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        cached = CachedResponse(body, self.make_etag(key, version), headers)
+        if version != self.version:
+            # Data changed while building; serve it but do not cache it
+            return cached
+        self.entries[key] = cached
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return cached
+
+    def respond(self, request: Request, cached: CachedResponse) -> Response:
+        """Serve a cached response, or 304 when the client already holds this version"""
+        headers = {**cached.headers, "ETag": cached.etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or cached.etag in
+                              [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
@@ -0,0 +1,122 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from array import array
+from typing import Any, List, Tuple
+
+from lead_table import DELETED, NO_TIMESTAMP, CodeTable, LeadTable
+
+logger = logging.getLogger(__name__)
+
+# Binary lead snapshot, a straight dump of the LeadTable columns:
+#
+#   header   magic, format version, metadata length, next_id, row count, arena length
+#   metadata JSON: status/source code tables and per-lead extras
+#   columns  ids (q), created (q), text_start (Q), text_len (I), suggest_start (Q),
+#            suggest_len (I), suggested (q), status (B), source (B)
+#   arena    packed name/email/phone and suggestion text
+#
+# Sections are 8-byte aligned. Loading copies the fixed-width columns
+# (about 50 bytes per lead, a plain memcpy) and memory-maps the text arena,
+# so startup cost does not depend on how much text the leads hold.
+# Version 1 had no suggestion columns and kept suggestions in the extras.
+SNAPSHOT_MAGIC = b"CRMLEAD1"
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct("<8sIIqqq")
+COLUMNS = {
+    1: (("ids", "q"), ("created", "q"), ("text_start", "Q"), ("text_len", "I"), ("status", "B"), ("source", "B")),
+    2: (("ids", "q"), ("created", "q"), ("text_start", "Q"), ("text_len", "I"), ("suggest_start", "Q"),
+        ("suggest_len", "I"), ("suggested", "q"), ("status", "B"), ("source", "B"))
+}
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+def snapshot_chunks(table: LeadTable, next_id: int) -> List[Any]:
+    """
+    Serialize `table` into a list of bytes-like chunks.
+
+    Everything mutable is copied, so the chunks can be written from
+    another thread while the table keeps changing. The mapped arena of the
+    previous snapshot is read-only and is passed through without a copy.
+    """
+    meta = json.dumps({
+        "statuses": table.statuses.values,
+        "sources": table.sources.values,
+        "garbage_bytes": table.garbage_bytes,
+        "extras": table.extras
+    }, default=str).encode()
+    rows = len(table.ids)
+    base = memoryview(table.arena_base)[:table.base_len]
+    tail = bytes(table.arena)
+    columns = [bytes(getattr(table, name)) if typecode == "B" else getattr(table, name).tobytes()
+               for name, typecode in COLUMNS[SNAPSHOT_VERSION]]
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta), next_id, rows, table.base_len + len(tail))
+
+    chunks: List[Any] = [header, meta, _padding(len(meta))]
+    for column in columns:
+        chunks += [column, _padding(len(column))]
+    chunks += [base, tail]
+    return chunks
+
+
+def load_snapshot(path: str) -> Tuple[LeadTable, int]:
+    """Load a snapshot written from `snapshot_chunks`; returns (table, next_id)"""
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    magic, version, meta_len, next_id, rows, arena_len = HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC or version not in COLUMNS:
+        raise ValueError(f"{path} is not a lead snapshot (version {SNAPSHOT_VERSION})")
+
+    offset = HEADER.size
+    meta = json.loads(bytes(view[offset:offset + meta_len]))
+    offset += meta_len + len(_padding(meta_len))
+
+    table = LeadTable()
+    table.statuses = CodeTable(meta["statuses"])
+    table.sources = CodeTable(meta["sources"])
+    for name, typecode in COLUMNS[version]:
+        length = rows * array(typecode).itemsize
+        if offset + length > size:
+            raise ValueError(f"{path} is truncated")
+        if typecode == "B":
+            column = bytearray(view[offset:offset + length])
+        else:
+            column = array(typecode)
+            column.frombytes(view[offset:offset + length])
+        setattr(table, name, column)
+        offset += length + len(_padding(length))
+    if version == 1:
+        table.suggest_start = array("Q", bytes(8 * rows))
+        table.suggest_len = array("I", bytes(4 * rows))
+        table.suggested = array("q", [NO_TIMESTAMP]) * rows
+
+    if offset + arena_len > size:
+        raise ValueError(f"{path} is truncated")
+    if os.name == "nt":
+        # Windows cannot replace a file that is still mapped, and the next
+        # snapshot is written over this one; copy the text instead
+        table.arena_base = bytes(view[offset:offset + arena_len])
+        view.release()
+        mapped.close()
+    else:
+        table.arena_base = view[offset:offset + arena_len]
+    table.base_len = arena_len
+
+    for codes, column in ((table.statuses, table.status), (table.sources, table.source)):
+        codes.counts = [column.count(code) for code in range(len(codes.values))]
+    table.live = rows - table.status.count(DELETED)
+    table.garbage_bytes = meta.get("garbage_bytes", 0)
+    table.extras = {int(lead_id): extra for lead_id, extra in meta["extras"].items()}
+    if version == 1:
+        table.migrate_extras()
+    return table, next_id
@@ -0,0 +1,731 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import aiofiles
+
+from journal import LeadJournal, OP_CREATE, OP_UPDATE, OP_DELETE
+from lead_table import EPOCH, SCAN_CHUNK, SUGGESTION_FIELDS, LeadTable, parse_micros
+from persistence import PersistenceScheduler, atomic_write
+from snapshot import load_snapshot, snapshot_chunks
+
+logger = logging.getLogger(__name__)
+
+LEAD_FIELDS = ("id", "name", "email", "phone", "status", "source", "created_at")
+
+# Pagination settings for query_leads
+SORT_FIELDS = ("id", "created_at", "name", "email")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _plain(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace enum members by their values so every backend stores plain strings"""
+    return {key: value.value if isinstance(value, Enum) else value for key, value in fields.items()}
+
+
+def _empty_workflows() -> Dict[str, Any]:
+    return {"workflows": [], "last_updated": datetime.now().isoformat()}
+
+
+def _iso(value: Any) -> Optional[str]:
+    """Normalize a datetime filter to the naive local ISO format used by created_at"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value.isoformat()
+    return value
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split a sort spec like '-created_at' into (field, descending)"""
+    field = sort.lstrip("-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Invalid sort field '{field}', expected one of: {', '.join(SORT_FIELDS)}")
+    return field, sort.startswith("-")
+
+
+def _sort_key(field: str) -> Callable[[Dict[str, Any]], Tuple[Any, int]]:
+    if field == "id":
+        return lambda lead: (lead["id"], lead["id"])
+    return lambda lead: (lead.get(field) or "", lead["id"])
+
+
+def encode_cursor(sort: str, lead: Dict[str, Any], value: Any = None) -> str:
+    """
+    Opaque keyset cursor pointing just past `lead` in the given sort order.
+    `value` overrides the sort value taken from the lead, for backends
+    that sort on an internal representation.
+    """
+    field, _ = parse_sort(sort)
+    if value is None:
+        value = _sort_key(field)(lead)[0]
+    payload = json.dumps([sort, value, lead["id"]], default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Decode a cursor into the (sort value, id) keyset position it points past"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, lead_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor does not match the requested sort order")
+    return value, int(lead_id)
+
+
+class LeadStore:
+    """
+    Storage engine interface used by the API endpoints.
+
+    Leads are plain dicts with the keys in LEAD_FIELDS, plus SUGGESTION_FIELDS
+    once a suggestion has been stored. Dicts returned by
+    the store must be treated as read-only; changes go through `update_lead`.
+    """
+
+    name = "base"
+
+    async def load(self):
+        """Open the store and load any existing data"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Flush pending state and release resources"""
+
+    async def flush(self):
+        """Make every write accepted so far durable on disk"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend specific counters for the health endpoint"""
+        return {}
+
+    async def list_leads(self, status: Optional[str] = None, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All leads in creation order, optionally restricted to a status and/or source"""
+        raise NotImplementedError
+
+    async def get_lead(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def query_leads(self, status: Optional[str] = None, source: Optional[str] = None,
+                          created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                          q: Optional[str] = None, sort: str = "id", limit: int = DEFAULT_PAGE_SIZE,
+                          cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of leads matching the filters, plus the cursor of the next page
+        (None on the last page). `q` is a case-insensitive substring match on
+        name, email and phone; `sort` is a field from SORT_FIELDS, prefixed
+        with '-' for descending order. Raises ValueError on a bad sort or cursor.
+        """
+        raise NotImplementedError
+
+    async def iter_leads(self, batch_size: int = MAX_PAGE_SIZE, **filters) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield every lead matching `filters` (see query_leads) in id order, one
+        batch at a time. Batches are fetched by keyset cursor, so concurrent
+        writes never invalidate the iteration and memory stays bounded.
+        """
+        cursor = None
+        while True:
+            leads, cursor = await self.query_leads(sort="id", limit=batch_size, cursor=cursor, **filters)
+            if leads:
+                yield leads
+            if cursor is None:
+                break
+
+    async def count_leads(self) -> int:
+        raise NotImplementedError
+
+    async def count_by_status(self) -> Dict[str, int]:
+        """Number of leads per status, omitting statuses with none"""
+        raise NotImplementedError
+
+    async def create_lead(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a lead, assigning its id, and return the stored record"""
+        raise NotImplementedError
+
+    async def create_leads(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert many leads in one commit, assigning a contiguous block of ids"""
+        raise NotImplementedError
+
+    async def update_lead(self, lead_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update fields of a lead; returns the updated lead or None if missing"""
+        raise NotImplementedError
+
+    async def delete_lead(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        """Delete a lead; returns the deleted lead or None if missing"""
+        raise NotImplementedError
+
+    async def load_workflows(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def save_workflows(self, workflows_data: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class JsonLeadStore(LeadStore):
+    """
+    File backend: binary leads.snapshot plus an append-only mutation journal,
+    workflows in workflow.json. leads.json is only read when there is no
+    snapshot yet (first start after upgrading) and is not written anymore. Leads are held in a compact columnar
+    LeadTable: lookups are a binary search on the sorted id column and
+    status/source filters scan one-byte code columns instead of records.
+
+    Writes are group-committed: mutations only mark state dirty, and a
+    PersistenceScheduler writes it at most once per `persist_window`
+    seconds. Call `flush()` when a write must be durable before returning.
+    """
+
+    name = "json"
+
+    def __init__(self, leads_path: str = "leads.json", workflows_path: str = "workflow.json",
+                 journal_path: str = "leads.journal", compact_every: int = 1000, persist_window: float = 0.1,
+                 snapshot_path: str = "leads.snapshot"):
+        self.leads_path = leads_path
+        self.snapshot_path = snapshot_path
+        self.needs_snapshot = False
+        self.workflows_path = workflows_path
+        self.journal = LeadJournal(path=journal_path, compact_every=compact_every)
+        self.leads = LeadTable()
+        self.next_id = 1
+        # Sort index builds in progress, shared by concurrent queries
+        self.index_builds: Dict[str, asyncio.Future] = {}
+        self.pending_workflows: Optional[bytes] = None
+        self.scheduler = PersistenceScheduler(window=persist_window)
+        self.scheduler.register("leads", self._write_leads)
+        self.scheduler.register("workflows", self._write_workflows)
+
+    async def load(self):
+        if os.path.exists(self.snapshot_path):
+            # Columns are copied and the text arena is mapped, no parsing
+            self.leads, self.next_id = load_snapshot(self.snapshot_path)
+        else:
+            try:
+                async with aiofiles.open(self.leads_path, "r") as file:
+                    content = await file.read()
+                    self.leads = LeadTable(json.loads(content))
+                # Convert to the binary snapshot shortly after startup
+                self.needs_snapshot = True
+                logger.info(f"Imported {len(self.leads)} leads from legacy {self.leads_path}")
+            except FileNotFoundError:
+                logger.info(f"{self.snapshot_path} not found, starting with empty leads")
+                self.leads = LeadTable()
+            self.next_id = 1
+
+        # Replay mutations recorded since the last snapshot
+        await self.journal.replay(self._apply_record)
+        self.next_id = max(self.next_id, self.leads.last_id + 1)
+        if self.needs_snapshot:
+            self.scheduler.mark_dirty("leads")
+
+    def _apply_record(self, record: Dict[str, Any]):
+        op = record.get("op")
+        if op == OP_CREATE:
+            self.leads.add(record["lead"])
+        elif op == OP_UPDATE:
+            self.leads.update(record["id"], record["fields"])
+        elif op == OP_DELETE:
+            self.leads.remove(record["id"])
+        else:
+            logger.warning(f"Skipping unknown journal operation: {op}")
+
+    async def close(self):
+        await self.scheduler.close()
+        if self.journal.pending or self.needs_snapshot:
+            await self.compact()
+
+    async def flush(self):
+        await self.scheduler.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "persistence": self.scheduler.stats(),
+            "journal_pending": self.journal.pending,
+            "table_bytes": self.leads.memory_usage(),
+            "mapped_bytes": self.leads.base_len
+        }
+
+    async def compact(self):
+        """Write a full snapshot and truncate the journal"""
+        # The journal file must hold exactly the records the snapshot covers,
+        # so drain the buffer and serialize without yielding in between
+        while self.journal.buffer:
+            await self.journal.flush()
+        chunks = snapshot_chunks(self.leads, self.next_id)
+        await atomic_write(self.snapshot_path, chunks)
+        await self.journal.truncate()
+        self.needs_snapshot = False
+        logger.info(f"Compacted lead journal into {self.snapshot_path}")
+
+    async def _write_leads(self):
+        await self.journal.flush()
+        if self.journal.needs_compaction() or self.needs_snapshot:
+            await self.compact()
+
+    async def _write_workflows(self):
+        data, self.pending_workflows = self.pending_workflows, None
+        if data is not None:
+            await atomic_write(self.workflows_path, data)
+
+    async def _record(self, op: str, lead_id: int, lead: Dict[str, Any] = None, fields: Dict[str, Any] = None):
+        self.journal.record(op, lead_id, lead=lead, fields=fields)
+        self.scheduler.mark_dirty("leads")
+
+    async def list_leads(self, status: Optional[str] = None, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.leads.select(status=status, source=source)
+
+    async def get_lead(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        return self.leads.get(lead_id)
+
+    async def query_leads(self, status: Optional[str] = None, source: Optional[str] = None,
+                          created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                          q: Optional[str] = None, sort: str = "id", limit: int = DEFAULT_PAGE_SIZE,
+                          cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        field, descending = parse_sort(sort)
+        after = decode_cursor(cursor, sort) if cursor else None
+        table = self.leads
+        codes = _plain({"status": status, "source": source})
+        after_micros = parse_micros(_iso(created_after)) if created_after is not None else None
+        before_micros = parse_micros(_iso(created_before)) if created_before is not None else None
+        q = q.lower() if q else None
+
+        def matches(row: int) -> bool:
+            created = table.created[row]
+            if after_micros is not None and created < after_micros:
+                return False
+            if before_micros is not None and created >= before_micros:
+                return False
+            if q and not any(q in (value or "").lower() for value in table.text(row)):
+                return False
+            return True
+
+        # The table sorts created_at as integer micros (NO_TIMESTAMP when
+        # missing) and text as '' when missing; cursors carry that key
+        position = None
+        if after is not None:
+            value, lead_id = after
+            expected = str if field in ("name", "email") else int
+            if field != "id" and (not isinstance(value, expected) or isinstance(value, bool)):
+                raise ValueError("Invalid cursor")
+            position = (value if field != "id" else lead_id, lead_id)
+
+        if not table.has_sort_index(field):
+            await self._build_sort_index(field)
+
+        page, keys = [], []
+        chunk = limit + 1
+        while True:
+            rows, position = table.scan(field, after=position, descending=descending, limit=chunk, **codes)
+            for row in rows:
+                if matches(row):
+                    page.append(table.lead(row))
+                    keys.append(table.sort_key(row, field)[0])
+                    if len(page) > limit:
+                        break
+            if len(page) > limit or position is None:
+                break
+            # Long filtered scans give other requests a turn between chunks
+            chunk = min(chunk * 2, SCAN_CHUNK)
+            await asyncio.sleep(0)
+
+        next_cursor = encode_cursor(sort, page[limit - 1], keys[limit - 1]) if len(page) > limit else None
+        return page[:limit], next_cursor
+
+    async def _build_sort_index(self, field: str):
+        """Build a sort index in chunks so other requests keep running meanwhile"""
+        build = self.index_builds.get(field)
+        if build is None:
+            async def run():
+                started = time.perf_counter()
+                for _ in self.leads.build_sort_index(field):
+                    await asyncio.sleep(0)
+                logger.info(f"Built the {field} sort index over {len(self.leads)} leads "
+                            f"in {time.perf_counter() - started:.2f}s")
+
+            build = self.index_builds[field] = asyncio.ensure_future(run())
+            build.add_done_callback(lambda _: self.index_builds.pop(field, None))
+        await asyncio.shield(build)
+
+    async def count_leads(self) -> int:
+        return len(self.leads)
+
+    async def count_by_status(self) -> Dict[str, int]:
+        return self.leads.counts_by("status")
+
+    async def create_lead(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        lead = {"id": self.next_id, **_plain(fields)}
+        self.leads.add(lead)
+        self.next_id += 1
+        await self._record(OP_CREATE, lead["id"], lead=lead)
+        return lead
+
+    async def create_leads(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        leads = []
+        for fields in fields_list:
+            lead = {"id": self.next_id, **_plain(fields)}
+            self.leads.add(lead)
+            self.journal.record(OP_CREATE, lead["id"], lead=lead)
+            self.next_id += 1
+            leads.append(lead)
+        if leads:
+            self.scheduler.mark_dirty("leads")
+        return leads
+
+    async def update_lead(self, lead_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        fields = _plain(fields)
+        lead = self.leads.update(lead_id, fields)
+        if lead is None:
+            return None
+        await self._record(OP_UPDATE, lead_id, fields=fields)
+        return lead
+
+    async def delete_lead(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        lead = self.leads.remove(lead_id)
+        if lead is None:
+            return None
+        await self._record(OP_DELETE, lead_id)
+        return lead
+
+    async def load_workflows(self) -> Dict[str, Any]:
+        try:
+            async with aiofiles.open(self.workflows_path, "r") as file:
+                content = await file.read()
+                return json.loads(content)
+        except FileNotFoundError:
+            logger.info(f"{self.workflows_path} not found, starting with empty workflows")
+            return _empty_workflows()
+
+    async def save_workflows(self, workflows_data: Dict[str, Any]):
+        # Serialize now; only the latest version is written when the window closes
+        self.pending_workflows = json.dumps(workflows_data, indent=2, default=str).encode()
+        self.scheduler.mark_dirty("workflows")
+
+
+class SQLiteLeadStore(LeadStore):
+    """
+    Embedded SQLite backend in WAL mode with indexes on the columns the
+    API filters and sorts on. Queries are short indexed statements, so
+    they run directly on the event loop thread.
+    """
+
+    name = "sqlite"
+
+    # AUTOINCREMENT keeps the id of a deleted lead from being handed out again
+    LEADS_TABLE = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            email TEXT,
+            phone TEXT,
+            status TEXT NOT NULL,
+            source TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            suggestion TEXT,
+            suggested_at TEXT
+        );
+    """
+
+    SCHEMA = LEADS_TABLE.format(table="leads") + """
+        CREATE INDEX IF NOT EXISTS idx_leads_email ON leads(email);
+        CREATE INDEX IF NOT EXISTS idx_leads_status ON leads(status);
+        CREATE INDEX IF NOT EXISTS idx_leads_source ON leads(source);
+        CREATE INDEX IF NOT EXISTS idx_leads_created_at ON leads(created_at);
+        CREATE TABLE IF NOT EXISTS workflows (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, db_path: str = "crm.db", leads_path: str = "leads.json",
+                 workflows_path: str = "workflow.json", journal_path: str = "leads.journal",
+                 snapshot_path: str = "leads.snapshot"):
+        self.db_path = db_path
+        self.leads_path = leads_path
+        self.snapshot_path = snapshot_path
+        self.workflows_path = workflows_path
+        self.journal_path = journal_path
+        self.conn: Optional[sqlite3.Connection] = None
+
+    async def load(self):
+        if not os.path.exists(self.db_path):
+            await self._create_database()
+        self.conn = self._connect(self.db_path)
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        # Databases created before suggestions were stored lack their columns
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(leads)")}
+        for column in SUGGESTION_FIELDS:
+            if column not in columns:
+                conn.execute(f"ALTER TABLE leads ADD COLUMN {column} TEXT")
+        conn.commit()
+        table_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'leads'").fetchone()[0]
+        if "AUTOINCREMENT" not in table_sql.upper():
+            self._rebuild_leads_table(conn)
+        return conn
+
+    def _rebuild_leads_table(self, conn: sqlite3.Connection):
+        """Copy leads into an AUTOINCREMENT table; older databases could reuse the id of a deleted lead"""
+        columns = ", ".join(LEAD_FIELDS + SUGGESTION_FIELDS)
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS leads_rebuild")
+            conn.execute(self.LEADS_TABLE.format(table="leads_rebuild"))
+            conn.execute(f"INSERT INTO leads_rebuild ({columns}) SELECT {columns} FROM leads")
+            conn.execute("DROP TABLE leads")
+            conn.execute("ALTER TABLE leads_rebuild RENAME TO leads")
+        # Dropping the old table dropped its indexes as well
+        conn.executescript(self.SCHEMA)
+        logger.info(f"Rebuilt the leads table of {self.db_path} with AUTOINCREMENT ids")
+
+    async def _create_database(self):
+        """
+        Migrate the file backend into a temporary database and move it into
+        place only once the migration succeeded. A failed migration must not
+        leave a half-filled database that the next start would take as done.
+        """
+        temp_path = f"{self.db_path}.migrating"
+        _remove_database(temp_path)
+        self.conn = self._connect(temp_path)
+        succeeded = False
+        try:
+            await migrate_json_to_sqlite(self, self.leads_path, self.workflows_path, self.journal_path,
+                                         self.snapshot_path)
+            succeeded = True
+        finally:
+            self.conn.close()
+            self.conn = None
+            if not succeeded:
+                _remove_database(temp_path)
+        os.replace(temp_path, self.db_path)
+
+    async def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    async def list_leads(self, status: Optional[str] = None, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        criteria = {column: value for column, value in _plain({"status": status, "source": source}).items()
+                    if value is not None}
+        where = f" WHERE {' AND '.join(f'{column} = ?' for column in criteria)}" if criteria else ""
+        rows = self.conn.execute(f"SELECT * FROM leads{where} ORDER BY id", list(criteria.values())).fetchall()
+        return [dict(row) for row in rows]
+
+    async def get_lead(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM leads WHERE id = ?", (lead_id,)).fetchone()
+        return dict(row) if row else None
+
+    async def query_leads(self, status: Optional[str] = None, source: Optional[str] = None,
+                          created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                          q: Optional[str] = None, sort: str = "id", limit: int = DEFAULT_PAGE_SIZE,
+                          cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        field, descending = parse_sort(sort)
+        clauses, params = [], []
+        for column, value in _plain({"status": status, "source": source}).items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if created_after is not None:
+            clauses.append("created_at >= ?")
+            params.append(_iso(created_after))
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(_iso(created_before))
+        if q:
+            pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\' OR phone LIKE ? ESCAPE '\\')")
+            params.extend([pattern] * 3)
+
+        # Nullable text columns sort as '' to match the JSON backend
+        column = field if field in ("id", "created_at") else f"COALESCE({field}, '')"
+        if cursor:
+            value, lead_id = decode_cursor(cursor, sort)
+            op = "<" if descending else ">"
+            if field == "id":
+                clauses.append(f"id {op} ?")
+                params.append(lead_id)
+            else:
+                clauses.append(f"({column}, id) {op} (?, ?)")
+                params.extend([value or "", lead_id])
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        direction = "DESC" if descending else "ASC"
+        order = f"id {direction}" if field == "id" else f"{column} {direction}, id {direction}"
+        rows = self.conn.execute(f"SELECT * FROM leads{where} ORDER BY {order} LIMIT ?",
+                                 [*params, limit + 1]).fetchall()
+        page = [dict(row) for row in rows]
+        next_cursor = encode_cursor(sort, page[limit - 1]) if len(page) > limit else None
+        return page[:limit], next_cursor
+
+    async def count_leads(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    async def count_by_status(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM leads GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    async def create_lead(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        fields = _plain(fields)
+        columns = [column for column in LEAD_FIELDS if column in fields]
+        with self.conn:
+            cursor = self.conn.execute(
+                f"INSERT INTO leads ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [fields[column] for column in columns]
+            )
+        return {"id": cursor.lastrowid, **{column: fields.get(column) for column in LEAD_FIELDS if column != "id"}}
+
+    async def create_leads(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        columns = [column for column in LEAD_FIELDS if column != "id"]
+        sql = f"INSERT INTO leads ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        leads = []
+        with self.conn:
+            for fields in fields_list:
+                fields = _plain(fields)
+                values = [fields.get(column) for column in columns]
+                cursor = self.conn.execute(sql, values)
+                leads.append({"id": cursor.lastrowid, **dict(zip(columns, values))})
+        return leads
+
+    def insert_leads(self, leads: List[Dict[str, Any]]):
+        """Insert fully formed leads (ids and any suggestion included) in one transaction"""
+        columns = LEAD_FIELDS + SUGGESTION_FIELDS
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO leads ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [[_plain(lead).get(column) for column in columns] for lead in leads]
+            )
+
+    async def update_lead(self, lead_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        fields = {key: value for key, value in _plain(fields).items()
+                  if key in LEAD_FIELDS + SUGGESTION_FIELDS and key != "id"}
+        if fields:
+            with self.conn:
+                cursor = self.conn.execute(
+                    f"UPDATE leads SET {', '.join(f'{column} = ?' for column in fields)} WHERE id = ?",
+                    [*fields.values(), lead_id]
+                )
+            if cursor.rowcount == 0:
+                return None
+        return await self.get_lead(lead_id)
+
+    async def delete_lead(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        lead = await self.get_lead(lead_id)
+        if lead is None:
+            return None
+        with self.conn:
+            self.conn.execute("DELETE FROM leads WHERE id = ?", (lead_id,))
+        return lead
+
+    async def load_workflows(self) -> Dict[str, Any]:
+        rows = self.conn.execute("SELECT data FROM workflows ORDER BY position").fetchall()
+        last_updated = self.conn.execute("SELECT value FROM meta WHERE key = 'workflows_last_updated'").fetchone()
+        return {
+            "workflows": [json.loads(row["data"]) for row in rows],
+            "last_updated": last_updated[0] if last_updated else datetime.now().isoformat()
+        }
+
+    async def save_workflows(self, workflows_data: Dict[str, Any]):
+        # Workflow sets are small, so the table is rewritten as a whole
+        with self.conn:
+            self.conn.execute("DELETE FROM workflows")
+            self.conn.executemany(
+                "INSERT INTO workflows (id, position, data) VALUES (?, ?, ?)",
+                [(workflow["id"], i, json.dumps(workflow, default=str))
+                 for i, workflow in enumerate(workflows_data["workflows"])]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('workflows_last_updated', ?)",
+                (workflows_data.get("last_updated"),)
+            )
+
+
+def _remove_database(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+# Legacy leads may lack values the SQLite schema requires
+MIGRATION_DEFAULTS = {"status": "New", "source": "Manual", "created_at": EPOCH.isoformat()}
+
+
+async def migrate_json_to_sqlite(store: SQLiteLeadStore, leads_path: str = "leads.json",
+                                 workflows_path: str = "workflow.json", journal_path: str = "leads.journal",
+                                 snapshot_path: str = "leads.snapshot"):
+    """One-shot import of the file backend (snapshot or leads.json, plus journal) into SQLite"""
+    source = JsonLeadStore(leads_path=leads_path, workflows_path=workflows_path, journal_path=journal_path,
+                           snapshot_path=snapshot_path)
+    await source.load()
+    # The source is read once and discarded, do not convert it to a snapshot
+    source.needs_snapshot = False
+    leads = await source.list_leads()
+    defaulted = 0
+    for i, lead in enumerate(leads):
+        missing = {field: value for field, value in MIGRATION_DEFAULTS.items() if lead.get(field) is None}
+        if missing:
+            # Missing timestamps become the epoch, so they sort first as in the file backend
+            leads[i] = {**lead, **missing}
+            defaulted += 1
+    if defaulted:
+        logger.warning(f"Filled in missing status, source or created_at for {defaulted} leads during migration")
+    store.insert_leads(leads)
+    # Ids the file backend already handed out to since-deleted leads stay retired
+    with store.conn:
+        if store.conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'leads'",
+                              (source.next_id - 1,)).rowcount == 0:
+            store.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('leads', ?)", (source.next_id - 1,))
+    await store.save_workflows(await source.load_workflows())
+    logger.info(f"Migrated {len(source.leads)} leads into {store.db_path}")
+
+
+def create_lead_store() -> LeadStore:
+    """Build the storage engine selected by LEAD_STORAGE_BACKEND (json or sqlite)"""
+    backend = os.getenv("LEAD_STORAGE_BACKEND", "json").lower()
+    if backend == "sqlite":
+        return SQLiteLeadStore(db_path=os.getenv("LEADS_DB_PATH", "crm.db"),
+                               journal_path=os.getenv("LEADS_JOURNAL_PATH", "leads.journal"),
+                               snapshot_path=os.getenv("LEADS_SNAPSHOT_PATH", "leads.snapshot"))
+    if backend != "json":
+        logger.warning(f"Unknown LEAD_STORAGE_BACKEND '{backend}', falling back to json")
+    return JsonLeadStore(
+        journal_path=os.getenv("LEADS_JOURNAL_PATH", "leads.journal"),
+        snapshot_path=os.getenv("LEADS_SNAPSHOT_PATH", "leads.snapshot"),
+        compact_every=int(os.getenv("LEADS_JOURNAL_COMPACT_EVERY", "1000")),
+        persist_window=float(os.getenv("PERSIST_WINDOW_SECONDS", "0.1"))
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python storage.py migrate [db_path]
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        db_path = sys.argv[2] if len(sys.argv) > 2 else os.getenv("LEADS_DB_PATH", "crm.db")
+        if os.path.exists(db_path):
+            sys.exit(f"{db_path} already exists, refusing to migrate over it")
+        logging.basicConfig(level=logging.INFO)
+
+        async def _migrate():
+            store = SQLiteLeadStore(db_path=db_path)
+            await store.load()
+            await store.close()
+
+        asyncio.run(_migrate())
+    else:
+        print("usage: python storage.py migrate [db_path]")
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from bulk_import import BulkImportError, _iter_lines, iter_bulk_rows, validate_bulk_rows
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def _collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+
+def test_lines_span_chunks_and_strip_bom():
+    body = ["﻿name,email".encode(), b",phone\r\nAda,ada@", b"example.com,555", b"-0100\n", b"last"]
+    assert _collect(_iter_lines(_chunks(*body))) == ["name,email,phone", "Ada,ada@example.com,555-0100", "last"]
+
+
+def test_long_line_across_many_chunks():
+    line = b"x" * 100_000
+    chunks = [line[i:i + 100] for i in range(0, len(line), 100)] + [b"\ny"]
+    assert _collect(_iter_lines(_chunks(*chunks))) == ["x" * 100_000, "y"]
+
+
+def test_invalid_utf8_is_an_import_error():
+    with pytest.raises(BulkImportError, match="Line 2 is not valid UTF-8"):
+        _collect(_iter_lines(_chunks(b'{"name": "Ada"}\n{"name": "\xff"}\n')))
+
+
+def test_csv_rows_with_quoted_newlines_and_bad_rows():
+    body = b'name,email,phone\n"Ada\nLovelace",ada@example.com,555-0100\nBob,bob@example.com\n'
+    rows = _collect(iter_bulk_rows(_chunks(body), "csv"))
+    assert rows[0] == (1, {"name": "Ada\nLovelace", "email": "ada@example.com", "phone": "555-0100"})
+    assert rows[1][0] == 2 and isinstance(rows[1][1], ValueError)
+
+
+def test_csv_header_must_have_lead_columns():
+    with pytest.raises(BulkImportError, match="phone"):
+        _collect(iter_bulk_rows(_chunks(b"name,email\nAda,ada@example.com\n"), "csv"))
+
+
+def test_ndjson_rows_are_validated_per_row():
+    body = (b'{"name": "Ada Lovelace", "email": "ada@example.com", "phone": "555-0100"}\n'
+            b'[1, 2]\n'
+            b'{"name": "Bob", "email": "not-an-email", "phone": "555-0101"}\n')
+    rows = _collect(iter_bulk_rows(_chunks(body), "ndjson"))
+    valid, errors = validate_bulk_rows(rows)
+    assert valid == [{"name": "Ada Lovelace", "email": "ada@example.com", "phone": "555-0100"}]
+    assert [error["row"] for error in errors] == [2, 3]
+
+
+class RecordingStore:
+    def __init__(self):
+        self.commits = []
+        self.flushes = 0
+
+    async def create_leads(self, fields_list):
+        self.commits.append(fields_list)
+        return [{"id": 100 + i, **fields} for i, fields in enumerate(fields_list)]
+
+    async def flush(self):
+        self.flushes += 1
+
+
+def test_endpoint_commits_valid_rows_once_and_reports_bad_rows(monkeypatch):
+    store = RecordingStore()
+    monkeypatch.setattr(main, "lead_store", store)
+    monkeypatch.setattr(main, "BULK_VALIDATION_BATCH_SIZE", 2)
+    body = "name,email,phone\nAda,ada@example.com,555-0100\nBob,not-an-email,\nCy,cy@example.com,555-0199\n"
+    response = TestClient(main.app).post("/leads/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["total_rows"], result["created"], result["failed"]) == (3, 2, 1)
+    assert (result["first_id"], result["last_id"]) == (100, 101)
+    assert [error["row"] for error in result["errors"]] == [2]
+    assert len(store.commits) == 1 and store.flushes == 1
+    assert [lead["name"] for lead in store.commits[0]] == ["Ada", "Cy"]
+    assert all(lead["source"] == "Import" for lead in store.commits[0])
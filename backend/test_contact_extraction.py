@@ -0,0 +1,49 @@
+import pytest
+
+from contact_extraction import FALLBACK_NAME_CONFIDENCE, best, extract_contacts, merge_contacts
+
+CARD = """CURRICULUM VITAE
+Jane Q Doe
+Senior Engineer
+Email: jane.doe@example.com  Phone: (555) 123-4567
+Alt: jdoe@localhost, ext 555-1234
+"""
+
+
+def test_card_yields_ranked_candidates_with_spans():
+    contacts = extract_contacts(CARD)
+    assert best(contacts["emails"]) == "jane.doe@example.com"
+    assert best(contacts["phones"]) == "(555) 123-4567"
+    assert best(contacts["names"]) == "Jane Q Doe"
+    for kind in ("emails", "phones", "names"):
+        for candidate in contacts[kind]:
+            assert CARD[candidate.start:candidate.end] == candidate.value
+    # An address without a top-level domain and a seven-digit number rank lower
+    assert [candidate.value for candidate in contacts["emails"]] == ["jane.doe@example.com", "jdoe@localhost"]
+    assert contacts["phones"][-1].value == "555-1234" and contacts["phones"][-1].confidence < 0.9
+
+
+@pytest.mark.parametrize("text, name", [
+    ("Name: Ada Lovelace, ada@example.com\n", "Ada Lovelace"),
+    ("full name - Grace Hopper 555-010-0199\n", "Grace Hopper"),
+    ("resume\nskills\nnothing useful here\n", "resume"),
+])
+def test_labeled_and_fallback_names(text, name):
+    assert best(extract_contacts(text)["names"]) == name
+
+
+def test_digits_inside_an_email_are_not_a_phone():
+    contacts = extract_contacts("Contact 5551234567@example.com today")
+    assert best(contacts["emails"]) == "5551234567@example.com" and contacts["phones"] == []
+
+
+def test_offsets_and_merging_across_pages():
+    pages = ["terms and conditions\n", "Ada Lovelace\nada@example.com\n"]
+    first = extract_contacts(pages[0])
+    second = extract_contacts(pages[1], offset=len(pages[0]))
+    merged = merge_contacts([first, second])
+    text = "".join(pages)
+    assert best(merged["names"]) == "Ada Lovelace"
+    assert all(name.confidence > FALLBACK_NAME_CONFIDENCE for name in merged["names"])
+    email = merged["emails"][0]
+    assert text[email.start:email.end] == "ada@example.com"
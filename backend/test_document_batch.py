@@ -0,0 +1,93 @@
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import utils
+from document_ocr import expand_zip
+
+
+class StubStore:
+    def __init__(self):
+        self.created = []
+
+    async def create_leads(self, fields_list):
+        leads = [{"id": len(self.created) + i + 1, **fields} for i, fields in enumerate(fields_list)]
+        self.created += leads
+        return leads
+
+    async def flush(self):
+        pass
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    return tmp_path / "uploads"
+
+
+def test_expand_zip_skips_unsupported_and_hidden_members(tmp_path, upload_dir):
+    path = tmp_path / "batch.zip"
+    path.write_bytes(_zip({"a.png": b"png", "notes.txt": b"txt", "__MACOSX/._a.png": b"", ".hidden.pdf": b"",
+                           "dir/b.pdf": b"pdf", "c.jpg": b"jpg"}))
+    documents, skipped = expand_zip(str(path), (".pdf", ".png", ".jpg"), max_files=2, max_bytes=1024)
+    assert [name for name, _, _ in documents] == ["a.png", "dir/b.pdf"]
+    assert skipped == [("notes.txt", "Unsupported file type"), ("c.jpg", "Batch is limited to 2 files")]
+    assert [open(member_path, "rb").read() for _, member_path, _ in documents] == [b"png", b"pdf"]
+
+
+def test_expand_zip_refuses_archives_past_the_size_cap(tmp_path, upload_dir):
+    path = tmp_path / "bomb.zip"
+    path.write_bytes(_zip({"a.png": b"\0" * 600, "b.png": b"\0" * 600}))
+    with pytest.raises(ValueError):
+        expand_zip(str(path), (".png",), max_files=10, max_bytes=1000)
+    # The member spooled before the cap was hit is removed again
+    assert os.listdir(upload_dir) == []
+
+
+def test_batch_upload_creates_leads_in_one_commit(upload_dir, monkeypatch):
+    store = StubStore()
+    monkeypatch.setattr(main, "lead_store", store)
+
+    async def fake_extract(path, digest, filename, wait=False):
+        assert wait
+        if filename == "blank.png":
+            return {"error": "no text"}
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        return {"name": stem.title(), "email": f"{stem}@example.com", "phone": "555-0100", "source": "Document"}
+
+    monkeypatch.setattr(main, "extract_document", fake_extract)
+    files = [
+        ("files", ("ada.png", b"png", "image/png")),
+        ("files", ("blank.png", b"png", "image/png")),
+        ("files", ("readme.txt", b"txt", "text/plain")),
+        ("files", ("more.zip", _zip({"bob.pdf": b"pdf", "logo.gif": b"gif"}), "application/zip")),
+    ]
+    response = TestClient(main.app).post("/leads/document/batch", files=files)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"], body["skipped"], body["total_files"]) == (2, 1, 2, 5)
+    statuses = {item["filename"]: item["status"] for item in body["items"]}
+    assert statuses == {"ada.png": "created", "blank.png": "failed", "bob.pdf": "created",
+                        "readme.txt": "skipped", "logo.gif": "skipped"}
+    assert [lead["name"] for lead in store.created] == ["Ada", "Bob"]
+    assert os.listdir(upload_dir) == []
+
+
+def test_batch_upload_rejects_a_corrupt_zip(upload_dir, monkeypatch):
+    monkeypatch.setattr(main, "lead_store", StubStore())
+    response = TestClient(main.app).post("/leads/document/batch",
+                                         files=[("files", ("broken.zip", b"not a zip", "application/zip"))])
+    assert response.status_code == 400
+    assert os.listdir(upload_dir) == []
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from document_jobs import JOB_FAILED, JOB_SUCCEEDED, DocumentJobQueue, DocumentJobQueueFull
+
+
+async def _wait(queue, job_id):
+    while queue.get(job_id)["status"] not in (JOB_SUCCEEDED, JOB_FAILED):
+        await asyncio.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_jobs_run_once_and_clean_up():
+    async def run():
+        queue = DocumentJobQueue(workers=2, max_queued=10, ttl=60)
+        queue.start()
+        calls, cleaned = [], []
+
+        async def succeed():
+            calls.append("ok")
+            return {"lead": {"id": 1}}
+
+        async def fail():
+            calls.append("fail")
+            raise ValueError("Tesseract OCR failed: unreadable")
+
+        async def cleanup():
+            cleaned.append(True)
+
+        ok = queue.submit(succeed, cleanup, filename="card.png")
+        bad = queue.submit(fail, cleanup, filename="scan.pdf")
+        done = await _wait(queue, ok["job_id"]), await _wait(queue, bad["job_id"])
+        await queue.stop()
+        return done, calls, cleaned
+
+    (ok, bad), calls, cleaned = asyncio.run(run())
+    assert ok["status"] == JOB_SUCCEEDED and ok["result"] == {"lead": {"id": 1}} and ok["filename"] == "card.png"
+    # A failing job is not retried
+    assert bad["status"] == JOB_FAILED and "unreadable" in bad["error"]
+    assert sorted(calls) == ["fail", "ok"] and len(cleaned) == 2
+    assert "_queued" not in DocumentJobQueue.public(ok)
+
+
+def test_full_queue_rejects_submissions():
+    async def run():
+        queue = DocumentJobQueue(workers=1, max_queued=1, ttl=60)
+        queue.start()
+        release = asyncio.Event()
+
+        async def block():
+            await release.wait()
+            return {}
+
+        first = queue.submit(block)
+        await asyncio.sleep(0.01)  # picked up by the worker
+        queue.submit(block)
+        with pytest.raises(DocumentJobQueueFull):
+            queue.submit(block)
+        release.set()
+        await _wait(queue, first["job_id"])
+        rejected = queue.stats()["rejected"]
+        await queue.stop()
+        return rejected
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from document_ocr import OCR_PDF_MAX_PAGES, ocr_pdf, select_pages
+from ocr_pool import OCRPoolFull
+
+
+class PagePool:
+    """Stands in for OCRPool; serves page counts and per-page text of a fake PDF"""
+
+    def __init__(self, pages, workers=2, fail=None):
+        self.pages = pages
+        self.workers = workers
+        self.fail = fail or {}
+        self.ocr_calls = []
+
+    async def run(self, func, *args, wait=False):
+        if func.__name__ == "pdf_page_count":
+            return len(self.pages)
+        page = args[1]
+        self.ocr_calls.append(page)
+        if page in self.fail:
+            raise self.fail[page]
+        return self.pages[page - 1]
+
+
+@pytest.mark.parametrize("args, expected", [
+    ((3,), [1, 2, 3]),
+    ((30,), list(range(1, OCR_PDF_MAX_PAGES + 1))),
+    ((30, 5, None, 2), [5, 6]),
+    ((30, 5, 6, 100), [5, 6]),
+    ((4, 2, 99), [2, 3, 4]),
+    ((2, 3), []),
+])
+def test_select_pages_clamps_to_document_and_cap(args, expected):
+    assert select_pages(*args) == expected
+
+
+def test_remaining_pages_are_skipped_once_email_and_phone_are_found():
+    pool = PagePool(["Ada Lovelace\nada@example.com", "Call (555) 010-0199", "Terms", "Terms", "Terms"])
+    result = asyncio.run(ocr_pdf(pool, "scan.pdf"))
+    assert pool.ocr_calls == [1, 2]
+    assert result["email"] == "ada@example.com" and result["phone"]
+    assert result["extraction_notes"] == "Processed pages 1-2 of 5 (stopped early, contact details found)"
+
+
+def test_pages_are_processed_in_waves_until_the_range_ends():
+    pool = PagePool(["Nothing here"] * 5, workers=2)
+    result = asyncio.run(ocr_pdf(pool, "scan.pdf", first_page=2))
+    assert sorted(pool.ocr_calls) == [2, 3, 4, 5]
+    assert result["extraction_notes"] == "Processed pages 2-5 of 5"
+    assert result["raw_text"] == "\n".join(["Nothing here"] * 4)
+
+
+def test_failed_page_is_reported_and_pool_backpressure_propagates():
+    result = asyncio.run(ocr_pdf(PagePool(["a", "b"], fail={2: RuntimeError("bad raster")}), "scan.pdf"))
+    assert result["error"] == "OCR failed on page 2: bad raster"
+    with pytest.raises(OCRPoolFull):
+        asyncio.run(ocr_pdf(PagePool(["a", "b"], fail={1: OCRPoolFull("full")}), "scan.pdf"))
+
+
+def test_page_range_past_the_end_is_an_error():
+    result = asyncio.run(ocr_pdf(PagePool(["a", "b"]), "scan.pdf", first_page=3))
+    assert result["error"] == "Page range starts at 3 but the PDF has 2 pages"
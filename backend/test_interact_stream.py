@@ -0,0 +1,64 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+LEAD = {"id": 1, "name": "Ada Lovelace", "email": "ada@example.com", "phone": "555-0100", "status": "New",
+        "source": "Manual", "created_at": "2024-01-01T09:00:00"}
+
+
+class StubStore:
+    async def get_lead(self, lead_id):
+        return dict(LEAD) if lead_id == LEAD["id"] else None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "lead_store", StubStore())
+    main.llm_cache.invalidate_lead(LEAD["id"])
+    return TestClient(main.app)
+
+
+def _ollama(monkeypatch, body):
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    monkeypatch.setattr(main.llm_client, "client", httpx.AsyncClient(transport=transport, base_url="http://ollama"))
+
+
+def _events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_tokens_are_relayed_then_done(client, monkeypatch):
+    _ollama(monkeypatch, b'{"response": "Call "}\n{"response": "today", "done": true}\n')
+    events = _events(client.post("/interact/stream", json={"id": 1, "prompt": "Next step?"}))
+    assert [name for name, _ in events] == ["context", "token", "token", "done"]
+    assert events[-1][1]["reply"] == "Call today"
+
+
+@pytest.mark.parametrize("body, detail", [
+    (b'{"response": "Call "}\nnot json\n', "Malformed stream line"),
+    (b'{"error": "model not found"}\n', "model not found"),
+])
+def test_bad_ollama_stream_ends_with_error_event(client, monkeypatch, body, detail):
+    _ollama(monkeypatch, body)
+    events = _events(client.post("/interact/stream", json={"id": 1, "prompt": "Next step?"}))
+    name, data = events[-1]
+    assert name == "error" and data["status_code"] == 500 and detail in data["detail"]
+
+
+def test_unstarted_client_ends_with_error_event(client, monkeypatch):
+    monkeypatch.setattr(main.llm_client, "client", None)
+    events = _events(client.post("/interact/stream", json={"id": 1, "prompt": "Next step?"}))
+    name, data = events[-1]
+    assert name == "error" and "not started" in data["detail"]
+
+
+def test_unknown_lead_is_404(client):
+    assert client.post("/interact/stream", json={"id": 2, "prompt": "Next step?"}).status_code == 404
@@ -0,0 +1,100 @@
+import asyncio
+import os
+
+from journal import OP_CREATE, OP_DELETE, OP_UPDATE, LeadJournal
+from storage import JsonLeadStore
+
+
+def _store(tmp_path, **kwargs):
+    return JsonLeadStore(leads_path=str(tmp_path / "leads.json"), workflows_path=str(tmp_path / "workflow.json"),
+                         journal_path=str(tmp_path / "leads.journal"),
+                         snapshot_path=str(tmp_path / "leads.snapshot"), **kwargs)
+
+
+def test_replay_applies_flushed_records_in_order_and_skips_torn_line(tmp_path):
+    path = str(tmp_path / "leads.journal")
+
+    async def run():
+        journal = LeadJournal(path=path)
+        journal.record(OP_CREATE, 1, lead={"id": 1, "name": "Ada"})
+        journal.record(OP_UPDATE, 1, fields={"name": "Ada L."})
+        journal.record(OP_DELETE, 1)
+        await journal.flush()
+        # A crash in the middle of an append leaves a partial last line
+        with open(path, "a") as file:
+            file.write('{"op": "create", "id": 2, "le')
+
+        replayed = LeadJournal(path=path)
+        records = []
+        await replayed.replay(records.append)
+        return journal, replayed, records
+
+    journal, replayed, records = asyncio.run(run())
+    assert journal.buffer == []
+    assert [(record["op"], record["id"]) for record in records] == [(OP_CREATE, 1), (OP_UPDATE, 1), (OP_DELETE, 1)]
+    assert records[1]["fields"] == {"name": "Ada L."}
+    assert replayed.pending == 3
+
+
+def test_truncate_keeps_records_buffered_after_the_snapshot(tmp_path):
+    async def run():
+        journal = LeadJournal(path=str(tmp_path / "leads.journal"), compact_every=2)
+        journal.record(OP_CREATE, 1, lead={"id": 1})
+        await journal.flush()
+        journal.record(OP_DELETE, 1)
+        compaction_due = journal.needs_compaction()
+        await journal.truncate()
+        return journal, compaction_due
+
+    journal, compaction_due = asyncio.run(run())
+    assert compaction_due
+    assert os.path.getsize(journal.path) == 0
+    assert journal.pending == 1 and not journal.needs_compaction()
+
+
+def test_store_recovers_unsnapshotted_mutations_from_the_journal(tmp_path):
+    lead = {"name": "Ada", "email": "ada@example.com", "phone": None, "status": "New", "source": "Manual",
+            "created_at": "2024-01-01T00:00:00"}
+
+    async def run():
+        store = _store(tmp_path)
+        await store.load()
+        first, second, third = await store.create_leads([lead, {**lead, "name": "Bob"}, {**lead, "name": "Cy"}])
+        await store.update_lead(first["id"], {"status": "Contacted"})
+        await store.delete_lead(second["id"])
+        await store.flush()
+        # No close(): simulate a crash before any snapshot was written
+        snapshot_written = os.path.exists(store.snapshot_path)
+
+        recovered = _store(tmp_path)
+        await recovered.load()
+        leads = await recovered.list_leads()
+        created = await recovered.create_lead(lead)
+        await recovered.close()
+        return snapshot_written, leads, created
+
+    snapshot_written, leads, created = asyncio.run(run())
+    assert not snapshot_written
+    assert [(lead["id"], lead["name"], lead["status"]) for lead in leads] == [(1, "Ada", "Contacted"), (3, "Cy", "New")]
+    assert created["id"] == 4
+
+
+def test_compaction_folds_the_journal_into_a_snapshot(tmp_path):
+    lead = {"name": "Ada", "status": "New", "source": "Manual", "created_at": "2024-01-01T00:00:00"}
+
+    async def run():
+        store = _store(tmp_path, compact_every=3)
+        await store.load()
+        for _ in range(3):
+            await store.create_lead(lead)
+        await store.flush()
+        journal_size = os.path.getsize(store.journal.path)
+        reopened = _store(tmp_path)
+        await reopened.load()
+        count = await reopened.count_leads()
+        await reopened.close()
+        return journal_size, count
+
+    journal_size, count = asyncio.run(run())
+    assert journal_size == 0 and os.path.exists(tmp_path / "leads.snapshot")
+    assert count == 3
@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+
+from lead_suggestions import suggestion_results
+
+
+async def _batches(leads, size=2):
+    for start in range(0, len(leads), size):
+        yield leads[start:start + size]
+
+
+def _leads(count, **fields):
+    return [{"id": lead_id, **fields} for lead_id in range(1, count + 1)]
+
+
+async def _collect(results):
+    return [result async for result in results]
+
+
+def test_suggestions_run_with_bounded_concurrency_then_summarize():
+    running = []
+    peak = []
+
+    async def suggest(lead):
+        running.append(lead["id"])
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(lead["id"])
+        if lead["id"] == 3:
+            raise ValueError("empty reply")
+        return f"Call lead {lead['id']}"
+
+    results = asyncio.run(_collect(suggestion_results(_batches(_leads(5)), suggest, concurrency=2)))
+    summary = results[-1]
+    assert max(peak) == 2
+    assert sorted(result["id"] for result in results[:-1]) == [1, 2, 3, 4, 5]
+    assert [result for result in results if result.get("status") == "failed"] == \
+        [{"id": 3, "status": "failed", "error": "empty reply"}]
+    assert (summary["done"], summary["matched"], summary["succeeded"], summary["failed"]) == (True, 5, 4, 1)
+
+
+def test_suggested_leads_are_skipped_and_the_batch_is_capped():
+    async def suggest(lead):
+        return "Follow up"
+
+    leads = _leads(2, suggestion="Done already") + [{"id": lead_id} for lead_id in range(3, 8)]
+    results = asyncio.run(_collect(suggestion_results(_batches(leads), suggest, max_leads=3, skip_suggested=True)))
+    summary = results[-1]
+    assert sorted(result["id"] for result in results[:-1]) == [3, 4, 5]
+    assert summary["skipped"] == 2 and summary["truncated"] is True
+
+
+def test_unreachable_llm_stops_the_batch():
+    calls = []
+
+    async def suggest(lead):
+        calls.append(lead["id"])
+        raise httpx.ConnectError("connection refused")
+
+    results = asyncio.run(_collect(suggestion_results(_batches(_leads(20)), suggest, concurrency=2)))
+    assert len(calls) < 20
+    assert "not running" in results[-1]["error"] and results[-1]["succeeded"] == 0
+
+
+def test_cancelled_stream_cancels_running_suggestions():
+    cancelled = []
+
+    async def suggest(lead):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(lead["id"])
+            raise
+
+    async def run():
+        results = suggestion_results(_batches(_leads(5)), suggest, concurrency=2)
+        first = asyncio.ensure_future(results.__anext__())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        try:
+            await first
+        except asyncio.CancelledError:
+            pass
+        await results.aclose()
+
+    asyncio.run(run())
+    assert sorted(cancelled) == [1, 2]
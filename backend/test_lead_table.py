@@ -0,0 +1,87 @@
+import snapshot
+from lead_table import LeadTable
+from snapshot import load_snapshot, snapshot_chunks
+
+
+def _lead(lead_id, **fields):
+    return {"id": lead_id, "name": f"Lead {lead_id}", "email": f"lead{lead_id}@example.com", "phone": "555-0100",
+            "status": "New", "source": "Manual", "created_at": "2024-01-01T09:00:00", **fields}
+
+
+def _write(path, table, next_id):
+    with open(path, "wb") as file:
+        for chunk in snapshot_chunks(table, next_id):
+            file.write(chunk)
+
+
+def test_suggestions_are_stored_in_columns_not_extras():
+    table = LeadTable([_lead(1), _lead(2)])
+    table.update(1, {"suggestion": "Call back on Monday", "suggested_at": "2024-02-01T10:30:00"})
+    assert table.extras == {}
+    assert table.get(1)["suggestion"] == "Call back on Monday"
+    assert table.get(1)["suggested_at"] == "2024-02-01T10:30:00"
+    assert "suggestion" not in table.get(2)
+    # Rewriting the same suggestion leaves no dead arena bytes
+    garbage = table.garbage_bytes
+    table.update(1, {"status": "Contacted", "suggestion": "Call back on Monday"})
+    assert table.garbage_bytes == garbage
+
+
+def test_unusual_suggestion_values_round_trip_through_extras():
+    table = LeadTable([_lead(1, suggestion="", suggested_at="last week")])
+    assert table.get(1)["suggestion"] == "" and table.get(1)["suggested_at"] == "last week"
+
+
+def test_suggestions_survive_snapshot_and_compaction(tmp_path):
+    table = LeadTable([_lead(lead_id) for lead_id in range(1, 6)])
+    for lead_id in range(1, 6):
+        table.update(lead_id, {"suggestion": f"Follow up {lead_id} " + "x" * 50,
+                               "suggested_at": "2024-02-01T10:30:00"})
+    table.update(3, {"suggestion": "Short"})
+    table.remove(2)
+    _write(tmp_path / "leads.snapshot", table, 6)
+    loaded, next_id = load_snapshot(str(tmp_path / "leads.snapshot"))
+    expected = list(table.values())
+    assert next_id == 6 and list(loaded.values()) == expected
+    loaded.compact()
+    assert list(loaded.values()) == expected and loaded.garbage_bytes == 0
+
+
+def test_version_1_snapshot_moves_suggestions_out_of_extras(tmp_path, monkeypatch):
+    table = LeadTable([_lead(1), _lead(2)])
+    table.extras[1] = {"suggestion": "Send pricing", "suggested_at": "2024-02-01T10:30:00"}
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", 1)
+    _write(tmp_path / "leads.snapshot", table, 3)
+    monkeypatch.undo()
+
+    loaded, _ = load_snapshot(str(tmp_path / "leads.snapshot"))
+    assert loaded.extras == {}
+    assert loaded.get(1) == _lead(1, suggestion="Send pricing", suggested_at="2024-02-01T10:30:00")
+    assert loaded.get(2) == _lead(2)
+
+
+def test_email_status_and_source_lookups_follow_writes():
+    table = LeadTable([_lead(1, email="Ada@Example.com"), _lead(2, source="Website"), _lead(3, status="Contacted")])
+    assert table.ids_for_email(" ada@example.COM ") == {1}
+    assert [lead["id"] for lead in table.select(status="New")] == [1, 2]
+    assert [lead["id"] for lead in table.select(status="New", source="Website")] == [2]
+
+    table.update(1, {"email": "ada@new.example.com", "status": "Contacted"})
+    table.remove(2)
+    table.add(_lead(4, email="ada@new.example.com", source="Website"))
+    assert table.ids_for_email("ada@example.com") == set()
+    assert table.ids_for_email("ada@new.example.com") == {1, 4}
+    assert [lead["id"] for lead in table.select(email="ADA@new.example.com", status="Contacted")] == [1]
+    assert table.counts_by("status") == {"New": 1, "Contacted": 2}
+    assert table.count_for("source", "Website") == 1 and table.count_for("source", "Referral") == 0
+    assert table.select(status="Qualified") == []
+
+
+def test_id_lookups_survive_compaction():
+    table = LeadTable([_lead(lead_id) for lead_id in range(1, 2001)])
+    for lead_id in range(1, 2001, 2):
+        table.remove(lead_id)
+    table.compact()
+    assert 1 not in table and 2 in table
+    assert table.get(1999) is None and table.get(2000)["id"] == 2000
+    assert len(table) == 1000 and table.last_id == 2000
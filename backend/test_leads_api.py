@@ -0,0 +1,146 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from lead_export import gzip_chunks
+from response_cache import VersionedResponseCache
+from storage import LEAD_FIELDS, SQLiteLeadStore
+
+NAMES = ["Cy", "Ada", "Bob", "Dee", "Eve"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = SQLiteLeadStore(db_path=str(tmp_path / "crm.db"), leads_path=str(tmp_path / "leads.json"),
+                            workflows_path=str(tmp_path / "workflow.json"),
+                            journal_path=str(tmp_path / "leads.journal"),
+                            snapshot_path=str(tmp_path / "leads.snapshot"))
+
+    async def load():
+        await store.load()
+        await store.create_leads([{"name": name, "email": f"{name.lower()}@example.com", "phone": "555-0100",
+                                   "status": "Contacted" if i % 2 else "New", "source": "Manual",
+                                   "created_at": f"2024-01-0{i + 1}T09:00:00"}
+                                  for i, name in enumerate(NAMES)])
+
+    asyncio.run(load())
+    monkeypatch.setattr(main, "lead_store", store)
+    main.response_cache.bump()
+    yield TestClient(main.app)
+    asyncio.run(store.close())
+
+
+def _pages(client, url):
+    names = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        names += [lead["name"] for lead in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor:
+            assert f"cursor={cursor}" in response.headers["Link"]
+        url = f"/leads?sort=-name&limit=2&cursor={cursor}" if cursor else None
+    return names
+
+
+def test_cursor_pages_cover_every_lead_once_in_sort_order(client):
+    assert _pages(client, "/leads?sort=-name&limit=2") == ["Eve", "Dee", "Cy", "Bob", "Ada"]
+
+
+def test_filters_are_applied_before_paging(client):
+    response = client.get("/leads", params={"status": "Contacted", "sort": "created_at"})
+    assert [lead["name"] for lead in response.json()] == ["Ada", "Dee"]
+    assert "X-Next-Cursor" not in response.headers
+    response = client.get("/leads", params={"q": "EVE"})
+    assert [lead["name"] for lead in response.json()] == ["Eve"]
+
+
+@pytest.mark.parametrize("params", [
+    {"cursor": "not-a-cursor"},
+    {"sort": "phone"},
+])
+def test_bad_sort_or_cursor_is_a_client_error(client, params):
+    assert client.get("/leads", params=params).status_code == 400
+
+
+def test_cursor_from_another_sort_order_is_rejected(client):
+    cursor = client.get("/leads", params={"sort": "name", "limit": 2}).headers["X-Next-Cursor"]
+    response = client.get("/leads", params={"sort": "email", "limit": 2, "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_ndjson_export_streams_matching_leads(client):
+    response = client.get("/leads/export", params={"status": "New"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    leads = [json.loads(line) for line in response.text.splitlines()]
+    assert [lead["name"] for lead in leads] == ["Cy", "Bob", "Eve"]
+
+
+def test_csv_export_has_header_and_one_row_per_lead(client):
+    response = client.get("/leads/export", params={"format": "csv"})
+    assert 'filename="leads.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == list(LEAD_FIELDS)
+    assert [row["name"] for row in rows] == NAMES
+
+
+def test_gzip_export_matches_the_plain_export(client):
+    plain = client.get("/leads/export", params={"format": "csv"}).content
+    response = client.get("/leads/export", params={"format": "csv", "gzip": True})
+    # The test client decodes Content-Encoding transparently
+    assert response.headers["content-encoding"] == "gzip" and response.content == plain
+
+
+def test_gzip_chunks_form_one_gzip_member():
+    async def chunks():
+        for part in (b"a" * 1000, b"", b"b" * 1000):
+            yield part
+
+    async def run():
+        return b"".join([chunk async for chunk in gzip_chunks(chunks())])
+
+    assert gzip.decompress(asyncio.run(run())) == b"a" * 1000 + b"b" * 1000
+
+
+def test_unknown_export_format_is_rejected(client):
+    assert client.get("/leads/export", params={"format": "xml"}).status_code == 400
+
+
+def test_unchanged_listing_is_revalidated_with_304(client):
+    first = client.get("/leads", params={"limit": 2})
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    for if_none_match in (etag, f'"other", W/{etag}', "*"):
+        response = client.get("/leads", params={"limit": 2}, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304 and response.content == b""
+        # The next-page cursor still reaches clients that revalidate
+        assert response.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+
+def test_mutation_changes_the_etag(client):
+    etag = client.get("/leads").headers["ETag"]
+    assert client.put("/leads/1/status", json={"status": "Contacted"}).status_code == 200
+    response = client.get("/leads", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert response.json()[0]["status"] == "Contacted"
+
+
+def test_response_built_during_a_mutation_is_not_cached():
+    cache = VersionedResponseCache()
+
+    async def build():
+        cache.bump()
+        return [1], {}
+
+    async def run():
+        stale = await cache.get_or_build("leads", build)
+        return stale, cache.entries
+
+    stale, entries = asyncio.run(run())
+    assert stale.body == b"[1]" and "leads" not in entries
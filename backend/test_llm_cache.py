@@ -0,0 +1,75 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import llm_cache as llm_cache_module
+import main
+from llm_cache import LLMResponseCache
+
+LEAD = {"id": 1, "name": "Ada Lovelace", "email": "ada@example.com", "phone": "555-0100", "status": "New",
+        "source": "Manual", "created_at": "2024-01-01T09:00:00"}
+
+
+def test_reworded_question_hits_but_changed_lead_misses():
+    cache = LLMResponseCache(max_entries=8, ttl=60)
+    cache.put(cache.make_key("llama2", "What next?", LEAD), 1, "Call her")
+    assert cache.get(cache.make_key("llama2", "  what   NEXT ", LEAD)) == "Call her"
+    assert cache.get(cache.make_key("llama2", "What next?", {**LEAD, "status": "Contacted"})) is None
+    assert cache.get(cache.make_key("mistral", "What next?", LEAD)) is None
+    # Fields outside the prompt do not matter
+    assert cache.get(cache.make_key("llama2", "What next?", {**LEAD, "created_at": "2025-01-01"})) == "Call her"
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache_module.time, "monotonic", lambda: now[0])
+    cache = LLMResponseCache(max_entries=2, ttl=10)
+    for key in ("a", "b"):
+        cache.put(key, 1, key.upper())
+    cache.get("a")
+    cache.put("c", 2, "C")
+    assert cache.get("b") is None and cache.get("a") == "A"
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.stats()["evicted"] == 1 and cache.stats()["expired"] == 1
+
+
+def test_invalidate_lead_drops_only_that_leads_replies():
+    cache = LLMResponseCache(max_entries=8, ttl=60)
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    cache.put("c", 2, "C")
+    cache.invalidate_lead(1)
+    assert cache.get("a") is None and cache.get("b") is None and cache.get("c") == "C"
+    assert cache.lead_keys == {2: {"c"}}
+
+
+@pytest.mark.parametrize("max_entries, ttl", [(0, 60), (8, 0)])
+def test_disabled_cache_stores_nothing(max_entries, ttl):
+    cache = LLMResponseCache(max_entries=max_entries, ttl=ttl)
+    cache.put("a", 1, "A")
+    assert cache.get("a") is None
+
+
+class StubStore:
+    async def get_lead(self, lead_id):
+        return dict(LEAD) if lead_id == LEAD["id"] else None
+
+
+def test_repeated_interaction_is_answered_from_the_cache(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"response": "Send the proposal"})
+
+    monkeypatch.setattr(main, "lead_store", StubStore())
+    monkeypatch.setattr(main.llm_client, "client", httpx.AsyncClient(transport=httpx.MockTransport(handler),
+                                                                     base_url="http://ollama"))
+    main.llm_cache.invalidate_lead(LEAD["id"])
+    client = TestClient(main.app)
+    first = client.post("/interact", json={"id": 1, "prompt": "What should I do next?"}).json()
+    second = client.post("/interact", json={"id": 1, "prompt": "what should i do next"}).json()
+    assert first["reply"] == second["reply"] == "Send the proposal"
+    assert not first.get("cached") and second["cached"] is True
+    assert len(calls) == 1
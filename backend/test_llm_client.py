@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from llm_client import NO_LLM_REPLY, LLMClient
+
+
+def _client(handler):
+    client = LLMClient(base_url="http://ollama/", model="test-model")
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url=client.base_url)
+    return client
+
+
+def test_one_pooled_client_is_kept_across_starts():
+    async def run():
+        client = LLMClient(base_url="http://ollama/")
+        await client.start()
+        pooled = client.client
+        await client.start()
+        same = client.client is pooled
+        await client.close()
+        return client, same
+
+    client, same = asyncio.run(run())
+    assert same and client.client is None and client.base_url == "http://ollama"
+    assert client.timeout.connect < client.timeout.read
+
+
+def test_generate_posts_one_non_streaming_request_per_call():
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": f"reply {len(payloads)}"})
+
+    async def run():
+        client = _client(handler)
+        replies = await asyncio.gather(*(client.generate(f"prompt {i}", temperature=0) for i in range(3)))
+        return client, replies
+
+    client, replies = asyncio.run(run())
+    assert sorted(replies) == ["reply 1", "reply 2", "reply 3"]
+    assert all(payload["model"] == "test-model" and payload["stream"] is False and payload["temperature"] == 0
+               for payload in payloads)
+    assert client.stats()["requests"] == 3 and client.stats()["in_flight"] == 0
+
+
+def test_empty_reply_and_http_errors():
+    async def run():
+        empty = await _client(lambda request: httpx.Response(200, json={})).generate("hi")
+        failing = _client(lambda request: httpx.Response(500, json={"error": "boom"}))
+        with pytest.raises(httpx.HTTPStatusError):
+            await failing.generate("hi")
+        return empty, failing.stats()
+
+    empty, stats = asyncio.run(run())
+    assert empty == NO_LLM_REPLY
+    assert stats["failures"] == 1 and stats["in_flight"] == 0
+
+
+def test_client_must_be_started():
+    with pytest.raises(RuntimeError):
+        asyncio.run(LLMClient().generate("hi"))
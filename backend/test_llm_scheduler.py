@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from llm_scheduler import LLMOverloaded, LLMScheduler
+
+
+class GatedClient:
+    """Stands in for LLMClient; every generation waits until `release` is set"""
+
+    model = "test-model"
+    mean_seconds = None
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.prompts = []
+        self.running = 0
+        self.peak = 0
+
+    async def generate(self, prompt, model=None):
+        self.prompts.append(prompt)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+        finally:
+            self.running -= 1
+        return f"reply to {prompt}"
+
+
+def test_concurrency_is_capped_and_identical_prompts_share_a_generation():
+    async def run():
+        client = GatedClient()
+        scheduler = LLMScheduler(client, max_concurrency=2, max_queue=10, max_wait=5)
+        prompts = ["same", "same", "same", "a", "b", "c"]
+        tasks = [asyncio.create_task(scheduler.generate(prompt)) for prompt in prompts]
+        await asyncio.sleep(0.05)
+        stats = scheduler.stats()
+        client.release.set()
+        return await asyncio.gather(*tasks), client, stats, scheduler.stats()
+
+    replies, client, during, after = asyncio.run(run())
+    assert replies == [f"reply to {prompt}" for prompt in ["same", "same", "same", "a", "b", "c"]]
+    assert sorted(client.prompts) == ["a", "b", "c", "same"] and client.peak == 2
+    assert during["active"] == 2 and during["waiting"] == 2 and during["coalesced"] == 2
+    assert after["active"] == 0 and after["waiting"] == 0
+
+
+def test_full_queue_and_long_waits_fail_fast_with_retry_after():
+    async def run():
+        client = GatedClient()
+        scheduler = LLMScheduler(client, max_concurrency=1, max_queue=1, max_wait=0.1, retry_after=7)
+        running = asyncio.create_task(scheduler.generate("first"))
+        queued = asyncio.create_task(scheduler.generate("second"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(LLMOverloaded) as full:
+            await scheduler.generate("third")
+        with pytest.raises(LLMOverloaded):
+            await queued
+        client.release.set()
+        await running
+        return full.value, scheduler.stats()
+
+    full, stats = asyncio.run(run())
+    assert full.retry_after == 7
+    assert stats["rejected"] == 1 and stats["timed_out"] == 1 and stats["waiting"] == 0 and stats["active"] == 0
+
+
+def test_groups_are_served_in_turn():
+    async def run():
+        client = GatedClient()
+        client.release.set()
+        scheduler = LLMScheduler(client, max_concurrency=1, max_queue=10, max_wait=5)
+        await scheduler.acquire("busy")
+        tasks = [asyncio.create_task(scheduler.generate(f"busy {i}", group="busy")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(scheduler.generate("quiet 0", group="quiet")))
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return client.prompts
+
+    assert asyncio.run(run()) == ["busy 0", "quiet 0", "busy 1", "busy 2"]
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def run():
+        client = GatedClient()
+        scheduler = LLMScheduler(client, max_concurrency=1, max_queue=10, max_wait=5)
+        running = asyncio.create_task(scheduler.generate("first"))
+        waiting = asyncio.create_task(scheduler.generate("second"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.sleep(0.01)
+        stats = scheduler.stats()
+        client.release.set()
+        await running
+        return stats, scheduler.stats()
+
+    during, after = asyncio.run(run())
+    assert during["waiting"] == 0 and after["active"] == 0
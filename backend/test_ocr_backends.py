@@ -0,0 +1,20 @@
+import ocr_backends
+from ocr_backends import backend_available, lazy_module
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    module = lazy_module("colorsys")
+    assert "not loaded" in repr(module)
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "loaded" in repr(module) and "not loaded" not in repr(module)
+
+
+def test_tesseract_needs_pdf2image(monkeypatch):
+    monkeypatch.setattr(ocr_backends, "module_installed", lambda name: name != "pdf2image")
+    assert not backend_available("tesseract")
+    monkeypatch.setattr(ocr_backends, "module_installed", lambda name: True)
+    assert backend_available("tesseract")
+
+
+def test_unknown_backend_is_unavailable():
+    assert not backend_available("no-such-engine")
@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+import pytest
+
+from ocr_cache import OCRCache
+
+RESULT = {"text": "Ada Lovelace ada@example.com", "pages": 1}
+
+
+def test_key_depends_on_content_and_settings():
+    cache = OCRCache(directory="unused")
+    key = cache.make_key("a" * 64, {"max_pages": 5, "lang": "eng"})
+    assert key == cache.make_key("a" * 64, {"lang": "eng", "max_pages": 5})
+    assert key != cache.make_key("b" * 64, {"lang": "eng", "max_pages": 5})
+    assert key != cache.make_key("a" * 64, {"lang": "eng", "max_pages": 6})
+
+
+def test_results_survive_a_restart_through_the_disk_tier(tmp_path):
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        return RESULT
+
+    async def run():
+        first = OCRCache(directory=str(tmp_path), max_entries=8)
+        await first.get_or_compute("k" * 64, compute)
+        second = OCRCache(directory=str(tmp_path), max_entries=8)
+        result = await second.get_or_compute("k" * 64, compute)
+        again = await second.get_or_compute("k" * 64, compute)
+        return result, again, second.stats()
+
+    result, again, stats = asyncio.run(run())
+    assert result == again == RESULT and len(calls) == 1
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1 and stats["misses"] == 0
+
+
+def test_concurrent_requests_for_one_document_share_a_run(tmp_path):
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return RESULT
+
+    async def run():
+        cache = OCRCache(directory=str(tmp_path))
+        results = await asyncio.gather(*(cache.get_or_compute("k" * 64, compute) for _ in range(5)))
+        return results, cache.stats()
+
+    results, stats = asyncio.run(run())
+    assert len(calls) == 1 and all(result == RESULT for result in results)
+    assert stats["shared_inflight"] == 4
+
+
+@pytest.mark.parametrize("result", [{"error": "unreadable"}, {"text": "x", "fallback": True}])
+def test_errors_and_fallback_results_are_not_cached(tmp_path, result):
+    async def run():
+        cache = OCRCache(directory=str(tmp_path))
+        await cache.get_or_compute("k" * 64, lambda: asyncio.sleep(0, result))
+        return await cache.get("k" * 64)
+
+    assert asyncio.run(run()) is None
+
+
+def test_disk_tier_evicts_least_recently_used_entries(tmp_path):
+    entry_size = len(b'{"text": "' + b"x" * 100 + b'"}')
+
+    async def run():
+        cache = OCRCache(directory=str(tmp_path), max_entries=0, max_disk_bytes=2 * entry_size)
+        for key in ("a", "b"):
+            await cache.put(key * 64, {"text": "x" * 100})
+        await cache.get("a" * 64)
+        await cache.put("c" * 64, {"text": "x" * 100})
+        return [await cache.get(key * 64) is not None for key in "abc"], cache.disk_bytes
+
+    present, disk_bytes = asyncio.run(run())
+    assert present == [True, False, True] and disk_bytes == 2 * entry_size
+    assert not os.path.exists(tmp_path / "bb" / f"{'b' * 64}.json")
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ocr_pool import OCRPool, OCRPoolFull, OCRPoolUnavailable
+
+
+def _pool(workers=1, max_pending=2):
+    # Threads stand in for worker processes; the pool only sees an executor
+    pool = OCRPool(workers=workers, max_pending=max_pending)
+    pool.executor = ThreadPoolExecutor(max_workers=workers)
+    return pool
+
+
+def test_pool_that_is_not_running_is_unavailable():
+    with pytest.raises(OCRPoolUnavailable):
+        asyncio.run(OCRPool(workers=1).run(len, "abc"))
+
+
+def test_jobs_beyond_max_pending_are_rejected_but_waiting_jobs_queue():
+    pool = _pool()
+    release = threading.Event()
+
+    async def run():
+        blocked = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(OCRPoolFull):
+            await pool.run(len, "abc")
+        queued = asyncio.create_task(pool.run(len, "abcd", wait=True))
+        await asyncio.sleep(0.05)
+        stats = pool.stats()
+        release.set()
+        return stats, await queued, await asyncio.gather(*blocked)
+
+    stats, queued, blocked = asyncio.run(run())
+    pool.executor.shutdown()
+    assert stats["pending"] == 3 and stats["rejected"] == 1
+    assert queued == 4 and blocked == [True, True]
+    assert pool.stats()["completed"] == 3 and pool.stats()["pending"] == 0
+
+
+def test_waiting_jobs_share_the_slots_above_the_worker_count():
+    pool = _pool(workers=1, max_pending=3)
+    release = threading.Event()
+
+    async def run():
+        jobs = [asyncio.create_task(pool.run(release.wait, wait=True)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        stats = pool.stats()
+        release.set()
+        await asyncio.gather(*jobs)
+        return stats
+
+    stats = asyncio.run(run())
+    pool.executor.shutdown()
+    # Two shared slots: two jobs submitted, two waiting for a slot
+    assert stats["pending"] == 2 and stats["waiting"] == 2 and stats["rejected"] == 0
+
+
+def test_failing_job_is_counted_and_reraised():
+    pool = _pool()
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(int, "not a number"))
+    pool.executor.shutdown()
+    assert pool.stats()["failed"] == 1 and pool.stats()["pending"] == 0
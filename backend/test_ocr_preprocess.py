@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+from PIL import Image
+
+from ocr_preprocess import PREPROCESS_SETTINGS, estimate_skew, preprocess_for_ocr
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SETTINGS = dict(PREPROCESS_SETTINGS, stages=["resize", "grayscale", "binarize", "deskew"])
+
+
+@pytest.mark.parametrize("filename", ["sample1.png", "resume_optimized.png"])
+def test_straight_sample_is_not_rotated(filename):
+    timings = {}
+    preprocess_for_ocr(Image.open(os.path.join(HERE, filename)), SETTINGS, timings)
+    assert timings["skew_degrees"] == 0
+
+
+@pytest.mark.parametrize("skew", [-7.0, 3.0])
+def test_rotated_sample_is_straightened(skew):
+    binary = preprocess_for_ocr(Image.open(os.path.join(HERE, "sample1.png")),
+                                dict(SETTINGS, stages=["resize", "grayscale", "binarize"]))
+    height, width = binary.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), skew, 1.0)
+    rotated = cv2.warpAffine(binary, matrix, (width, height), borderValue=255)
+    assert estimate_skew(rotated) == pytest.approx(-skew, abs=0.2)
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import pytest
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from document_ocr import ocr_document
+from olm_ocr import (
+    OLMOCRBatcher, OLMOCRDeadlineExceeded, OLMOCROverloaded, OLMOCRUnavailable, StandInVisionModel
+)
+
+
+class RecordingModel(StandInVisionModel):
+    """Stand-in model that records the size of every batch it is given"""
+
+    def __init__(self, batch_seconds: float = 0.05):
+        super().__init__(batch_seconds=batch_seconds, image_seconds=0)
+        self.batch_sizes = []
+
+    def generate(self, images, prompt, max_new_tokens, max_time):
+        self.batch_sizes.append(len(images))
+        return super().generate(images, prompt, max_new_tokens, max_time)
+
+
+class FakePool:
+    """Stands in for OCRPool; answers every job like tesseract_ocr would"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def run(self, func, *args, wait=False):
+        self.calls.append(func.__name__)
+        return {"name": "Tesseract Lead", "email": None, "phone": None, "raw_text": "", "confidence": 0.3,
+                "source": "Document"}
+
+
+def _image(text):
+    image = Image.new("RGB", (32, 32), "white")
+    image.info["text"] = text
+    return image
+
+
+async def _started(batcher):
+    batcher.start()
+    await batcher.loader
+    assert batcher.ready
+    return batcher
+
+
+def test_concurrent_images_are_batched_up_to_max_batch():
+    async def run():
+        model = RecordingModel()
+        batcher = await _started(OLMOCRBatcher(model, max_batch=4, max_wait=0.05))
+        texts = await asyncio.gather(*(batcher.transcribe([_image(f"page {i}")]) for i in range(10)))
+        stats = batcher.stats()
+        await batcher.stop()
+        return texts, model.batch_sizes, stats
+
+    texts, batch_sizes, stats = asyncio.run(run())
+    assert texts == [[f"page {i}"] for i in range(10)]
+    assert batch_sizes == [4, 4, 2]
+    assert stats["batches"] == 3 and stats["images"] == 10
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    async def run():
+        model = RecordingModel(batch_seconds=0)
+        batcher = await _started(OLMOCRBatcher(model, max_batch=8, max_wait=0.1))
+        started = time.monotonic()
+        texts = await batcher.transcribe([_image("only page")])
+        elapsed = time.monotonic() - started
+        await batcher.stop()
+        return texts, model.batch_sizes, elapsed
+
+    texts, batch_sizes, elapsed = asyncio.run(run())
+    assert texts == ["only page"] and batch_sizes == [1]
+    assert 0.09 <= elapsed < 1
+
+
+def test_image_past_its_deadline_is_not_waited_for():
+    async def run():
+        batcher = await _started(OLMOCRBatcher(RecordingModel(batch_seconds=0.5), max_batch=1, max_wait=0))
+        busy = asyncio.ensure_future(batcher.transcribe([_image("first")]))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(OLMOCRDeadlineExceeded):
+            await batcher.transcribe([_image("late")], deadline=time.monotonic() + 0.1)
+        elapsed = time.monotonic() - started
+        first = await busy
+        await batcher.stop()
+        return first, elapsed
+
+    first, elapsed = asyncio.run(run())
+    assert first == ["first"] and elapsed < 0.4
+
+
+def test_unloaded_or_full_batcher_fails_fast():
+    async def run():
+        batcher = OLMOCRBatcher(RecordingModel(), max_batch=2, max_queue=2)
+        with pytest.raises(OLMOCRUnavailable):
+            await batcher.transcribe([_image("x")])
+        await _started(batcher)
+        with pytest.raises(OLMOCROverloaded):
+            await batcher.transcribe([_image("x")] * 3)
+        overloaded = batcher.stats()["overloaded"]
+        await batcher.stop()
+        return overloaded
+
+    assert asyncio.run(run()) == 1
+
+
+def test_document_uses_olm_and_falls_back_to_tesseract_when_overloaded(tmp_path):
+    info = PngInfo()
+    info.add_text("text", "Jane Doe\njane@example.com")
+    path = tmp_path / "card.png"
+    Image.new("RGB", (64, 64), "white").save(path, pnginfo=info)
+
+    async def run():
+        pool = FakePool()
+        batcher = await _started(OLMOCRBatcher(RecordingModel(batch_seconds=0), max_batch=4, max_wait=0))
+        read = await ocr_document(pool, str(path), "card.png", vision=batcher)
+        # An image the queue cannot take goes to Tesseract instead
+        batcher.max_queue = 0
+        fallback = await ocr_document(pool, str(path), "card.png", vision=batcher)
+        await batcher.stop()
+        return read, fallback, pool.calls
+
+    read, fallback, calls = asyncio.run(run())
+    assert read["engine"] == "olm" and read["email"] == "jane@example.com" and "fallback" not in read
+    assert fallback["fallback"] is True and fallback["name"] == "Tesseract Lead"
+    assert "Tesseract fallback" in fallback["extraction_notes"]
+    assert calls == ["tesseract_ocr"]
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+import persistence
+from persistence import PersistenceScheduler, atomic_write
+
+
+def test_mutations_in_one_window_are_written_once():
+    async def run():
+        writes = []
+        scheduler = PersistenceScheduler(window=0.05)
+
+        async def write():
+            writes.append(len(writes))
+
+        scheduler.register("leads", write)
+        for _ in range(100):
+            scheduler.mark_dirty("leads")
+        await asyncio.sleep(0.15)
+        scheduler.mark_dirty("leads")
+        await scheduler.close()
+        return writes, scheduler.stats()
+
+    writes, stats = asyncio.run(run())
+    assert writes == [0, 1]
+    assert stats["write_requests"] == 101 and stats["writes"] == 2 and stats["dirty"] == []
+
+
+def test_failed_write_stays_dirty_until_a_later_flush():
+    async def run():
+        attempts = []
+        scheduler = PersistenceScheduler(window=10)
+
+        async def write():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise OSError("disk full")
+
+        scheduler.register("leads", write)
+        scheduler.mark_dirty("leads")
+        with pytest.raises(OSError):
+            await scheduler.flush()
+        dirty = list(scheduler.dirty)
+        await scheduler.close()
+        return attempts, dirty, scheduler.dirty
+
+    attempts, dirty_after_failure, dirty_after_close = asyncio.run(run())
+    assert len(attempts) == 2 and dirty_after_failure == ["leads"] and not dirty_after_close
+
+
+def test_atomic_write_replaces_content_and_keeps_the_file_mode(tmp_path):
+    path = tmp_path / "leads.snapshot"
+    path.write_bytes(b"old")
+    os.chmod(path, 0o640)
+    asyncio.run(atomic_write(str(path), [b"new ", memoryview(b"content")]))
+    assert path.read_bytes() == b"new content"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(tmp_path) == ["leads.snapshot"]
+
+
+def test_failed_atomic_write_leaves_the_old_file_and_no_temp_file(tmp_path, monkeypatch):
+    path = tmp_path / "workflow.json"
+    path.write_bytes(b"old")
+
+    def failing_replace(source, target):
+        raise OSError("rename failed")
+
+    monkeypatch.setattr(persistence.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        asyncio.run(atomic_write(str(path), b"new"))
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["workflow.json"]
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from lead_table import LeadTable
+from snapshot import load_snapshot, snapshot_chunks
+from storage import JsonLeadStore
+
+
+def _lead(lead_id, **fields):
+    return {"id": lead_id, "name": f"Lead {lead_id}", "email": f"lead{lead_id}@example.com", "phone": "555-0100",
+            "status": "New", "source": "Manual", "created_at": "2024-01-01T09:00:00", **fields}
+
+
+def _store(tmp_path):
+    return JsonLeadStore(leads_path=str(tmp_path / "leads.json"), workflows_path=str(tmp_path / "workflow.json"),
+                         journal_path=str(tmp_path / "leads.journal"), snapshot_path=str(tmp_path / "leads.snapshot"))
+
+
+def _write(path, table, next_id):
+    with open(path, "wb") as file:
+        for chunk in snapshot_chunks(table, next_id):
+            file.write(chunk)
+
+
+def test_snapshot_round_trip_keeps_tombstones_extras_and_text(tmp_path):
+    table = LeadTable([_lead(1, name="Zoë"), _lead(2, status="Contacted", source="Import"), _lead(3, notes="VIP")])
+    table.remove(2)
+    table.update(1, {"phone": None})
+    _write(tmp_path / "leads.snapshot", table, 7)
+
+    loaded, next_id = load_snapshot(str(tmp_path / "leads.snapshot"))
+    assert next_id == 7 and len(loaded) == 2
+    assert list(loaded.values()) == list(table.values())
+    assert loaded.get(3)["notes"] == "VIP" and loaded.get(1)["name"] == "Zoë"
+    assert loaded.counts_by("status") == {"New": 2} and loaded.count_for("source", "Import") == 0
+    # Text is served from the mapped file, not copied onto the heap
+    assert loaded.base_len > 0 and len(loaded.arena) == 0
+    loaded.add(_lead(7))
+    assert loaded.get(7)["email"] == "lead7@example.com"
+
+
+@pytest.mark.parametrize("damage", ["truncate", "magic"])
+def test_damaged_snapshot_is_rejected(tmp_path, damage):
+    path = tmp_path / "leads.snapshot"
+    _write(path, LeadTable([_lead(1), _lead(2)]), 3)
+    data = path.read_bytes()
+    path.write_bytes(data[:-20] if damage == "truncate" else b"NOTLEADS" + data[8:])
+    with pytest.raises(ValueError):
+        load_snapshot(str(path))
+
+
+def test_legacy_json_is_converted_to_a_snapshot_once(tmp_path):
+    (tmp_path / "leads.json").write_text(json.dumps([_lead(1), _lead(2)]))
+
+    async def run():
+        store = _store(tmp_path)
+        await store.load()
+        await store.close()
+        # Later starts read the snapshot; leads.json is no longer consulted
+        os.remove(tmp_path / "leads.json")
+        reopened = _store(tmp_path)
+        await reopened.load()
+        leads = await reopened.list_leads()
+        needs_snapshot = reopened.needs_snapshot
+        await reopened.close()
+        return leads, needs_snapshot
+
+    leads, needs_snapshot = asyncio.run(run())
+    assert [lead["id"] for lead in leads] == [1, 2] and not needs_snapshot
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from storage import JsonLeadStore, SQLiteLeadStore, encode_cursor
+
+CREATED = [None, "2024-01-02T10:00:00", "not a date", "2024-01-01T09:00:00", None, "2024-01-02T10:00:00"]
+
+
+def _leads():
+    return [{"name": f"Lead {i}", "email": f"lead{i}@example.com", "phone": "555-0100",
+             "status": "New", "source": "Manual", "created_at": created}
+            for i, created in enumerate(CREATED)]
+
+
+async def _all_pages(store, sort, limit=2):
+    ids, cursor = [], None
+    while True:
+        page, cursor = await store.query_leads(sort=sort, limit=limit, cursor=cursor)
+        ids += [lead["id"] for lead in page]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort", ["created_at", "-created_at"])
+def test_json_created_at_cursor_round_trip_with_null_timestamps(tmp_path, sort):
+    async def run():
+        store = JsonLeadStore(leads_path=str(tmp_path / "leads.json"), workflows_path=str(tmp_path / "workflow.json"),
+                              journal_path=str(tmp_path / "leads.journal"),
+                              snapshot_path=str(tmp_path / "leads.snapshot"))
+        await store.load()
+        await store.create_leads(_leads())
+        ids = await _all_pages(store, sort)
+        await store.close()
+        return ids
+
+    ids = asyncio.run(run())
+    # Missing and unparsable timestamps sort first, ties by id
+    ascending = [1, 3, 5, 4, 2, 6]
+    assert ids == (ascending if sort == "created_at" else ascending[::-1])
+
+
+@pytest.mark.parametrize("sort", ["created_at", "-created_at", "name", "-email"])
+def test_sqlite_cursor_round_trip(tmp_path, sort):
+    async def run():
+        store = SQLiteLeadStore(db_path=str(tmp_path / "crm.db"), leads_path=str(tmp_path / "leads.json"),
+                                workflows_path=str(tmp_path / "workflow.json"),
+                                journal_path=str(tmp_path / "leads.journal"),
+                                snapshot_path=str(tmp_path / "leads.snapshot"))
+        await store.load()
+        await store.create_leads([{**lead, "created_at": lead["created_at"] or "2024-01-01T00:00:00"}
+                                  for lead in _leads()])
+        paged = await _all_pages(store, sort)
+        whole, _ = await store.query_leads(sort=sort, limit=100)
+        await store.close()
+        return paged, [lead["id"] for lead in whole]
+
+    paged, whole = asyncio.run(run())
+    assert paged == whole and sorted(paged) == [1, 2, 3, 4, 5, 6]
+
+
+def test_created_at_cursor_with_iso_value_is_rejected(tmp_path):
+    async def run():
+        store = JsonLeadStore(leads_path=str(tmp_path / "leads.json"), workflows_path=str(tmp_path / "workflow.json"),
+                              journal_path=str(tmp_path / "leads.journal"),
+                              snapshot_path=str(tmp_path / "leads.snapshot"))
+        await store.load()
+        await store.create_leads(_leads())
+        # The file backend pages created_at by its integer key, not by ISO strings
+        cursor = encode_cursor("created_at", {"id": 2, "created_at": "2024-01-02T10:00:00"})
+        try:
+            with pytest.raises(ValueError):
+                await store.query_leads(sort="created_at", limit=2, cursor=cursor)
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_count_by_status(tmp_path, backend):
+    async def run():
+        paths = dict(leads_path=str(tmp_path / "leads.json"), workflows_path=str(tmp_path / "workflow.json"),
+                     journal_path=str(tmp_path / "leads.journal"), snapshot_path=str(tmp_path / "leads.snapshot"))
+        store = SQLiteLeadStore(db_path=str(tmp_path / "crm.db"), **paths) if backend == "sqlite" else JsonLeadStore(**paths)
+        await store.load()
+        leads = await store.create_leads([{**lead, "created_at": "2024-01-01T00:00:00"} for lead in _leads()])
+        await store.update_lead(leads[0]["id"], {"status": "Contacted"})
+        await store.delete_lead(leads[1]["id"])
+        counts = await store.count_by_status(), await store.count_leads()
+        await store.close()
+        return counts
+
+    assert asyncio.run(run()) == ({"New": 4, "Contacted": 1}, 5)
+
+
+def _sqlite_store(tmp_path):
+    return SQLiteLeadStore(db_path=str(tmp_path / "crm.db"), leads_path=str(tmp_path / "leads.json"),
+                           workflows_path=str(tmp_path / "workflow.json"),
+                           journal_path=str(tmp_path / "leads.journal"),
+                           snapshot_path=str(tmp_path / "leads.snapshot"))
+
+
+def test_sqlite_does_not_reuse_deleted_ids(tmp_path):
+    async def run():
+        store = _sqlite_store(tmp_path)
+        await store.load()
+        leads = await store.create_leads([{**lead, "created_at": "2024-01-01T00:00:00"} for lead in _leads()[:3]])
+        await store.delete_lead(leads[-1]["id"])
+        batch = await store.create_leads([{**_leads()[0], "created_at": "2024-01-01T00:00:00"}])
+        await store.delete_lead(batch[0]["id"])
+        single = await store.create_lead({**_leads()[0], "created_at": "2024-01-01T00:00:00"})
+        stored = await store.get_lead(batch[0]["id"])
+        await store.close()
+        return [lead["id"] for lead in leads], batch, single, stored
+
+    ids, batch, single, stored = asyncio.run(run())
+    assert ids == [1, 2, 3]
+    assert batch[0]["id"] == 4 and batch[0]["name"] == "Lead 0" and batch[0]["status"] == "New"
+    assert single["id"] == 5 and stored is None
+
+
+def test_sqlite_rebuilds_tables_without_autoincrement(tmp_path):
+    import sqlite3
+
+    conn = sqlite3.connect(tmp_path / "crm.db")
+    conn.executescript("""
+        CREATE TABLE leads (id INTEGER PRIMARY KEY, name TEXT, email TEXT, phone TEXT, status TEXT NOT NULL,
+                            source TEXT NOT NULL, created_at TEXT NOT NULL);
+        INSERT INTO leads VALUES (1, 'Ada', 'ada@example.com', NULL, 'New', 'Manual', '2024-01-01T00:00:00');
+        INSERT INTO leads VALUES (7, 'Bob', 'bob@example.com', NULL, 'New', 'Manual', '2024-01-01T00:00:00');
+    """)
+    conn.close()
+
+    async def run():
+        store = _sqlite_store(tmp_path)
+        await store.load()
+        await store.delete_lead(7)
+        created = await store.create_lead({"name": "Cy", "status": "New", "source": "Manual",
+                                           "created_at": "2024-01-01T00:00:00"})
+        ada = await store.get_lead(1)
+        indexes = {row[0] for row in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        await store.close()
+        return created, ada, indexes
+
+    created, ada, indexes = asyncio.run(run())
+    assert created["id"] == 8
+    assert ada["email"] == "ada@example.com" and ada["suggestion"] is None
+    assert "idx_leads_status" in indexes
+
+
+def test_migration_keeps_ids_retired_by_the_file_backend(tmp_path):
+    async def run():
+        source = JsonLeadStore(leads_path=str(tmp_path / "leads.json"), workflows_path=str(tmp_path / "workflow.json"),
+                               journal_path=str(tmp_path / "leads.journal"),
+                               snapshot_path=str(tmp_path / "leads.snapshot"))
+        await source.load()
+        leads = await source.create_leads([{**lead, "created_at": "2024-01-01T00:00:00"} for lead in _leads()[:3]])
+        await source.delete_lead(leads[-1]["id"])
+        await source.close()
+        store = _sqlite_store(tmp_path)
+        await store.load()
+        created = await store.create_lead({**_leads()[0], "created_at": "2024-01-01T00:00:00"})
+        count = await store.count_leads()
+        await store.close()
+        return created, count
+
+    created, count = asyncio.run(run())
+    assert created["id"] == 4 and count == 3
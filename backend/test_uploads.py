@@ -0,0 +1,56 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+
+import utils
+from utils import UploadTooLarge, save_uploaded_file, spool_to_file
+
+
+class FakeUpload:
+    """The parts of UploadFile that save_uploaded_file uses"""
+
+    def __init__(self, data, filename="scan.png", size=None):
+        self.file = io.BytesIO(data)
+        self.filename = filename
+        self.size = size
+
+    async def seek(self, offset):
+        self.file.seek(offset)
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(utils, "UPLOAD_CHUNK_SIZE", 1024)
+    return tmp_path / "uploads"
+
+
+def test_spooled_file_keeps_content_extension_and_digest(upload_dir):
+    data = os.urandom(5000)
+    path, digest = spool_to_file(io.BytesIO(data), "Scan.PNG")
+    assert path.startswith(str(upload_dir)) and path.endswith(".png")
+    assert open(path, "rb").read() == data
+    assert digest == hashlib.sha256(data).hexdigest()
+
+
+def test_oversized_stream_is_cut_off_and_removed(upload_dir):
+    with pytest.raises(UploadTooLarge):
+        spool_to_file(io.BytesIO(b"x" * 5000), "scan.png", max_bytes=4096)
+    assert os.listdir(upload_dir) == []
+
+
+def test_declared_size_is_rejected_before_reading(upload_dir):
+    upload = FakeUpload(b"x" * 10, size=10_000)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_uploaded_file(upload, max_bytes=4096))
+    assert upload.file.tell() == 0 and not upload_dir.exists()
+
+
+def test_upload_is_spooled_from_the_start(upload_dir):
+    upload = FakeUpload(b"header" + b"x" * 3000)
+    upload.file.seek(100)
+    path, _ = asyncio.run(save_uploaded_file(upload, max_bytes=4096))
+    assert open(path, "rb").read() == b"header" + b"x" * 3000
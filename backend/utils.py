@@ -1,29 +1,33 @@
+from __future__ import annotations
+
 import re
+import asyncio
 import logging
 import aiofiles
 import os
-import signal
 import time
-from typing import Dict, Optional, Tuple
+import hashlib
+import tempfile
+from typing import IO, Dict, Optional, Tuple, Union
 from PIL import Image
 import io
-import cv2
-import numpy as np
 import base64
 import urllib.request
 from io import BytesIO
-from functools import wraps
-import pytesseract
+from ocr_backends import OCR_BACKENDS, backend_available, lazy_module, module_installed
+from ocr_preprocess import PREPROCESS_SETTINGS, load_for_ocr, preprocess_for_ocr
+from contact_extraction import best, candidates_as_dicts, extract_contacts
+
+# Heavy OCR/ML modules are imported on first use, not when the API starts
+cv2 = lazy_module("cv2")
+np = lazy_module("numpy")
+pytesseract = lazy_module("pytesseract")
 
-# OLM OCR Libraries
-try:
-    from transformers import AutoProcessor, Qwen2VLForConditionalGeneration
-    import torch
-    from pdf2image import convert_from_bytes
-    OLM_OCR_AVAILABLE = True
-except ImportError as e:
-    OLM_OCR_AVAILABLE = False
-    logging.warning(f"OLM OCR libraries not available: {e}")
+# OLM OCR Libraries, checked without importing them
+OLM_OCR_AVAILABLE = backend_available("olm")
+if not OLM_OCR_AVAILABLE:
+    logging.warning(f"OLM OCR libraries not available: missing "
+                    f"{', '.join(module for module in OCR_BACKENDS['olm'].modules if not module_installed(module))}")
     logging.warning("Install OLM OCR libraries: pip install transformers torch pdf2image opencv-python accelerate")
 
 logger = logging.getLogger(__name__)
@@ -31,65 +35,60 @@ logger = logging.getLogger(__name__)
 # Email validation regex pattern
 EMAIL_PATTERN = r'[\w\.-]+@[\w\.-]+\.\w+'
 
-def timeout_handler(signum, frame):
-    """Handle timeout signal"""
-    raise TimeoutError("Processing timed out")
-
-def timeout(seconds):
-    """Decorator to add timeout to functions"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            if os.name == 'nt':  # Windows
-                # Windows doesn't support signal.alarm, so we'll use a different approach
-                return func(*args, **kwargs)
-            else:
-                # Set up timeout handler
-                old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(seconds)
-                try:
-                    result = func(*args, **kwargs)
-                finally:
-                    signal.alarm(0)
-                    signal.signal(signal.SIGALRM, old_handler)
-                return result
-        return wrapper
-    return decorator
-
 def validate_email(email: str) -> bool:
     """Validate email format using regex"""
     return bool(re.match(EMAIL_PATTERN, email))
 
 def extract_email_from_text(text: str):
-    match = re.search(r'[\w\.-]+@[\w\.-]+', text)
-    return match.group(0) if match else None
+    return best(extract_contacts(text)["emails"])
 
 def extract_name_from_text(text: str):
-    lines = text.splitlines()
-    for line in lines:
-        if "name" in line.lower():
-            return line.split(":")[-1].strip()
-    for line in lines:
-        if line.strip():
-            return line.strip()
-    return None
+    return best(extract_contacts(text)["names"])
 
 def extract_phone_from_text(text: str):
-    match = re.search(r'(\+?\d{1,3}[-.\s]?)?(\(?\d{3}\)?[-.\s]?)?\d{3}[-.\s]?\d{4}', text)
-    return match.group(0) if match else None
+    return best(extract_contacts(text)["phones"])
 
-async def save_uploaded_file(file_content: bytes, filename: str) -> str:
-    """Save uploaded file temporarily and return file path"""
-    # Create uploads directory if it doesn't exist
-    upload_dir = "uploads"
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
-    
-    file_path = os.path.join(upload_dir, filename)
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(file_content)
-    
-    return file_path
+# Uploads are streamed to uniquely named files here, never held in memory whole
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", "25")) * 1024 * 1024)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class UploadTooLarge(ValueError):
+    """An upload exceeded the configured size cap"""
+
+def spool_to_file(source: IO[bytes], filename: str, max_bytes: int = UPLOAD_MAX_BYTES) -> Tuple[str, str]:
+    """
+    Copy a file object in fixed-size chunks to a uniquely named file in
+    UPLOAD_DIR, hashing it on the way. Returns (path, sha256 hex digest).
+    Raises UploadTooLarge (and removes the partial file) past `max_bytes`.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    suffix = os.path.splitext(filename)[1].lower()
+    fd, path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix="upload-", suffix=suffix)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"{filename} is larger than {max_bytes / (1024 * 1024):g} MB")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+async def save_uploaded_file(upload, max_bytes: int = UPLOAD_MAX_BYTES) -> Tuple[str, str]:
+    """Spool a FastAPI UploadFile to disk; returns (path, sha256 hex digest)"""
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(f"{upload.filename} is larger than {max_bytes / (1024 * 1024):g} MB")
+    await upload.seek(0)
+    return await asyncio.to_thread(spool_to_file, upload.file, upload.filename, max_bytes)
 
 async def cleanup_temp_file(file_path: str):
     """Clean up temporary uploaded file"""
@@ -145,34 +144,6 @@ def build_simple_prompt() -> str:
 
 Format: Name: [name], Email: [email], Phone: [phone]"""
 
-def safe_generate_with_timeout(model, inputs, processor, max_timeout=15):
-    """Safely generate text with aggressive timeout protection"""
-    start_time = time.time()
-    
-    try:
-        # Generate output with aggressive timeout protection
-        with torch.no_grad():
-            output = model.generate(
-                **inputs,
-                max_new_tokens=32,  # Very reduced for speed
-                num_return_sequences=1,
-                do_sample=False,
-                pad_token_id=processor.tokenizer.eos_token_id,
-                use_cache=True,
-                repetition_penalty=1.0,
-                # Remove all sampling parameters to avoid warnings
-            )
-        
-        # Check if we're taking too long
-        if time.time() - start_time > max_timeout:
-            raise TimeoutError(f"Generation took longer than {max_timeout} seconds")
-        
-        return output
-        
-    except Exception as e:
-        logger.error(f"Generation failed: {e}")
-        raise
-
 def simple_fallback_extraction(file_content: bytes, filename: str) -> Dict[str, str]:
     """
     Simple fallback extraction when OLM OCR fails
@@ -269,35 +240,73 @@ def generate_unique_id() -> int:
     import time
     return int(time.time() * 1000) 
 
-def tesseract_ocr(file_content: bytes, filename: str) -> dict:
+def build_ocr_result(text: str, extraction_notes: Optional[str] = None, contacts: Optional[dict] = None) -> dict:
+    """
+    Lead fields extracted from OCR text, in the shape returned by tesseract_ocr.
+    Pass `contacts` (from extract_contacts) when the text was already scanned.
+    """
+    contacts = contacts if contacts is not None else extract_contacts(text)
+    fields = [contacts["names"], contacts["emails"], contacts["phones"]]
+    result = {
+        "name": best(contacts["names"]),
+        "email": best(contacts["emails"]),
+        "phone": best(contacts["phones"]),
+        "raw_text": text,
+        # Mean confidence of the chosen name, email and phone (0 when missing)
+        "confidence": round(sum(candidates[0].confidence if candidates else 0.0 for candidates in fields) / 3, 2),
+        "candidates": candidates_as_dicts(contacts),
+        "source": "Document"
+    }
+    if extraction_notes:
+        result["extraction_notes"] = extraction_notes
+    return result
+
+def ocr_error_result(error: str) -> dict:
+    return {
+        "name": None,
+        "email": None,
+        "phone": None,
+        "raw_text": "",
+        "confidence": 0.0,
+        "source": "Document",
+        "error": error
+    }
+
+def pdf_page_count(source: Union[str, bytes]) -> int:
+    """Number of pages in a PDF (path or bytes), read from its metadata without rasterizing"""
+    from pdf2image import pdfinfo_from_bytes, pdfinfo_from_path
+    info = pdfinfo_from_path(source) if isinstance(source, str) else pdfinfo_from_bytes(source)
+    return int(info["Pages"])
+
+def ocr_pdf_page(source: Union[str, bytes], page: int, dpi: int = 200) -> str:
+    """Rasterize and OCR a single PDF page (1-based) of a PDF path or bytes"""
+    from pdf2image import convert_from_bytes, convert_from_path
+    convert = convert_from_path if isinstance(source, str) else convert_from_bytes
+    images = convert(source, dpi=dpi, first_page=page, last_page=page, grayscale=True)
+    # Rendered at the requested DPI already, so only clean up the page
+    settings = {**PREPROCESS_SETTINGS,
+                "stages": [stage for stage in PREPROCESS_SETTINGS["stages"] if stage not in ("decode", "resize")]}
+    return "\n".join(pytesseract.image_to_string(preprocess_for_ocr(image, settings)) for image in images)
+
+def tesseract_ocr(source: Union[str, bytes], filename: str) -> dict:
+    """OCR a document given as a file path (read directly by the decoder) or bytes"""
     try:
         text = ""
         if filename.lower().endswith('.pdf'):
             # Convert PDF to images
-            images = convert_from_bytes(file_content)
+            from pdf2image import convert_from_bytes, convert_from_path
+            images = convert_from_path(source) if isinstance(source, str) else convert_from_bytes(source)
             for image in images:
                 text += pytesseract.image_to_string(image) + "\n"
         else:
-            image = Image.open(BytesIO(file_content))
+            image, timings = load_for_ocr(source)
+            started = time.perf_counter()
             text = pytesseract.image_to_string(image)
-        name = extract_name_from_text(text)
-        email = extract_email_from_text(text)
-        phone = extract_phone_from_text(text)
-        return {
-            "name": name,
-            "email": email,
-            "phone": phone,
-            "raw_text": text,
-            "confidence": 1.0,
-            "source": "Document"
-        }
+            timings["ocr"] = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(f"OCR timings for {filename} (ms): {timings}")
+            result = build_ocr_result(text)
+            result["timings"] = timings
+            return result
+        return build_ocr_result(text)
     except Exception as e:
-        return {
-            "name": None,
-            "email": None,
-            "phone": None,
-            "raw_text": "",
-            "confidence": 0.0,
-            "source": "Document",
-            "error": str(e)
-        } 
\ No newline at end of file
+        return ocr_error_result(str(e))
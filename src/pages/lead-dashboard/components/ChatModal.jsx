@@ -8,7 +8,9 @@ const ChatModal = ({ isOpen, onClose, lead, onSendMessage }) => {
   const [messages, setMessages] = useState([]);
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const messagesEndRef = useRef(null);
+  const abortRef = useRef(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -18,6 +20,12 @@ const ChatModal = ({ isOpen, onClose, lead, onSendMessage }) => {
     scrollToBottom();
   }, [messages]);
 
+  // Closing the modal abandons any reply still streaming
+  useEffect(() => {
+    if (!isOpen) abortRef.current?.abort();
+    return () => abortRef.current?.abort();
+  }, [isOpen]);
+
   useEffect(() => {
     if (isOpen && lead) {
       // Initialize with a welcome message
@@ -47,24 +55,40 @@ const ChatModal = ({ isOpen, onClose, lead, onSendMessage }) => {
     setInputMessage('');
     setIsLoading(true);
 
+    const aiMessageId = Date.now() + 1;
+    const controller = new AbortController();
+    abortRef.current = controller;
+
     try {
-      // Call the real LLM API
-      const response = await onSendMessage(currentMessage);
+      // Call the real LLM API, showing the reply as it streams in
+      const onToken = (token) => {
+        setIsStreaming(true);
+        setMessages(prev => {
+          if (!prev.some(message => message.id === aiMessageId)) {
+            return [...prev, { id: aiMessageId, type: 'ai', content: token, timestamp: new Date() }];
+          }
+          return prev.map(message =>
+            message.id === aiMessageId ? { ...message, content: message.content + token } : message
+          );
+        });
+      };
+      const response = await onSendMessage(currentMessage, { onToken, signal: controller.signal });
       
       const aiResponse = {
-        id: Date.now() + 1,
+        id: aiMessageId,
         type: 'ai',
         content: response.reply,
         timestamp: new Date(),
         leadContext: response.lead_context
       };
       
-      setMessages(prev => [...prev, aiResponse]);
+      setMessages(prev => [...prev.filter(message => message.id !== aiMessageId), aiResponse]);
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('LLM interaction failed:', error);
       
       const errorResponse = {
-        id: Date.now() + 1,
+        id: Date.now() + 2,
         type: 'error',
         content: error.message || 'Sorry, I encountered an error. Please try again.',
         timestamp: new Date()
@@ -72,7 +96,9 @@ const ChatModal = ({ isOpen, onClose, lead, onSendMessage }) => {
       
       setMessages(prev => [...prev, errorResponse]);
     } finally {
+      if (abortRef.current === controller) abortRef.current = null;
       setIsLoading(false);
+      setIsStreaming(false);
     }
   };
 
@@ -180,7 +206,7 @@ const ChatModal = ({ isOpen, onClose, lead, onSendMessage }) => {
             </div>
           ))}
           
-          {isLoading && (
+          {isLoading && !isStreaming && (
             <div className="flex items-center space-x-2 text-text-secondary">
               <div className="animate-spin">
                 <Icon name="Loader2" size={16} />
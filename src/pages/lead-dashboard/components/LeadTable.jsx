@@ -1,32 +1,9 @@
-import React, { useState, useMemo } from 'react';
+import React from 'react';
 import Icon from '../../../components/AppIcon';
 import Button from '../../../components/ui/Button';
 
-const LeadTable = ({ leads, onUpdateStatus, onDeleteLead, onInteract }) => {
-  const [sortConfig, setSortConfig] = useState({ key: null, direction: 'asc' });
-
-  const handleSort = (key) => {
-    let direction = 'asc';
-    if (sortConfig.key === key && sortConfig.direction === 'asc') {
-      direction = 'desc';
-    }
-    setSortConfig({ key, direction });
-  };
-
-  const sortedLeads = React.useMemo(() => {
-    if (!sortConfig.key) return leads;
-
-    return [...leads].sort((a, b) => {
-      if (a[sortConfig.key] < b[sortConfig.key]) {
-        return sortConfig.direction === 'asc' ? -1 : 1;
-      }
-      if (a[sortConfig.key] > b[sortConfig.key]) {
-        return sortConfig.direction === 'asc' ? 1 : -1;
-      }
-      return 0;
-    });
-  }, [leads, sortConfig]);
-
+// Leads arrive sorted by the server, which can sort by name and email
+const LeadTable = ({ leads, sortConfig, onSort, onUpdateStatus, onDeleteLead, onInteract }) => {
   const getStatusBadge = (status) => {
     const baseClasses = "px-3 py-1 rounded-full text-xs font-medium";
     if (status === 'New') {
@@ -60,20 +37,22 @@ const LeadTable = ({ leads, onUpdateStatus, onDeleteLead, onInteract }) => {
           <thead className="bg-surface border-b border-border">
             <tr>
               {[
-                { key: 'name', label: 'Name' },
-                { key: 'email', label: 'Email' },
+                { key: 'name', label: 'Name', sortable: true },
+                { key: 'email', label: 'Email', sortable: true },
                 { key: 'phone', label: 'Phone' },
                 { key: 'status', label: 'Status' },
                 { key: 'source', label: 'Source' }
               ].map((column) => (
                 <th
                   key={column.key}
-                  className="px-6 py-4 text-left text-sm font-medium text-text-secondary cursor-pointer hover:bg-gray-50 transition-micro"
-                  onClick={() => handleSort(column.key)}
+                  className={`px-6 py-4 text-left text-sm font-medium text-text-secondary ${
+                    column.sortable ? 'cursor-pointer hover:bg-gray-50 transition-micro' : ''
+                  }`}
+                  onClick={column.sortable ? () => onSort(column.key) : undefined}
                 >
                   <div className="flex items-center space-x-2">
                     <span>{column.label}</span>
-                    {getSortIcon(column.key)}
+                    {column.sortable && getSortIcon(column.key)}
                   </div>
                 </th>
               ))}
@@ -83,7 +62,7 @@ const LeadTable = ({ leads, onUpdateStatus, onDeleteLead, onInteract }) => {
             </tr>
           </thead>
           <tbody className="divide-y divide-border">
-            {sortedLeads.map((lead) => (
+            {leads.map((lead) => (
               <tr key={lead.id} className="hover:bg-surface transition-micro">
                 <td className="px-6 py-4 text-sm font-medium text-text-primary">
                   {lead.name}
@@ -140,7 +119,7 @@ const LeadTable = ({ leads, onUpdateStatus, onDeleteLead, onInteract }) => {
 
       {/* Mobile Cards */}
       <div className="md:hidden space-y-4 p-4">
-        {sortedLeads.map((lead) => (
+        {leads.map((lead) => (
           <div key={lead.id} className="bg-white border border-border rounded-lg p-4 shadow-card">
             <div className="flex justify-between items-start mb-3">
               <div>
@@ -1,7 +1,8 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import Header from '../../components/ui/Header';
 import Button from '../../components/ui/Button';
+import Input from '../../components/ui/Input';
 import { Toast } from '../../components/ui/Toast';
 import LeadTable from './components/LeadTable';
 import FilterButtons from './components/FilterButtons';
@@ -10,32 +11,69 @@ import StatsCards from './components/StatsCards';
 import Icon from '../../components/AppIcon';
 import apiService from '../../services/api';
 
+const PAGE_SIZE = 50;
+const FILTER_STATUSES = { new: 'New', contacted: 'Contacted' };
+
 const LeadDashboard = () => {
   const navigate = useNavigate();
   const [leads, setLeads] = useState([]);
-  const [filteredLeads, setFilteredLeads] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [stats, setStats] = useState({ total: 0, by_status: {} });
   const [activeFilter, setActiveFilter] = useState('all');
+  const [search, setSearch] = useState('');
+  const [query, setQuery] = useState('');
+  const [sortConfig, setSortConfig] = useState({ key: null, direction: 'asc' });
   const [selectedLead, setSelectedLead] = useState(null);
   const [isChatModalOpen, setIsChatModalOpen] = useState(false);
   const [toast, setToast] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isFetching, setIsFetching] = useState(false);
   const [userRole, setUserRole] = useState('');
+  // Only the latest request may update the list when filters change quickly
+  const latestRequest = useRef(0);
+
+  // Filtering, search and sorting happen on the server; the list holds the
+  // pages loaded so far and nextCursor fetches the next one
+  const getListParams = () => ({
+    status: FILTER_STATUSES[activeFilter],
+    q: query.trim(),
+    sort: sortConfig.key ? `${sortConfig.direction === 'desc' ? '-' : ''}${sortConfig.key}` : 'id',
+    limit: PAGE_SIZE,
+  });
 
-  // Load leads from API
-  const loadLeads = async () => {
+  // Load the first page (or, with `cursor`, the next one) of leads from the API
+  const loadLeads = async (cursor = null) => {
+    const request = ++latestRequest.current;
     try {
-      setIsLoading(true);
-      const leadsData = await apiService.getLeads();
-      setLeads(leadsData);
-      setFilteredLeads(leadsData);
+      setIsFetching(true);
+      const page = await apiService.getLeadsPage({ ...getListParams(), cursor });
+      if (request !== latestRequest.current) return;
+      setLeads(prevLeads => (cursor ? [...prevLeads, ...page.items] : page.items));
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('Failed to load leads:', error);
       showToast('Failed to load leads. Please try again.', 'error');
     } finally {
-      setIsLoading(false);
+      if (request === latestRequest.current) {
+        setIsFetching(false);
+        setIsLoading(false);
+      }
+    }
+  };
+
+  const loadStats = async () => {
+    try {
+      setStats(await apiService.getLeadStats());
+    } catch (error) {
+      console.error('Failed to load lead stats:', error);
     }
   };
 
+  const refresh = () => {
+    loadLeads();
+    loadStats();
+  };
+
   useEffect(() => {
     // Check authentication and get user role
     const isAuthenticated = localStorage.getItem('isAuthenticated');
@@ -47,46 +85,43 @@ const LeadDashboard = () => {
     }
     
     setUserRole(role || 'sales');
-    
-    // Load leads from API
-    loadLeads();
+    loadStats();
   }, [navigate]);
 
+  // Reload from the first page whenever the filter, search or sort changes
   useEffect(() => {
-    filterLeads();
-  }, [leads, activeFilter]);
+    if (localStorage.getItem('isAuthenticated') !== 'true') return;
+    loadLeads();
+  }, [activeFilter, query, sortConfig]);
 
-  const filterLeads = () => {
-    let filtered = leads;
-    
-    switch (activeFilter) {
-      case 'new':
-        filtered = leads.filter(lead => lead.status === 'New');
-        break;
-      case 'contacted':
-        filtered = leads.filter(lead => lead.status === 'Contacted');
-        break;
-      default:
-        filtered = leads;
-    }
-    
-    setFilteredLeads(filtered);
-  };
+  // Search once typing pauses rather than on every keystroke
+  useEffect(() => {
+    const timer = setTimeout(() => setQuery(search), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
 
   const handleFilterChange = (filter) => {
     setActiveFilter(filter);
   };
 
+  const handleSort = (key) => {
+    setSortConfig(prevSort => ({
+      key,
+      direction: prevSort.key === key && prevSort.direction === 'asc' ? 'desc' : 'asc',
+    }));
+  };
+
   const handleUpdateStatus = async (leadId, newStatus) => {
     try {
       await apiService.updateLeadStatus(leadId, newStatus);
       
-      // Update local state
+      // Update local state; a lead that no longer matches the filter leaves the list
       setLeads(prevLeads =>
-        prevLeads.map(lead =>
-          lead.id === leadId ? { ...lead, status: newStatus } : lead
-        )
+        prevLeads
+          .map(lead => (lead.id === leadId ? { ...lead, status: newStatus } : lead))
+          .filter(lead => !FILTER_STATUSES[activeFilter] || lead.status === FILTER_STATUSES[activeFilter])
       );
+      loadStats();
       
       showToast(`Lead status updated to ${newStatus}`, 'success');
     } catch (error) {
@@ -105,6 +140,7 @@ const LeadDashboard = () => {
       
       // Update local state
       setLeads(prevLeads => prevLeads.filter(lead => lead.id !== leadId));
+      loadStats();
       showToast('Lead deleted successfully', 'success');
     } catch (error) {
       console.error('Failed to delete lead:', error);
@@ -117,13 +153,14 @@ const LeadDashboard = () => {
     setIsChatModalOpen(true);
   };
 
-  const handleLLMInteraction = async (prompt) => {
+  const handleLLMInteraction = async (prompt, { onToken, signal } = {}) => {
     if (!selectedLead) return;
 
     try {
-      const response = await apiService.interactWithLead(selectedLead.id, prompt);
+      const response = await apiService.streamInteractionWithLead(selectedLead.id, prompt, { onToken, signal });
       return response;
     } catch (error) {
+      if (error.name === 'AbortError') throw error;
       console.error('LLM interaction failed:', error);
       throw new Error('Failed to get AI response. Please try again.');
     }
@@ -136,9 +173,9 @@ const LeadDashboard = () => {
 
   const getLeadCounts = () => {
     return {
-      total: leads.length,
-      new: leads.filter(lead => lead.status === 'New').length,
-      contacted: leads.filter(lead => lead.status === 'Contacted').length
+      total: stats.total,
+      new: stats.by_status.New || 0,
+      contacted: stats.by_status.Contacted || 0
     };
   };
 
@@ -178,13 +215,9 @@ const LeadDashboard = () => {
 
   // Refresh leads when returning to dashboard
   useEffect(() => {
-    const handleFocus = () => {
-      loadLeads();
-    };
-
-    window.addEventListener('focus', handleFocus);
-    return () => window.removeEventListener('focus', handleFocus);
-  }, []);
+    window.addEventListener('focus', refresh);
+    return () => window.removeEventListener('focus', refresh);
+  });
 
   if (isLoading) {
     return (
@@ -235,21 +268,42 @@ const LeadDashboard = () => {
           {/* Stats Cards */}
           <StatsCards stats={getStats()} />
 
-          {/* Filter Buttons */}
-          <FilterButtons
-            activeFilter={activeFilter}
-            onFilterChange={handleFilterChange}
-            leadCounts={getLeadCounts()}
-          />
+          {/* Filter Buttons and Search */}
+          <div className="flex flex-col md:flex-row md:items-start md:justify-between md:space-x-4">
+            <FilterButtons
+              activeFilter={activeFilter}
+              onFilterChange={handleFilterChange}
+              leadCounts={getLeadCounts()}
+            />
+            <div className="mb-6 md:w-72">
+              <Input
+                type="search"
+                placeholder="Search name, email or phone"
+                value={search}
+                onChange={(e) => setSearch(e.target.value)}
+                maxLength={200}
+              />
+            </div>
+          </div>
 
           {/* Lead Table */}
           <LeadTable
-            leads={filteredLeads}
+            leads={leads}
+            sortConfig={sortConfig}
+            onSort={handleSort}
             onUpdateStatus={handleUpdateStatus}
             onDeleteLead={handleDeleteLead}
             onInteract={handleInteract}
           />
 
+          {nextCursor && (
+            <div className="flex justify-center mt-6">
+              <Button variant="outline" onClick={() => loadLeads(nextCursor)} disabled={isFetching}>
+                {isFetching ? 'Loading...' : 'Load more'}
+              </Button>
+            </div>
+          )}
+
           {/* Floating Action Button for Mobile */}
           <div className="fixed bottom-6 right-6 md:hidden">
             <Link to="/create-lead">
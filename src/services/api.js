@@ -5,8 +5,8 @@ class ApiService {
     this.baseURL = API_BASE_URL;
   }
 
-  // Generic request method
-  async request(endpoint, options = {}) {
+  // Generic request method; resolves to the fetch Response, throwing on HTTP errors
+  async send(endpoint, options = {}) {
     const url = `${this.baseURL}${endpoint}`;
     const config = {
       headers: {
@@ -24,16 +24,36 @@ class ApiService {
         throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
       }
 
-      return await response.json();
+      return response;
     } catch (error) {
       console.error('API request failed:', error);
       throw error;
     }
   }
 
+  async request(endpoint, options = {}) {
+    const response = await this.send(endpoint, options);
+    return response.json();
+  }
+
   // Lead Management
-  async getLeads() {
-    return this.request('/leads');
+  // One page of leads; params: status, source, created_after, created_before,
+  // q, sort, limit and cursor (the nextCursor of the previous page)
+  async getLeadsPage(params = {}) {
+    const query = new URLSearchParams(
+      Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== '')
+    ).toString();
+    const response = await this.send(`/leads${query ? `?${query}` : ''}`);
+
+    return {
+      items: await response.json(),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+    };
+  }
+
+  // { total, by_status } across all leads
+  async getLeadStats() {
+    return this.request('/leads/stats');
   }
 
   async createLeadManual(leadData) {
@@ -88,6 +108,60 @@ class ApiService {
     });
   }
 
+  // Streams the reply as Server-Sent Events; onToken(token) is called as text
+  // arrives and the promise resolves to { reply, lead_context }. Aborting
+  // `signal` closes the stream, which also stops generation on the server.
+  async streamInteractionWithLead(leadId, prompt, { onToken, signal } = {}) {
+    const response = await fetch(`${this.baseURL}/interact/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify({ id: leadId, prompt }),
+      signal,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    while (result === null) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = 'message';
+        let data = '';
+        for (const line of rawEvent.split('\n')) {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        }
+        const payload = data ? JSON.parse(data) : {};
+        if (event === 'token') {
+          onToken?.(payload.token);
+        } else if (event === 'done') {
+          result = payload;
+        } else if (event === 'error') {
+          throw new Error(payload.detail || 'Streaming failed');
+        }
+      }
+    }
+
+    if (result === null) {
+      throw new Error('The response stream ended unexpectedly');
+    }
+    return result;
+  }
+
   // Workflow Management
   async executeWorkflow(workflowData) {
     return this.request('/workflow', {